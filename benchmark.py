@@ -0,0 +1,335 @@
+"""Offline crawl benchmark against a local Playboard stand-in.
+
+Serves synthetic chart pages with the markup crawl_date() reads (title links, view labels, channel
+names, subscriber counts, lazy thumbnails), loads more rows on scroll like the real chart, and can
+show a reCAPTCHA iframe part way down. Like the real site, pages also pull channel avatars, a web font and
+a tracking script. Each chart depth is crawled end to end in headless Chrome, once per driver profile,
+and reported as rows/s, page load time, scroll latency and peak memory.
+
+    python benchmark.py [--sizes 200 500 2500 5000] [--batch-size 20] [--latency 0.2] [--captcha-at N]
+                        [--captcha-solve-delay S] [--profiles standard lean]
+"""
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+from io import BytesIO
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import playboard_core
+from playboard_core import DRIVER_PROFILES, CaptchaService, CrawlMetrics, create_driver, crawl_date, console_log
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BENCH_SIZES = (200, 500, 2500, 5000)
+BENCH_DATE = "20240101"
+NO_FILTER = {'is_filter_applied': False, 'selected_filters': {}, 'use_custom_filter': False, 'custom_min': -1, 'custom_max': -1}
+
+# --- Synthetic Chart Server ---
+ROW_HTML = (
+    '<tr><td class="rank">{rank}</td>'
+    '<td class="title"><div class="thumb-wrapper image"><div class="thumb lazy-image" '
+    'data-background-image="//i.ytimg.com/vi/{video_id}/hqdefault.jpg"></div></div>'
+    '<a class="title__label" href="/video/{video_id}">Synthetic video #{rank} {words}</a>'
+    '<span class="fluc-label">{views}</span></td>'
+    '<td class="channel"><img class="avatar" src="/static/avatar{channel}.png" width="24" height="24">'
+    '<a href="/channel/UC{channel:08d}"><span class="name">Channel {channel}</span></a>'
+    '<div class="subs"><span class="subs__count">{subscribers:,}</span></div></td></tr>'
+)
+
+PAGE_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Synthetic Playboard chart</title>
+<style>@font-face {{ font-family: "Synthetic"; src: url("/static/font.woff2"); }}
+body {{ font-family: "Synthetic", sans-serif; }} tr {{ height: 64px; }} .thumb {{ width: 120px; height: 68px; background: #ddd; }}</style>
+<script async src="/static/tracker.js?site=googletagmanager.com"></script></head>
+<body>
+<table class="chart"><tbody id="rows">{rows}</tbody></table>
+<div id="captcha-slot"></div>
+<script>
+const total = {total}, batch = {batch};
+let loaded = {loaded}, captchaAt = {captcha_at}, loading = false, blocked = false;
+function showCaptcha() {{
+    blocked = true;
+    document.getElementById('captcha-slot').innerHTML =
+        '<div class="g-recaptcha" data-sitekey="synthetic-site-key" data-callback="onCaptchaSolved"></div>' +
+        '<textarea id="g-recaptcha-response"></textarea>' +
+        '<iframe title="reCAPTCHA" src="about:blank" width="304" height="78"></iframe>';
+}}
+window.onCaptchaSolved = function () {{
+    document.getElementById('captcha-slot').innerHTML = '';
+    blocked = false;
+    captchaAt = 0;
+    maybeLoad();
+}};
+function maybeLoad() {{
+    if (loading || blocked || loaded >= total) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+    if (captchaAt && loaded >= captchaAt) {{ showCaptcha(); return; }}
+    loading = true;
+    fetch(`/rows?offset=${{loaded}}&limit=${{batch}}`).then(r => r.text()).then(html => {{
+        document.getElementById('rows').insertAdjacentHTML('beforeend', html);
+        loaded = Math.min(total, loaded + batch);
+        loading = false;
+        maybeLoad();
+    }});
+}}
+window.addEventListener('scroll', maybeLoad);
+</script>
+</body></html>
+"""
+
+def synthetic_row(rank):
+    rng = random.Random(rank)
+    views = rng.choice([f"{rng.uniform(1, 999):.1f}K", f"{rng.uniform(1, 99):.1f}M", str(rng.randint(100, 999))])
+    return ROW_HTML.format(
+        rank=rank,
+        video_id=f"vid{rank:08d}",
+        words=" ".join(rng.choice(["shorts", "funny", "music", "game", "vlog", "food", "cat"]) for _ in range(3)),
+        views=views,
+        channel=rank % 997,
+        subscribers=rng.randint(0, 20000000),
+    )
+
+def _asset_bytes():
+    """Avatar, font and tracker payloads served under /static/, sized roughly like the real ones."""
+    rng = random.Random(0)
+    payload = {'font.woff2': bytes(rng.getrandbits(8) for _ in range(60000)), 'tracker.js': b"/*" + b"x" * 80000 + b"*/"}
+    try:
+        from PIL import Image
+        image = Image.frombytes('RGB', (96, 96), bytes(rng.getrandbits(8) for _ in range(96 * 96 * 3)))
+        data = BytesIO()
+        image.save(data, 'PNG')
+        payload['avatar.png'] = data.getvalue()
+    except ImportError:
+        payload['avatar.png'] = b"\x89PNG\r\n\x1a\n" + bytes(20000)
+    return payload
+
+ASSET_TYPES = {'.png': "image/png", '.woff2': "font/woff2", '.js': "application/javascript"}
+
+class SyntheticChartServer:
+    """Local HTTP server that imitates a Playboard chart with infinite scroll.
+
+    `total_rows` rows are available, the first `batch_size` are in the page and each scroll to the
+    bottom fetches the next batch after `latency` seconds. With `captcha_at`, a reCAPTCHA iframe
+    replaces further loading once that many rows are on the page until its callback is called.
+    """
+
+    def __init__(self, total_rows, batch_size=20, latency=0.2, captcha_at=0):
+        self.total_rows = total_rows
+        self.batch_size = batch_size
+        self.latency = latency
+        self.captcha_at = captcha_at
+        self.asset_requests = 0
+        self._assets = _asset_bytes()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _rows(self, offset, limit):
+        end = min(self.total_rows, offset + limit)
+        return "".join(synthetic_row(rank) for rank in range(offset + 1, end + 1))
+
+    def _handler_class(self):
+        chart = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                content_type = "text/html; charset=utf-8"
+                if parsed.path.startswith("/static/"):
+                    name = parsed.path.rsplit("/", 1)[-1]
+                    extension = name[name.rfind("."):]
+                    chart.asset_requests += 1
+                    data = chart._assets['avatar.png' if extension == ".png" else name]
+                    content_type = ASSET_TYPES[extension]
+                elif parsed.path == "/rows":
+                    params = parse_qs(parsed.query)
+                    time.sleep(chart.latency)
+                    data = chart._rows(int(params['offset'][0]), int(params['limit'][0])).encode('utf-8')
+                elif parsed.path.startswith("/chart/"):
+                    data = PAGE_HTML.format(
+                        rows=chart._rows(0, chart.batch_size), total=chart.total_rows, batch=chart.batch_size,
+                        loaded=min(chart.batch_size, chart.total_rows), captcha_at=chart.captcha_at or 0
+                    ).encode('utf-8')
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+class FakeCaptchaSolver:
+    """Stands in for TwoCaptcha: answers every reCAPTCHA with a dummy token after `delay` seconds."""
+
+    def __init__(self, delay=2.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+
+    def recaptcha(self, sitekey, url):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("synthetic solver failure")
+        return {'code': f"synthetic-token-{sitekey}"}
+
+# --- Memory Sampling ---
+class BrowserMemorySampler:
+    """Samples the resident memory of the driver's browser process tree in the background (needs psutil)."""
+
+    def __init__(self, driver, interval=0.2):
+        self.peak_bytes = None
+        self._interval = interval
+        self._stop = threading.Event()
+        self._root = None
+        if psutil is not None:
+            try:
+                self._root = psutil.Process(driver.service.process.pid)
+            except Exception:
+                self._root = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            total = 0
+            try:
+                for proc in [self._root] + self._root.children(recursive=True):
+                    try:
+                        total += proc.memory_info().rss
+                    except psutil.Error:
+                        pass
+            except psutil.Error:
+                return
+            self.peak_bytes = max(self.peak_bytes or 0, total)
+            self._stop.wait(self._interval)
+
+    def __enter__(self):
+        if self._root is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+# --- Runner ---
+def run_case(size, args, profile="standard"):
+    """Crawls one synthetic chart of `size` rows on a fresh headless Chrome with `profile` and returns its measurements."""
+    with SyntheticChartServer(size, args.batch_size, args.latency, args.captcha_at) as server:
+        playboard_core.PLAYBOARD_CHART_BASE = server.url
+        driver = create_driver(headless=True, profile=profile)
+        try:
+            metrics = CrawlMetrics()
+            captcha_service = CaptchaService(solver=FakeCaptchaSolver(args.captcha_solve_delay))
+            log_q = queue.Queue()
+            with BrowserMemorySampler(driver) as sampler:
+                started = time.perf_counter()
+                with metrics.track_driver(driver, BENCH_DATE):
+                    items = crawl_date(
+                        driver, True, BENCH_DATE, "south-korea", size, threading.Event(), log_q, NO_FILTER, set(),
+                        extraction_mode=args.extraction_mode, incremental=args.incremental, prune_dom=args.prune_dom,
+                        metrics=metrics, captcha_service=captcha_service
+                    )
+                elapsed = time.perf_counter() - started
+            js_heap = driver.execute_script("return performance.memory ? performance.memory.usedJSHeapSize : null")
+        finally:
+            driver.quit()
+
+    report = metrics.report()
+    phases = {row['phase']: row for row in report['summary']}
+    scroll = phases.get('scroll', {})
+    captcha = captcha_service.stats()
+    page_load = sum(phases.get(phase, {}).get('total_s', 0) for phase in ('driver_get', 'load_wait'))
+    return {
+        'size': size,
+        'profile': profile,
+        'items': len(items),
+        'elapsed_s': round(elapsed, 2),
+        'rows_per_s': round(len(items) / elapsed, 1) if elapsed else 0.0,
+        'page_load_s': round(page_load, 2),
+        'asset_requests': server.asset_requests,
+        'scrolls': scroll.get('count', 0),
+        'scroll_avg_s': scroll.get('avg_s'),
+        'scroll_max_s': scroll.get('max_s'),
+        'webdriver_calls': report['counters'].get('webdriver_calls', 0),
+        'captcha_attempts': report['counters'].get('captcha_attempts', 0),
+        'captcha_solve_s': captcha['avg_solve_s'],
+        'captcha_wait_s': phases.get('captcha', {}).get('total_s'),
+        'browser_peak_mb': round(sampler.peak_bytes / 2 ** 20, 1) if sampler.peak_bytes else None,
+        'js_heap_mb': round(js_heap / 2 ** 20, 1) if js_heap else None,
+        'phases': report['summary'],
+    }
+
+COLUMNS = [
+    ('size', "size"), ('profile', "profile"), ('items', "items"), ('elapsed_s', "elapsed(s)"), ('rows_per_s', "rows/s"),
+    ('page_load_s', "page load(s)"), ('asset_requests', "assets"),
+    ('scrolls', "scrolls"), ('scroll_avg_s', "scroll avg(s)"), ('scroll_max_s', "scroll max(s)"),
+    ('webdriver_calls', "wd calls"), ('captcha_solve_s', "captcha solve(s)"), ('captcha_wait_s', "captcha total(s)"),
+    ('browser_peak_mb', "browser peak(MB)"), ('js_heap_mb', "JS heap(MB)"),
+]
+
+def format_table(results):
+    header = [label for _, label in COLUMNS]
+    rows = [["-" if r[key] is None else str(r[key]) for key, _ in COLUMNS] for r in results]
+    widths = [max(len(cell) for cell in column) for column in zip(header, *rows)]
+    lines = ["  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in [header] + rows]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline Playboard crawl benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCH_SIZES), help="chart depths to crawl")
+    parser.add_argument("--batch-size", type=int, default=20, help="rows added per infinite-scroll load")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each scroll batch arrives")
+    parser.add_argument("--captcha-at", type=int, default=0, help="show a reCAPTCHA iframe after this many rows")
+    parser.add_argument("--captcha-solve-delay", type=float, default=2.0, help="seconds the fake captcha solver takes")
+    parser.add_argument("--extraction-mode", choices=("bulk", "per_element"), default="bulk")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--prune-dom", action="store_true")
+    parser.add_argument("--profiles", nargs="+", choices=DRIVER_PROFILES, default=["standard"], help="driver profiles to compare")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if psutil is None:
+        console_log("⚠️ psutil이 설치되어 있지 않아 브라우저 최대 메모리는 측정하지 않습니다.")
+
+    results = []
+    for size in args.sizes:
+        for profile in args.profiles:
+            console_log(f"🏁 {size}개 차트 벤치마크 시작 (프로필: {profile})...")
+            results.append(run_case(size, args, profile))
+            console_log(f"✅ {size}개 ({profile}): {results[-1]['items']}개 수집, {results[-1]['rows_per_s']}개/초")
+
+    print(format_table(results))
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
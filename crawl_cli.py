@@ -0,0 +1,336 @@
+"""Headless command line crawler for scheduled runs.
+
+Logs in, crawls the given chart dates without Streamlit and writes the results to a file (CSV, Excel,
+Parquet or PDF, picked by extension) and/or the local chart store. Progress goes to stderr, either as
+readable log lines or, with `--progress json`, as one JSON object per line. Every run is checkpointed, so
+a failed or interrupted run can be continued with `--resume JOB_ID`.
+
+    python crawl_cli.py --dates 20240101-20240107 [--long] [--country south-korea] [--max-items 5000]
+                        [--output results.csv] [--workers 2] [--progress json]
+
+Exit codes: 0 all dates crawled, 1 run failed (login, driver or no results), 2 bad arguments,
+3 some dates failed or are still pending, 4 the output or report file couldn't be written, 130 interrupted.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+
+from playboard_core import (
+    DRIVER_PROFILES, MAX_PARALLEL_DRIVERS, SUBSCRIBER_FILTER_RANGES, ChartStore, CrawlCheckpoint, CrawlMetrics,
+    CrawlProgress, authenticate_driver, compile_subscriber_filter, crawl, crawl_parallel, create_driver,
+    console_log, describe_progress, log_level_of, parse_dates, RECORD_COLUMNS, account_owner,
+)
+from result_model import ResultTable, empty_positions, merge_positions
+from result_export import (
+    EXPORT_FORMATS, PDF_EXPORT_COLUMNS, PDF_ROWS_PER_PAGE, TABLE_EXPORT_COLUMNS, available_formats, iter_record_chunks,
+    write_csv, write_excel, write_parquet, write_pdf,
+)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+EXIT_IO = 4
+EXIT_INTERRUPTED = 130
+
+COUNTRIES = {'south-korea': "한국", 'united-states': "미국", 'japan': "일본"}
+PROGRESS_INTERVAL = 1.0
+
+class _Reporter:
+    """Writes log messages and progress to stderr, as text or as JSON lines."""
+
+    def __init__(self, fmt="text", min_level="INFO", stream=None):
+        self.fmt = fmt
+        self.min_level = min_level
+        self.stream = stream or sys.stderr
+        self._lock = threading.Lock()
+        self._last_progress = None
+
+    def _write(self, line):
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def emit(self, event, **fields):
+        if self.fmt == "json":
+            self._write(json.dumps(dict(event=event, ts=round(time.time(), 3), **fields), ensure_ascii=False, default=str))
+
+    def log(self, message):
+        level = log_level_of(message)
+        if self.fmt == "json":
+            self.emit("log", level=level, message=message)
+        elif level != "DEBUG" or self.min_level == "DEBUG":
+            self._write(f"[{time.strftime('%H:%M:%S')}] {message}")
+
+    def progress(self, snapshot):
+        if not snapshot or snapshot == self._last_progress:
+            return
+        self._last_progress = snapshot
+        if self.fmt == "json":
+            self.emit("progress", **snapshot)
+        else:
+            self._write(f"[{time.strftime('%H:%M:%S')}] ⏳ {describe_progress(snapshot)}")
+
+class _CliLogSink:
+    """Queue-like sink passed to crawl() as log_q; reports messages and notices the end of the crawl."""
+
+    def __init__(self, reporter):
+        self.reporter = reporter
+        self.done = threading.Event()
+
+    def put(self, message):
+        if message == "CRAWL_COMPLETE":
+            self.done.set()
+            return
+        self.reporter.log(message)
+
+class _CliResultSink:
+    """Queue-like sink passed to crawl() as result_q; stores each published batch in a ResultTable."""
+
+    def __init__(self, table):
+        self.table = table
+        self.positions = empty_positions()
+        self._lock = threading.Lock()
+
+    def put(self, df):
+        if df is None or df.empty:
+            return
+        with self._lock:
+            self.positions = merge_positions(self.positions, self.table.add(df))
+
+def build_filter_settings(args):
+    """Turns the subscriber filter options into the filter settings dictionary the crawler takes."""
+    selected = {name: name in (args.subscriber_range or []) for name in SUBSCRIBER_FILTER_RANGES}
+    use_custom = args.min_subscribers is not None or args.max_subscribers is not None
+    filter_settings = {
+        'is_filter_applied': any(selected.values()) or use_custom,
+        'selected_filters': selected,
+        'use_custom_filter': use_custom,
+        'custom_min': args.min_subscribers if args.min_subscribers is not None else -1,
+        'custom_max': args.max_subscribers if args.max_subscribers is not None else -1,
+    }
+    filter_settings['intervals'] = compile_subscriber_filter(filter_settings).intervals
+    return filter_settings
+
+def output_format(path):
+    """Export format of an output path from its extension, or None if it isn't supported."""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, spec in EXPORT_FORMATS.items():
+        if spec['extension'] == extension:
+            return fmt
+    return None
+
+def write_output(table, positions, path, title=None, log_fn=console_log):
+    """Writes the rows at `positions` to `path` in the format of its extension."""
+    fmt = output_format(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if fmt == 'pdf':
+            write_pdf(iter_record_chunks(table, positions, PDF_EXPORT_COLUMNS, PDF_ROWS_PER_PAGE), len(positions), tmp_path,
+                      title=title, log_fn=log_fn)
+        elif fmt == 'parquet':
+            write_parquet(iter_record_chunks(table, positions, RECORD_COLUMNS), RECORD_COLUMNS, tmp_path)
+        elif fmt == 'xlsx':
+            write_excel(iter_record_chunks(table, positions, TABLE_EXPORT_COLUMNS), TABLE_EXPORT_COLUMNS, tmp_path)
+        else:
+            write_csv(iter_record_chunks(table, positions, TABLE_EXPORT_COLUMNS), TABLE_EXPORT_COLUMNS, tmp_path)
+        # 완성된 파일만 보이도록 임시 파일에 쓴 뒤 바꿔치기합니다. 예약 작업이 읽다 만 파일을 가져가지 않습니다.
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def run_exit_code(checkpoint, rows, interrupted):
+    if interrupted:
+        return EXIT_INTERRUPTED
+    if rows == 0 and not checkpoint.state['completed_dates']:
+        return EXIT_FAILED
+    if checkpoint.pending_dates() or checkpoint.state['failed_dates']:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Playboard chart crawler")
+    parser.add_argument("--dates", help="dates to crawl, e.g. 20240101, 20240101,20240103 or 20240101-20240107")
+    parser.add_argument("--country", choices=list(COUNTRIES), default="south-korea", help="chart country (short-form charts only)")
+    parser.add_argument("--long", action="store_true", help="crawl the long-form video chart instead of shorts")
+    parser.add_argument("--max-items", type=int, default=5000, help="rows to collect per date")
+    parser.add_argument("--resume", metavar="JOB_ID", help="continue a checkpointed job with its saved settings")
+    parser.add_argument("--email", default=os.environ.get("PLAYBOARD_EMAIL"), help="Playboard account (default: $PLAYBOARD_EMAIL)")
+    parser.add_argument("--password", default=os.environ.get("PLAYBOARD_PASSWORD"), help="default: $PLAYBOARD_PASSWORD")
+    parser.add_argument("--captcha-api-key", default=os.environ.get("PLAYBOARD_CAPTCHA_API_KEY"), help="2Captcha API key (default: $PLAYBOARD_CAPTCHA_API_KEY)")
+    parser.add_argument("--output", help="result file; the extension picks the format (.csv, .xlsx, .parquet, .pdf)")
+    parser.add_argument("--no-store", dest="store", action="store_false", help="don't read or write the local chart store")
+    parser.add_argument("--workers", type=int, default=1, help=f"browsers crawling dates in parallel (1-{MAX_PARALLEL_DRIVERS})")
+    parser.add_argument("--fetch-engine", choices=("selenium", "http"), default="selenium")
+    parser.add_argument("--incremental", action="store_true", help="harvest rows while scrolling")
+    parser.add_argument("--prune-dom", action="store_true", help="with --incremental, drop harvested rows from the page")
+    parser.add_argument("--profile", choices=DRIVER_PROFILES, default=None, help="browser profile (default: $PLAYBOARD_DRIVER_PROFILE)")
+    parser.add_argument("--headful", action="store_true", help="show the browser window")
+    parser.add_argument("--subscriber-range", action="append", choices=list(SUBSCRIBER_FILTER_RANGES), metavar="RANGE",
+                        help=f"keep channels in a subscriber range (repeatable): {', '.join(SUBSCRIBER_FILTER_RANGES)}")
+    parser.add_argument("--min-subscribers", type=int, help="keep channels with at least this many subscribers")
+    parser.add_argument("--max-subscribers", type=int, help="keep channels with at most this many subscribers")
+    parser.add_argument("--progress", choices=("text", "json"), default="text", help="progress output on stderr")
+    parser.add_argument("--verbose", action="store_true", help="include scroll-level debug messages in text output")
+    parser.add_argument("--report", metavar="PATH", help="write the crawl metrics report as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.resume and not args.dates:
+        parser.error("--dates or --resume is required")
+    if not args.email or not args.password:
+        parser.error("--email/--password (or PLAYBOARD_EMAIL/PLAYBOARD_PASSWORD) are required")
+    if not 1 <= args.workers <= MAX_PARALLEL_DRIVERS:
+        parser.error(f"--workers must be between 1 and {MAX_PARALLEL_DRIVERS}")
+    if args.max_items < 1:
+        parser.error("--max-items must be positive")
+    if args.output:
+        fmt = output_format(args.output)
+        if fmt is None:
+            parser.error(f"unsupported output extension: {args.output}")
+        if fmt not in available_formats():
+            parser.error(f"{EXPORT_FORMATS[fmt]['label']} export needs an optional library that isn't installed")
+    elif not args.store:
+        parser.error("nothing to write results to: give --output or drop --no-store")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    reporter = _Reporter(args.progress, min_level="DEBUG" if args.verbose else "INFO")
+
+    try:
+        if args.resume:
+            checkpoint = CrawlCheckpoint.load(args.resume)
+            if checkpoint.state['owner'] != account_owner(args.email, args.password):
+                reporter.log(f"❌ 이 계정의 작업이 아닙니다: {args.resume}")
+                return EXIT_USAGE
+            reporter.log(f"🔁 작업 {checkpoint.job_id}을(를) 이어서 크롤링합니다. 남은 날짜: {checkpoint.pending_dates()}")
+        else:
+            dates = parse_dates(args.dates, log_fn=reporter.log)
+            if not dates:
+                reporter.log(f"❌ 날짜를 해석할 수 없습니다: {args.dates}")
+                return EXIT_USAGE
+            settings = {
+                "max_items": args.max_items,
+                "dates": dates,
+                "country_code": args.country,
+                "country_name": COUNTRIES[args.country],
+                "incremental": args.incremental,
+                "prune_dom": args.incremental and args.prune_dom,
+                "parallel_workers": args.workers,
+                "fetch_engine": args.fetch_engine,
+                "use_chart_store": args.store,
+            }
+            checkpoint = CrawlCheckpoint.create(account_owner(args.email, args.password), not args.long, settings, build_filter_settings(args))
+    except (OSError, ValueError) as e:
+        reporter.log(f"❌ 작업을 준비하지 못했습니다: {e}")
+        return EXIT_FAILED
+
+    state = checkpoint.state
+    settings = state['settings']
+    reporter.emit("start", job_id=checkpoint.job_id, is_short=state['is_short'], dates=checkpoint.pending_dates(),
+                  country_code=settings['country_code'], max_items=settings['max_items'])
+
+    table = ResultTable()
+    results = _CliResultSink(table)
+    if args.resume:
+        # 이전 실행에서 수집한 행도 출력 파일에 포함합니다. 크롤러는 이 해시들을 다시 수집하지 않습니다.
+        results.put(checkpoint.load_rows())
+
+    headless = not args.headful
+    driver = None
+    try:
+        driver = create_driver(headless=headless, profile=args.profile)
+        authenticate_driver(driver, args.email, args.password, log_fn=reporter.log)
+        reporter.log("✅ 로그인되었습니다.")
+    except Exception as e:
+        reporter.log(f"❌ 브라우저를 준비하거나 로그인하지 못했습니다: {e}")
+        if driver is not None:
+            driver.quit()
+        reporter.emit("done", job_id=checkpoint.job_id, exit_code=EXIT_FAILED, rows=len(results.positions))
+        return EXIT_FAILED
+
+    stop_event = threading.Event()
+    logs = _CliLogSink(reporter)
+    progress = CrawlProgress()
+    metrics = CrawlMetrics()
+    kwargs = {
+        'incremental': settings.get('incremental', False),
+        'prune_dom': settings.get('prune_dom', False),
+        'captcha_api_key': args.captcha_api_key,
+        'fetch_engine': settings.get('fetch_engine', 'selenium'),
+        'chart_store': ChartStore() if settings.get('use_chart_store', True) else None,
+        'checkpoint': checkpoint,
+        'progress': progress,
+        'metrics': metrics,
+    }
+    target = crawl
+    workers = settings.get('parallel_workers', 1)
+    if workers > 1 and len(checkpoint.pending_dates()) > 1:
+        target = crawl_parallel
+        kwargs.update({'workers': workers, 'credentials': (args.email, args.password), 'headless': headless,
+                       'driver_profile': args.profile})
+    thread = threading.Thread(
+        target=target,
+        args=(driver, state['is_short'], settings['dates'], settings['country_code'], settings['country_name'],
+              settings['max_items'], stop_event, logs, results, state['filter_settings']),
+        kwargs=kwargs, daemon=True,
+    )
+
+    # SIGTERM(예약 작업 종료)도 Ctrl+C처럼 처리해 체크포인트를 남기고 지금까지의 결과를 저장합니다.
+    def request_stop(signum, frame):
+        if not stop_event.is_set():
+            reporter.log("🛑 중단 요청을 받았습니다. 진행 중인 날짜를 정리하고 종료합니다.")
+        stop_event.set()
+
+    previous_handlers = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        thread.start()
+        while not logs.done.wait(PROGRESS_INTERVAL):
+            reporter.progress(progress.snapshot())
+        thread.join()
+    finally:
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+        driver.quit()
+    reporter.progress(progress.snapshot())
+
+    interrupted = stop_event.is_set()
+    rows = len(results.positions)
+    output = None
+    if args.output and rows:
+        try:
+            write_output(table, results.positions, args.output, title=f"Playboard {checkpoint.job_id}", log_fn=reporter.log)
+            output = os.path.abspath(args.output)
+            reporter.log(f"💾 {rows}개 항목을 {args.output}에 저장했습니다.")
+        except Exception as e:
+            reporter.log(f"❌ 결과 파일을 저장하지 못했습니다: {e}")
+            reporter.emit("error", job_id=checkpoint.job_id, path=args.output, message=str(e))
+            reporter.emit("done", job_id=checkpoint.job_id, exit_code=EXIT_IO, rows=rows)
+            return EXIT_IO
+    if args.report:
+        try:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                f.write(metrics.to_json())
+        except OSError as e:
+            # 결과는 이미 저장됐고 체크포인트도 남아 있으므로 보고서만 실패했다고 알립니다.
+            reporter.log(f"❌ 측정 보고서를 저장하지 못했습니다: {e}")
+            reporter.emit("error", job_id=checkpoint.job_id, path=args.report, message=str(e))
+            reporter.emit("done", job_id=checkpoint.job_id, exit_code=EXIT_IO, rows=rows, output=output)
+            return EXIT_IO
+
+    exit_code = run_exit_code(checkpoint, rows, interrupted)
+    if exit_code == EXIT_PARTIAL:
+        reporter.log(f"⚠️ 끝나지 않은 날짜가 있습니다. --resume {checkpoint.job_id} 로 이어서 크롤링할 수 있습니다.")
+    reporter.emit("done", job_id=checkpoint.job_id, exit_code=exit_code, rows=rows, output=output,
+                  completed_dates=state['completed_dates'], failed_dates=state['failed_dates'],
+                  pending_dates=checkpoint.pending_dates())
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
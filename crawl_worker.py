@@ -0,0 +1,399 @@
+"""Background crawl worker process.
+
+Runs crawl jobs outside the Streamlit script run, so a crawl keeps going across browser refreshes and
+can be looked at from any session. The Streamlit app talks to it through CrawlWorkerClient over a local
+TCP socket, one JSON object per line in each direction. Every job request names the account (`owner`) it
+is made for, and jobs of other accounts are answered as unknown.
+
+    python crawl_worker.py [--host 127.0.0.1] [--port 8765]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import socketserver
+
+from playboard_core import (
+    CrawlCheckpoint, CrawlMetrics, CrawlProgress, DriverPool, ChartStore, LogBuffer, prune_log_files, account_owner, verify_login,
+    crawl_parallel, crawl_with_pool, console_log, state_path,
+)
+
+WORKER_HOST = os.environ.get("PLAYBOARD_WORKER_HOST", "127.0.0.1")
+WORKER_PORT = int(os.environ.get("PLAYBOARD_WORKER_PORT", "8765"))
+WORKER_TOKEN = os.environ.get("PLAYBOARD_WORKER_TOKEN", "")
+WORKER_LOG_FILE = state_path("PLAYBOARD_WORKER_LOG", "crawl_worker.log")
+# 끝난 작업은 이 시간(초)이 지나면 작업자 메모리에서 지웁니다. 결과는 체크포인트에 남습니다.
+WORKER_JOB_RETENTION = int(os.environ.get("PLAYBOARD_WORKER_JOB_RETENTION", "3600"))
+
+# --- Job State ---
+class _JobLogSink:
+    """Queue-like sink passed to crawl() as log_q; updates the job instead of buffering messages."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def put(self, message):
+        self.job.on_log(message)
+
+class _JobResultSink:
+    """Queue-like sink passed to crawl() as result_q; holds each published batch until a client has read it."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def put(self, df):
+        self.job.on_batch(df)
+
+class CrawlJob:
+    def __init__(self, checkpoint, pool=None):
+        self.job_id = checkpoint.job_id
+        self.owner = checkpoint.state['owner']
+        self.checkpoint = checkpoint
+        self.pool = pool
+        self.stop_event = threading.Event()
+        self.status = 'running'
+        self.progress = CrawlProgress()
+        self.metrics = CrawlMetrics()
+        self.rows = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        # 작업 로그 전체는 작업 ID별 로그 파일에 남습니다.
+        self.log = LogBuffer(f"job_{self.job_id}")
+        # 배치는 클라이언트가 받아 갔다고 알리거나 작업이 끝나면 메모리에서 내리고, 그 뒤로는 체크포인트의
+        # 행 기록에서 읽습니다. 크롤러는 배치를 발행하기 전에 체크포인트에 기록하므로 두 순서가 같습니다.
+        self._row_base = checkpoint.row_count()
+        self._batch_sizes = []
+        self._batches = []
+        self._batch_offset = 0
+        self._lock = threading.Lock()
+
+    def on_log(self, message):
+        if message == "CRAWL_COMPLETE":
+            with self._lock:
+                self.status = 'stopped' if self.stop_event.is_set() else 'done'
+                self.finished_at = time.time()
+                self._batch_offset += len(self._batches)
+                self._batches = []
+            return
+        self.log.add(message)
+
+    def on_batch(self, df):
+        if df is None or df.empty:
+            return
+        records = json.loads(df.to_json(orient='records', force_ascii=False))
+        with self._lock:
+            self._batches.append(records)
+            self._batch_sizes.append(len(records))
+            self.rows += len(records)
+
+    def snapshot(self):
+        with self._lock:
+            state = self.checkpoint.state
+            return {
+                'job_id': self.job_id,
+                'status': self.status,
+                'progress': self.progress.snapshot(),
+                'rows': self.rows,
+                'batches': len(self._batch_sizes),
+                'is_short': state['is_short'],
+                'dates': state['settings']['dates'],
+                'completed_dates': list(state['completed_dates']),
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+
+    def logs_since(self, since):
+        entries, next_seq = self.log.since(since)
+        return {'entries': entries, 'next': next_seq}
+
+    def batches_since(self, since):
+        """Returns the batches from `since` on; asking for them acknowledges (and frees) the earlier ones."""
+        with self._lock:
+            total = len(self._batch_sizes)
+            since = max(0, min(since, total))
+            if since > self._batch_offset:
+                del self._batches[:since - self._batch_offset]
+                self._batch_offset = since
+            if since == self._batch_offset:
+                return {'batches': list(self._batches), 'next': total}
+            start = self._row_base + sum(self._batch_sizes[:since])
+            end = self._row_base + sum(self._batch_sizes[:self._batch_offset])
+            in_memory = list(self._batches)
+        # 메모리에서 내린 배치(새로고침 후 다시 연결한 경우 등)는 행 기록에서 한 배치로 읽어 돌려줍니다.
+        rows = self.checkpoint.read_rows(start, end)
+        return {'batches': ([rows] if rows else []) + in_memory, 'next': total}
+
+    def close(self):
+        self.log.close()
+
+# --- Service ---
+class CrawlService:
+    """Owns the worker's driver pools and crawl jobs; every public method is one API operation."""
+
+    def __init__(self):
+        self._pools = {}
+        # 비밀번호가 바뀌어 교체된 풀은 그 풀을 쓰는 작업이 모두 끝난 뒤에 닫습니다.
+        self._retired_pools = []
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._chart_store = None
+
+    def _pool(self, email, password, headless, driver_profile=None):
+        key = (email.strip().lower(), bool(headless), driver_profile)
+        with self._lock:
+            pool = self._pools.get(key)
+        if pool is not None and pool.credentials == (email, password) and pool.failure is None:
+            return pool
+        if pool is not None and pool.failure is None:
+            # 다른 비밀번호(오타 포함)로는 실행 중인 작업의 풀을 건드리지 않도록, 별도 드라이버로 먼저 로그인해 봅니다.
+            verify_login(email, password, headless, driver_profile)
+        with self._lock:
+            pool = self._pools.get(key)
+            # 로그인에 실패한 풀은 드라이버를 더 띄우지 않으므로 새 풀로 바꿉니다.
+            if pool is None or pool.credentials != (email, password) or pool.failure is not None:
+                if pool is not None:
+                    self._retired_pools.append(pool)
+                pool = DriverPool(email, password, headless=headless, profile=driver_profile)
+                self._pools[key] = pool
+        self._close_retired_pools()
+        return pool
+
+    def _close_retired_pools(self):
+        with self._lock:
+            in_use = {id(job.pool) for job in self._jobs.values() if job.finished_at is None}
+            idle = [pool for pool in self._retired_pools if id(pool) not in in_use and not pool.stats()['leased']]
+            self._retired_pools = [pool for pool in self._retired_pools if pool not in idle]
+        for pool in idle:
+            pool.shutdown()
+
+    def _prune_jobs(self):
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and now - job.finished_at > WORKER_JOB_RETENTION]
+            for job_id in expired:
+                self._jobs.pop(job_id).close()
+            running = [job.checkpoint.job_id for job in self._jobs.values() if job.finished_at is None]
+        self._close_retired_pools()
+        prune_log_files()
+        CrawlCheckpoint.prune(keep=running)
+
+    def _job(self, job_id, owner):
+        job = self._jobs.get(job_id)
+        # 다른 계정의 작업은 없는 작업과 같은 오류로 답해 작업 ID가 있는지도 알려주지 않습니다.
+        if job is None or job.owner != owner:
+            raise KeyError(f"알 수 없는 작업입니다: {job_id}")
+        return job
+
+    def ping(self):
+        return {'pid': os.getpid(), 'jobs': len(self._jobs)}
+
+    def login(self, email, password, headless=True, driver_profile=None):
+        """Warms a driver pool for the account and checks that at least one driver can log in."""
+        pool = self._pool(email, password, headless, driver_profile)
+        pool.release(pool.lease())
+        return {'owner': account_owner(email, password)}
+
+    def submit(self, email, password, is_short=True, settings=None, filter_settings=None, headless=True,
+               captcha_api_key=None, resume_job_id=None, driver_profile=None):
+        if resume_job_id:
+            checkpoint = CrawlCheckpoint.load(resume_job_id)
+            if checkpoint.state['owner'] != account_owner(email, password):
+                raise KeyError(f"알 수 없는 작업입니다: {resume_job_id}")
+            is_short = checkpoint.state['is_short']
+            settings = checkpoint.state['settings']
+            filter_settings = checkpoint.state['filter_settings']
+        else:
+            checkpoint = CrawlCheckpoint.create(account_owner(email, password), is_short, settings, filter_settings)
+        pool = self._pool(email, password, headless, driver_profile)
+
+        if settings.get('use_chart_store', True) and self._chart_store is None:
+            self._chart_store = ChartStore()
+        self._prune_jobs()
+        job = CrawlJob(checkpoint, pool)
+        kwargs = {
+            'incremental': settings.get('incremental', False),
+            'prune_dom': settings.get('prune_dom', False),
+            'captcha_api_key': captcha_api_key,
+            'fetch_engine': settings.get('fetch_engine', 'selenium'),
+            'chart_store': self._chart_store if settings.get('use_chart_store', True) else None,
+            'checkpoint': checkpoint,
+            'progress': job.progress,
+            'metrics': job.metrics,
+        }
+        args = (settings['dates'], settings['country_code'], settings['country_name'], settings['max_items'],
+                job.stop_event, _JobLogSink(job), _JobResultSink(job), filter_settings)
+        workers = settings.get('parallel_workers', 1)
+        if workers > 1 and len(settings['dates']) > 1:
+            target = crawl_parallel
+            args = (None, is_short) + args
+            kwargs.update({'workers': workers, 'driver_pool': pool})
+        else:
+            target = crawl_with_pool
+            args = (pool, is_short) + args
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+        threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True).start()
+        return {'job_id': job.job_id}
+
+    def status(self, job_id, owner):
+        return self._job(job_id, owner).snapshot()
+
+    def jobs(self, owner):
+        self._prune_jobs()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {'jobs': [job.snapshot() for job in jobs if job.owner == owner]}
+
+    def logs(self, job_id, owner, since=0):
+        return self._job(job_id, owner).logs_since(since)
+
+    def results(self, job_id, owner, since=0):
+        return self._job(job_id, owner).batches_since(since)
+
+    def report(self, job_id, owner):
+        return self._job(job_id, owner).metrics.report()
+
+    def cancel(self, job_id, owner):
+        self._job(job_id, owner).stop_event.set()
+        return {'job_id': job_id}
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            job.stop_event.set()
+        for pool in list(self._pools.values()):
+            pool.shutdown()
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if WORKER_TOKEN and request.pop('token', None) != WORKER_TOKEN:
+                    raise PermissionError("작업자 토큰이 올바르지 않습니다.")
+                op = request.pop('op')
+                if op.startswith('_') or op == 'shutdown' or not hasattr(self.server.service, op):
+                    raise ValueError(f"지원하지 않는 요청입니다: {op}")
+                response = {'ok': True, 'result': getattr(self.server.service, op)(**request)}
+            except Exception as e:
+                response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+class CrawlWorkerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, service):
+        self.service = service
+        super().__init__(address, _RequestHandler)
+
+# --- Client ---
+class CrawlWorkerError(Exception):
+    pass
+
+class CrawlWorkerClient:
+    """Talks to a running crawl worker; `ensure_running()` starts one in the background if needed."""
+
+    def __init__(self, host=WORKER_HOST, port=WORKER_PORT, token=WORKER_TOKEN, timeout=10):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.timeout = timeout
+
+    def _call(self, op, timeout=None, **params):
+        request = dict(params, op=op)
+        if self.token:
+            request['token'] = self.token
+        with socket.create_connection((self.host, self.port), timeout=timeout or self.timeout) as sock:
+            sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode('utf-8'))
+            with sock.makefile('rb') as f:
+                line = f.readline()
+        if not line:
+            raise CrawlWorkerError("작업자 응답이 없습니다.")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise CrawlWorkerError(response.get('error'))
+        return response['result']
+
+    def is_running(self):
+        try:
+            self.ping()
+            return True
+        except (OSError, CrawlWorkerError):
+            return False
+
+    def ensure_running(self, wait=15):
+        """Starts `crawl_worker.py` as a detached process unless a worker already answers on the port."""
+        if self.is_running():
+            return
+        with open(WORKER_LOG_FILE, 'ab') as log_file:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--host", self.host, "--port", str(self.port)],
+                stdout=log_file, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                start_new_session=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            if self.is_running():
+                return
+            time.sleep(0.3)
+        raise CrawlWorkerError("작업자 프로세스를 시작하지 못했습니다.")
+
+    def ping(self):
+        return self._call('ping')
+
+    def login(self, email, password, headless=True, driver_profile=None):
+        return self._call('login', timeout=180, email=email, password=password, headless=headless, driver_profile=driver_profile)
+
+    def submit(self, email, password, is_short, settings, filter_settings, headless=True, captcha_api_key=None, driver_profile=None):
+        return self._call('submit', email=email, password=password, is_short=is_short, settings=settings,
+                          filter_settings=filter_settings, headless=headless, captcha_api_key=captcha_api_key,
+                          driver_profile=driver_profile)['job_id']
+
+    def resume(self, email, password, job_id, headless=True, captcha_api_key=None, driver_profile=None):
+        return self._call('submit', email=email, password=password, headless=headless,
+                          captcha_api_key=captcha_api_key, resume_job_id=job_id, driver_profile=driver_profile)['job_id']
+
+    def status(self, job_id, owner):
+        return self._call('status', job_id=job_id, owner=owner)
+
+    def jobs(self, owner):
+        return self._call('jobs', owner=owner)['jobs']
+
+    def logs(self, job_id, owner, since=0):
+        return self._call('logs', job_id=job_id, owner=owner, since=since)
+
+    def results(self, job_id, owner, since=0):
+        return self._call('results', job_id=job_id, owner=owner, since=since)
+
+    def report(self, job_id, owner):
+        return self._call('report', job_id=job_id, owner=owner)
+
+    def cancel(self, job_id, owner):
+        return self._call('cancel', job_id=job_id, owner=owner)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Playboard crawl worker")
+    parser.add_argument("--host", default=WORKER_HOST)
+    parser.add_argument("--port", type=int, default=WORKER_PORT)
+    args = parser.parse_args(argv)
+
+    service = CrawlService()
+    server = CrawlWorkerServer((args.host, args.port), service)
+    console_log(f"크롤링 작업자가 {args.host}:{args.port}에서 대기 중입니다. (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
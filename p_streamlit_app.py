@@ -1,32 +1,22 @@
 import streamlit as st
-import os
-import re
 import time
 import threading
 import queue
-import random
-import hashlib
-import logging
-from datetime import datetime, timezone, timedelta
-from urllib.parse import quote
-import requests
-import html
+from datetime import datetime
 import json
 import pandas as pd
-import io
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-from twocaptcha import TwoCaptcha
-from PIL import Image
-import base64
+from playboard_core import (
+    MAX_PARALLEL_DRIVERS, compile_subscriber_filter,
+    LOG_TAIL_LINES, LogBuffer, prune_log_files, console_log, account_owner, CrawlProgress, CrawlMetrics, describe_progress,
+    parse_dates, create_driver, authenticate_driver,
+    ChartStore, CrawlCheckpoint, DriverPool,
+    crawl, crawl_parallel, crawl_with_pool,
+)
+from crawl_worker import CrawlWorkerClient, CrawlWorkerError
+from result_model import ResultTable, ResultView, empty_positions, merge_positions
+from result_export import EXPORT_FORMATS, ResultExporter, available_formats
+from thumbnail_cache import ThumbnailCache
 
 # APP_DATA_FILE = "app_data.json" # 로컬 파일 저장 기능 삭제
 
@@ -49,14 +39,26 @@ def initialize_session_state():
         st.session_state.driver = None
     if 'login_status' not in st.session_state:
         st.session_state.login_status = "Not logged in"
-    if 'log_messages' not in st.session_state:
-        st.session_state.log_messages = []
-    if 'scraped_data' not in st.session_state:
-        st.session_state.scraped_data = pd.DataFrame()
+    if 'log_buffer' not in st.session_state:
+        # 로그인 전에는 메모리에만 기록하고, 로그인하면 계정별 로그 파일에 이어서 기록합니다.
+        # 세션이 끝나 버퍼가 정리되면 파일 핸들러도 닫히고, 오래된 로그 파일과 작업 체크포인트는 새 세션이 시작될 때 지웁니다.
+        prune_log_files()
+        CrawlCheckpoint.prune()
+        st.session_state.log_buffer = LogBuffer()
+    if 'result_table' not in st.session_state:
+        # 세션의 모든 결과 행은 여기에 한 번만 저장하고, 크롤링 결과/유튜브 결과/그룹은 행 위치만 가집니다.
+        st.session_state.result_table = ResultTable()
+    if 'scraped_rows' not in st.session_state:
+        st.session_state.scraped_rows = empty_positions()
+    if 'result_views' not in st.session_state:
+        st.session_state.result_views = {}
+    if 'exporter' not in st.session_state:
+        st.session_state.exporter = None
     if 'is_scraping' not in st.session_state:
         st.session_state.is_scraping = False
     if 'progress' not in st.session_state:
-        st.session_state.progress = 0
+        # 가장 최근 진행률 스냅샷 (CrawlProgress.snapshot())
+        st.session_state.progress = {}
     if 'subscriber_filters' not in st.session_state:
         st.session_state.subscriber_filters = {
             "0K~100K": {"0~1K": False, "1K~5K": False, "5K~10K": False, "10K~50K": False, "50K~100K": False},
@@ -65,13 +67,6 @@ def initialize_session_state():
             "5M~10M": {"5M~5.5M": False, "5.5M~6M": False, "6M~6.5M": False, "6.5M~7M": False, "7M~7.5M": False, "7.5M~8M": False, "8M~8.5M": False, "8.5M~9M": False, "9M~9.5M": False, "9.5M~10M": False},
             "10M+": {"10M+": False}
         }
-        st.session_state.filter_ranges = {
-            "0~1K": (0, 1000), "1K~5K": (1000, 5000), "5K~10K": (5000, 10000), "10K~50K": (10000, 50000), "50K~100K": (50000, 100000),
-            "100K~500K": (100000, 500000), "500K~1M": (500000, 1000000),
-            "1M~1.5M": (1000000, 1500000), "1.5M~2M": (1500000, 2000000), "2M~2.5M": (2000000, 2500000), "2.5M~3M": (2500000, 3000000), "3M~3.5M": (3000000, 3500000), "3.5M~4M": (3500000, 4000000), "4M~4.5M": (4000000, 4500000), "4.5M~5M": (4500000, 5000000),
-            "5M~10M": {"5M~5.5M": (5000000, 5500000), "5.5M~6M": (5500000, 6000000), "6M~6.5M": (6000000, 6500000), "6.5M~7M": (6500000, 7000000), "7M~7.5M": (7000000, 7500000), "7.5M~8M": (7500000, 8000000), "8M~8.5M": (8000000, 8500000), "8.5M~9M": (8500000, 9000000), "9M~9.5M": (9000000, 9500000), "9.5M~10M": (9500000, 10000000)},
-            "10M+": {"10M+": (10000000, float('inf'))}
-        }
     if 'use_custom_filter' not in st.session_state:
         st.session_state.use_custom_filter = False
     if 'custom_min' not in st.session_state:
@@ -83,17 +78,33 @@ def initialize_session_state():
     
     if 'crawl_settings' not in st.session_state:
         st.session_state.crawl_settings = {
-            "max_items": 5000, "dates": [], "country_code": "south-korea", "country_name": "한국"
+            "max_items": 5000, "dates": [], "country_code": "south-korea", "country_name": "한국",
+            "incremental": False, "prune_dom": False, "parallel_workers": 1, "fetch_engine": "selenium",
+            "use_chart_store": True
         }
     
-    if 'shopping_cart' not in st.session_state:
+    if 'cart_rows' not in st.session_state:
         # cart_data = persistent_data.get('shopping_cart', []) # 삭제
-        st.session_state.shopping_cart = pd.DataFrame()
+        st.session_state.cart_rows = empty_positions()
 
     if 'custom_groups' not in st.session_state:
         # groups_data = persistent_data.get('custom_groups', {}) # 삭제
+        # 그룹 이름 -> result_table의 행 위치 배열
         st.session_state.custom_groups = {}
 
+    if 'driver_pool' not in st.session_state:
+        st.session_state.driver_pool = None
+    if 'login_credentials' not in st.session_state:
+        st.session_state.login_credentials = None
+    if 'use_worker' not in st.session_state:
+        st.session_state.use_worker = False
+    if 'worker_job_id' not in st.session_state:
+        st.session_state.worker_job_id = None
+    if 'worker_log_seq' not in st.session_state:
+        st.session_state.worker_log_seq = 0
+    if 'worker_batch_seq' not in st.session_state:
+        st.session_state.worker_batch_seq = 0
+
     if '2captcha_api_key' not in st.session_state:
         # st.session_state['2captcha_api_key'] = persistent_data.get('2captcha_api_key', '') # 삭제
         st.session_state['2captcha_api_key'] = ''
@@ -101,6 +112,12 @@ def initialize_session_state():
         st.session_state.thread = None
     if 'stop_event' not in st.session_state:
         st.session_state.stop_event = None
+    if 'crawl_progress' not in st.session_state:
+        st.session_state.crawl_progress = CrawlProgress()
+    if 'crawl_metrics' not in st.session_state:
+        st.session_state.crawl_metrics = None
+    if 'metrics_report' not in st.session_state:
+        st.session_state.metrics_report = None
     if 'log_queue' not in st.session_state:
         st.session_state.log_queue = queue.Queue()
     if 'result_queue' not in st.session_state:
@@ -109,171 +126,161 @@ def initialize_session_state():
 initialize_session_state()
 
 # --- Logging and Progress ---
-def log(message):
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    st.session_state.log_messages.append(f"[{timestamp}] {message}")
-    print(f"[LOG] {message}")
+def log(message, level=None):
+    st.session_state.log_buffer.add(message, level)
+    console_log(message)
+
+def job_owner():
+    """Identifies the logged-in account for crawl checkpoints by a keyed hash of its email and password."""
+    credentials = st.session_state.get('login_credentials')
+    if not credentials:
+        return "anonymous"
+    # 해시 계산이 느리므로 로그인 정보가 바뀔 때만 다시 계산합니다.
+    if st.session_state.get('job_owner_credentials') != credentials:
+        st.session_state.job_owner_id = account_owner(*credentials)
+        st.session_state.job_owner_credentials = credentials
+    return st.session_state.job_owner_id
+
+def attach_account_log():
+    """Continues this session's log in the log file shared by all sessions of the logged-in account."""
+    st.session_state.log_buffer.attach_file(f"account_{job_owner()}")
+
+def render_log_tail(label, key):
+    """Shows only the most recent log lines; the full log is available as a file download."""
+    lines = st.session_state.log_buffer.tail(LOG_TAIL_LINES, st.session_state.get("log_level", "INFO"))
+    st.text_area(label, "\n".join(lines), height=300, key=key)
 
 def update_progress(value):
     st.session_state.progress = value
 
 # --- Helper Functions ---
-def extract_video_id_from_thumbnail(thumb_url):
-    if "ytimg.com/vi/" in thumb_url:
-        parts = thumb_url.split("ytimg.com/vi/")
-        if len(parts) > 1:
-            video_id = parts[1].split("/")[0].split("_")[0]
-            if 8 <= len(video_id) <= 15:
-                return video_id
-    return None
-
-def extract_video_id_from_href(href):
-    if "/video/" in href:
-        parts = href.split("/video/")
-        if len(parts) > 1:
-            video_id = parts[1].split("?")[0].split("&")[0]
-            if 8 <= len(video_id) <= 15:
-                return video_id
-    return None
-
-def parse_subscriber_count(count_text):
-    if not count_text or count_text == "구독자 정보 없음":
-        return count_text
-    return re.sub(r'[^0-9,]', '', count_text)
-
-def convert_subscriber_count_to_int(count_text):
-    if not count_text or count_text == "구독자 정보 없음":
-        return -1
-    try:
-        return int(count_text.replace(',', ''))
-    except (ValueError, TypeError):
-        return -1
-
-def parse_views_to_int(view_text):
-    """Converts view counts with suffixes (K, M, B) to integers."""
-    view_text = str(view_text).strip().upper()
-    view_text = view_text.replace(',', '')
-    if 'K' in view_text:
-        return int(float(view_text.replace('K', '')) * 1000)
-    if 'M' in view_text:
-        return int(float(view_text.replace('M', '')) * 1000000)
-    if 'B' in view_text:
-        return int(float(view_text.replace('B', '')) * 1000000000)
-    try:
-        return int(view_text)
-    except (ValueError, TypeError):
-        return 0
-
-def generate_hash(title, channel):
-    normalized_title = re.sub(r'[^\w]', '', title.lower())
-    normalized_channel = channel.lower()
-    combined = f"{normalized_title}|{normalized_channel}"
-    return hashlib.md5(combined.encode()).hexdigest()
-
-@st.cache_data
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-def parse_dates(date_str):
-    dates = []
-    parts = date_str.replace(" ", "").split(',')
-    for part in parts:
-        if '-' in part:
+@st.cache_resource(show_spinner=False)
+def get_thumbnail_cache():
+    return ThumbnailCache()
+
+def with_cached_thumbnails(df):
+    """Swaps remote thumbnail URLs for small cached data URIs; thumbnails not cached yet are left blank.
+
+    Missing thumbnails are fetched in the background and show up on a later rerun, so rendering never waits on them.
+    """
+    df = df.copy()
+    thumbnails = get_thumbnail_cache().get_many(df['Thumbnail'].tolist())
+    df['Thumbnail'] = [thumbnails.get(url) for url in df['Thumbnail']]
+    pending = int(df['Thumbnail'].isna().sum())
+    if pending:
+        st.caption(f"🖼️ 썸네일 {pending}개를 불러오는 중입니다. 화면을 다시 그리면 표시됩니다.")
+    return df
+
+def add_scraped_results(df):
+    """Stores new result rows in the session's result table and appends them to the scraped results."""
+    positions = st.session_state.result_table.add(df)
+    st.session_state.scraped_rows = merge_positions(st.session_state.scraped_rows, positions)
+
+def positions_of(edited_df):
+    """Maps rows shown in a data editor back to their positions in the result table."""
+    return st.session_state.result_table.positions_of(edited_df['Hash'], edited_df['Date'])
+
+def release_unused_rows():
+    """Drops result table rows that neither the scraped results, the cart nor any group refers to."""
+    groups = st.session_state.custom_groups
+    scraped, cart, *group_rows = st.session_state.result_table.retain(
+        [st.session_state.scraped_rows, st.session_state.cart_rows, *groups.values()]
+    )
+    st.session_state.scraped_rows = scraped
+    st.session_state.cart_rows = cart
+    st.session_state.custom_groups = dict(zip(groups, group_rows))
+
+SORT_OPTIONS = {
+    "기본": None,
+    "채널별 정렬": 'channel',
+    "조회수 높은 순": 'views_desc',
+    "조회수 낮은 순": 'views_asc',
+    "구독자 많은 순": 'subscribers_desc',
+    "구독자 적은 순": 'subscribers_asc',
+}
+RESULT_PAGE_SIZES = (50, 100, 250, 500)
+
+def render_result_page(name, positions, sort_option, column_config, selectable=True):
+    """Shows one page of the sorted rows in a data editor and returns the edited page.
+
+    The sorted order and the current page are memoized per view, so reruns don't copy or re-sort the full results.
+    With `selectable=False` the page is shown read-only, without the selection column, and nothing is returned.
+    """
+    views = st.session_state.result_views
+    if name not in views or views[name].table is not st.session_state.result_table:
+        views[name] = ResultView(st.session_state.result_table)
+    sort_key = SORT_OPTIONS[sort_option]
+
+    col_size, col_page = st.columns(2)
+    page_size = col_size.selectbox("페이지당 항목 수", RESULT_PAGE_SIZES, index=1, key=f"{name}_page_size")
+    total_pages = max(1, -(-len(positions) // page_size))
+    page_key = f"{name}_page"
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+    page = col_page.number_input(f"페이지 (전체 {total_pages})", min_value=1, max_value=total_pages, value=1, step=1, key=page_key) - 1
+
+    page_df = views[name].page(positions, sort_key, page, page_size)
+    st.caption(f"전체 {len(positions)}개 중 {page * page_size + 1}~{page * page_size + len(page_df)}번째 항목")
+    display_df = with_cached_thumbnails(page_df)
+    if not selectable:
+        st.dataframe(display_df, column_config=column_config, hide_index=True)
+        return None
+    display_df.insert(0, "선택", False)
+    # 페이지나 정렬이 바뀌면 이전 페이지의 체크 상태가 다른 행에 남지 않도록 편집기 키를 바꿉니다.
+    return st.data_editor(display_df, column_config=column_config, hide_index=True, key=f"{name}_editor_{sort_key}_{page}_{page_size}")
+
+def render_export_controls(name, positions, title, file_prefix):
+    """Offers the rows at `positions` as a file download; the file is only built when its button is clicked."""
+    exporter = st.session_state.exporter
+    if exporter is None or exporter.table is not st.session_state.result_table:
+        exporter = st.session_state.exporter = ResultExporter(st.session_state.result_table, log_fn=log, thumbnail_loader=get_thumbnail_cache().load_image)
+
+    col_format, col_build = st.columns(2)
+    fmt = col_format.selectbox("파일 형식", available_formats(), format_func=lambda f: EXPORT_FORMATS[f]['label'], key=f"{name}_export_format")
+    options = {}
+    if fmt == 'pdf':
+        options = {'title': title, 'thumbnails': st.checkbox("PDF에 썸네일 포함", value=False, key=f"{name}_pdf_thumbnails", help="썸네일을 내려받아 넣으므로 항목이 많으면 시간이 걸립니다.")}
+    if col_build.button("📦 파일 만들기", key=f"{name}_export_build", use_container_width=True):
+        with st.spinner(f"{EXPORT_FORMATS[fmt]['label']} 파일을 만드는 중..."):
             try:
-                start_s, end_s = part.split('-')
-                start_d = datetime.strptime(start_s, '%Y%m%d')
-                end_d = datetime.strptime(end_s, '%Y%m%d')
-                delta = end_d - start_d
-                for i in range(delta.days + 1):
-                    day = start_d + timedelta(days=i)
-                    dates.append(day.strftime('%Y%m%d'))
+                exporter.export(name, positions, fmt, **options)
+                log(f"📦 {title} {len(positions)}개 항목을 {EXPORT_FORMATS[fmt]['label']} 파일로 만들었습니다.")
             except Exception as e:
-                log(f"날짜 범위 파싱 오류 '{part}': {e}")
-        elif len(part) == 8 and part.isdigit():
-            dates.append(part)
-    return sorted(list(set(dates)))
-
-def convert_df_to_pdf(df):
-    try:
-        plt.rcParams['font.family'] = 'Malgun Gothic'
-        plt.rcParams['axes.unicode_minus'] = False 
-    except Exception as e:
-        log("⚠️ 'Malgun Gothic' 폰트를 찾을 수 없습니다. PDF의 한글이 깨질 수 있습니다.")
-        log("Windows 사용자가 아닌 경우, 시스템에 맞는 한글 폰트를 설치하고 코드를 수정해야 합니다.")
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    ax.axis('tight')
-    ax.axis('off')
-    
-    table = ax.table(cellText=df.values, colLabels=df.columns, cellLoc='center', loc='center', colWidths=[0.1, 0.3, 0.1, 0.15, 0.1, 0.15, 0.1, 0.2])
-    table.auto_set_font_size(False)
-    table.set_fontsize(8)
-    table.scale(1.2, 1.2)
-
-    pdf_buffer = io.BytesIO()
-    with PdfPages(pdf_buffer) as pdf:
-        pdf.savefig(fig, bbox_inches='tight')
-    
-    return pdf_buffer.getvalue()
-
-
-# --- Filter Logic ---
-def should_include_subscriber(subscriber_count, filter_settings):
-    """Checks if a subscriber count is within the selected ranges, using passed-in settings."""
-    if not filter_settings['is_filter_applied']:
-        return True
-    if subscriber_count == -1:
-        return False
-
-    # Check against selected ranges
-    for range_name, is_selected in filter_settings['selected_filters'].items():
-        if is_selected:
-            min_val, max_val = st.session_state.filter_ranges[range_name]
-            if min_val <= subscriber_count < max_val:
-                return True
-    
-    # Check against custom filter
-    if filter_settings['use_custom_filter']:
-        min_val = filter_settings['custom_min']
-        max_val = filter_settings['custom_max']
-        if min_val >= 0 and max_val < 0:
-            return subscriber_count >= min_val
-        elif min_val < 0 and max_val >= 0:
-            return subscriber_count <= max_val
-        elif min_val >= 0 and max_val >= 0:
-            return min_val <= subscriber_count <= max_val
-            
-    # If any filter is applied but none match, return False
-    any_filter_selected = any(filter_settings['selected_filters'].values())
-    if any_filter_selected or filter_settings['use_custom_filter']:
-        return False
-        
-    return True # Default to True if no filters are selected at all
+                log(f"❌ {EXPORT_FORMATS[fmt]['label']} 파일을 만들지 못했습니다: {e}")
+                st.error(f"파일을 만들지 못했습니다: {e}")
+
+    # 행이나 옵션이 바뀌면 캐시된 파일이 무효가 되어 다시 만들어야 다운로드 버튼이 나타납니다.
+    path = exporter.cached(name, positions, fmt, **options)
+    if path:
+        with open(path, 'rb') as f:
+            st.download_button(
+                f"💾 {EXPORT_FORMATS[fmt]['label']} 다운로드", f,
+                f"{file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXPORT_FORMATS[fmt]['extension']}",
+                EXPORT_FORMATS[fmt]['mime'], key=f"{name}_export_download", use_container_width=True
+            )
 
-def log_from_thread(log_queue, message):
-    """Safely log messages from a background thread using a queue."""
-    log_queue.put(message)
+@st.cache_resource(show_spinner=False)
+def get_chart_store():
+    return ChartStore()
 
 # --- Selenium/Scraping Logic ---
+def driver_profile():
+    # 경량 프로필은 이미지를 막으므로 캡챠를 직접 풀어야 하는 일반 모드에서는 쓰지 않습니다.
+    if st.session_state.get("lean_profile") and st.session_state.get("run_headless", True):
+        return "lean"
+    return "standard"
+
 def init_driver():
-    options = Options()
     # 사용자가 선택한 모드에 따라 헤드리스 옵션을 조건부로 추가합니다.
-    if st.session_state.get("run_headless", True):
+    headless = st.session_state.get("run_headless", True)
+    if headless:
         log("INFO: 헤드리스 모드로 실행합니다.")
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1920,1080")
     else:
         log("INFO: 일반 모드(헤드리스 아님)로 실행합니다. 캡챠 발생 시 직접 해결할 수 있습니다.")
-
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
     
     try:
-        log("INFO: WebDriver를 초기화합니다.")
-        driver = webdriver.Chrome(options=options)
-        driver.set_page_load_timeout(30)
-        return driver
+        log(f"INFO: WebDriver를 초기화합니다. (프로필: {driver_profile()})")
+        return create_driver(headless, driver_profile())
     except Exception as e:
         log(f"❌ WebDriver 초기화 실패: {e}")
         st.error(f"WebDriver 초기화 실패: {e}. 배포 환경 설정을 확인하세요.")
@@ -288,22 +295,11 @@ def do_login(email, password):
     driver = st.session_state.driver
     log("🌍 사이트 접속 중...")
     try:
-        driver.get("https://playboard.co")
-        wait = WebDriverWait(driver, 15)
-        
-        login_link = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[text()='로그인']")))
-        login_link.click()
-
-        email_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@name='email']")))
-        password_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@name='password']")))
-        email_input.send_keys(email)
-        password_input.send_keys(password)
-
-        login_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[@type='submit' and .//span[text()='로그인']]")))
-        login_button.click()
-
-        wait.until(EC.invisibility_of_element_located((By.XPATH, "//input[@name='email']")))
+        authenticate_driver(driver, email, password, log_fn=log)
         st.session_state.login_status = "✅ 로그인 성공!"
+        # 병렬 크롤링 시 추가 드라이버도 같은 계정으로 로그인합니다.
+        st.session_state.login_credentials = (email, password)
+        attach_account_log()
         log("✅ 로그인 성공!")
     except Exception as e:
         st.session_state.login_status = f"❌ 로그인 실패: {e}"
@@ -312,211 +308,60 @@ def do_login(email, password):
             st.session_state.driver.quit()
             st.session_state.driver = None
 
-def detect_and_handle_captcha(driver):
-    try:
-        # 1. 메인 프레임에서 'reCAPTCHA' iframe 찾기
-        recaptcha_iframe = driver.find_elements(By.CSS_SELECTOR, "iframe[title='reCAPTCHA']")
-        if not recaptcha_iframe:
-            return True # 캡챠가 더 이상 보이지 않으면 성공으로 간주
+# 로그인에 실패한 풀은 캐시에서 버려 다음 로그인 시도 때 새로 만듭니다.
+@st.cache_resource(show_spinner=False, validate=lambda pool: pool.failure is None)
+def get_driver_pool(email, password, headless=True, profile="standard"):
+    """Returns the process-level driver pool for an account, creating and warming it on first use."""
+    return DriverPool(email, password, headless=headless, profile=profile)
 
-        log("INFO: '로봇이 아닙니다' 캡챠 iframe 발견.")
-        
-        # 캡챠를 풀기 위해 필요한 정보 추출
-        site_key_element = driver.find_element(By.CSS_SELECTOR, ".g-recaptcha")
-        site_key = site_key_element.get_attribute("data-sitekey")
-        page_url = driver.current_url
-        
-        if not st.session_state.get('2captcha_api_key'):
-            log("🚨 캡챠가 감지되었으나, 2Captcha API 키가 없습니다. 자동 해결을 건너뜁니다.")
-            return False
-
-        log("🚨 캡챠 감지됨! 2Captcha로 자동 해결을 시도합니다.")
-        config = {'apiKey': st.session_state['2captcha_api_key']}
-        solver = TwoCaptcha(**config)
-
-        try:
-            result = solver.recaptcha(sitekey=site_key, url=page_url)
-            log("✅ 2Captcha 해결 완료. 토큰을 주입합니다.")
-            
-            recaptcha_response = result['code']
-            
-            # JavaScript를 사용하여 숨겨진 textarea에 값 설정 및 콜백 실행
-            driver.execute_script(f"""
-                document.getElementById('g-recaptcha-response').innerHTML = '{recaptcha_response}';
-            """)
-            
-            # 콜백 함수가 있는지 확인하고 실행
-            callback_func = site_key_element.get_attribute("data-callback")
-            if callback_func:
-                driver.execute_script(f"{callback_func}('{recaptcha_response}');")
-                log("INFO: 캡챠 콜백 함수를 실행했습니다.")
-            else:
-                log("WARN: 콜백 함수를 찾을 수 없습니다. 직접 제출을 시도해야 할 수 있습니다.")
-
-            time.sleep(5) # 캡챠 해결 후 페이지가 변경될 시간을 줍니다.
-            return True
-
-        except Exception as e:
-            log(f"❌ 2Captcha 해결 실패: {e}")
-            return False
-
-    except Exception as e:
-        log(f"⚠️ 캡챠 감지/처리 중 예상치 못한 오류: {e}")
-        return False
-
-def crawl(driver, is_short, dates, country_code, country_name, max_items, stop_event, log_q, result_q, filter_settings):
+def do_pool_login(email, password):
+    pool = get_driver_pool(email, password, st.session_state.get("run_headless", True), driver_profile())
+    log("🌍 공유 드라이버 풀에서 로그인된 드라이버를 기다리는 중...")
     try:
-        all_collected_data = []
-        processed_hashes = set()
-        
-        if not driver:
-            log_from_thread(log_q, "❌ 드라이버가 없습니다. 먼저 로그인 해주세요.")
-            result_q.put(pd.DataFrame())
-            return
-
-        for a_date in dates:
-            if stop_event.is_set():
-                log_from_thread(log_q, "🛑 사용자에 의해 크롤링이 중단되었습니다.")
-                break
-            
-            try:
-                date_obj = datetime.strptime(a_date, '%Y%m%d')
-                kst = timezone(timedelta(hours=9))
-                date_obj = date_obj.replace(tzinfo=kst)
-                key = int(date_obj.timestamp())
-            except ValueError:
-                log_from_thread(log_q, f"❌ 날짜 형식이 올바르지 않습니다: {a_date}")
-                continue
-
-            log_from_thread(log_q, f"🎯 {date_obj.strftime('%Y-%m-%d')} 날짜 크롤링 시작 (목표: {max_items}개)...")
-
-            if is_short:
-                url = f"https://playboard.co/chart/short/most-viewed-all-videos-in-{country_code}-daily?period={key}"
-            else:
-                url = f"https://playboard.co/chart/video/?period={key}"
-            
-            log_from_thread(log_q, f"➡️ URL로 이동 중: {url}")
-            
-            try:
-                driver.get(url)
-                log_from_thread(log_q, "...페이지 로딩 대기 중...")
-                WebDriverWait(driver, 45).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "a.title__label")))
-                log_from_thread(log_q, "✅ 페이지 로딩 완료.")
-            except Exception as e:
-                log_from_thread(log_q, f"❌ 페이지 로딩 실패: {e}")
-                continue
-
-            scroll_count = 0
-            max_scrolls = (max_items // 20) + 15
-            no_change_count = 0
-            
-            prev_items_count = 0
-            while not stop_event.is_set():
-                current_items_on_page = len(driver.find_elements(By.CSS_SELECTOR, "a.title__label"))
-                log_from_thread(log_q, f"스크롤 {scroll_count}회, 페이지 항목: {current_items_on_page}개")
-                
-                if current_items_on_page >= max_items or scroll_count >= max_scrolls:
-                    log_from_thread(log_q, "✅ 목표 항목 수에 도달하여 스크롤을 중단합니다.")
-                    break
-                
-                prev_items_count = current_items_on_page
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                scroll_count += 1
-                time.sleep(2.5) 
-                
-                new_items_on_page = len(driver.find_elements(By.CSS_SELECTOR, "a.title__label"))
-
-                if new_items_on_page == prev_items_count:
-                    no_change_count += 1
-                    log_from_thread(log_q, f"⚠️ 스크롤 후 새 항목이 로드되지 않았습니다. ({no_change_count}/3)")
-                    if no_change_count >= 3:
-                        log_from_thread(log_q, "더 이상 새 항목이 로드되지 않아 캡챠 해결을 시도합니다.")
-                        # Call captcha handler
-                        captcha_solved = detect_and_handle_captcha(driver)
-                        if captcha_solved:
-                            log_from_thread(log_q, "캡챠 해결 후 스크롤을 계속합니다.")
-                            no_change_count = 0 # Reset counter after handling
-                        else:
-                            log_from_thread(log_q, "캡챠 해결에 실패하여 스크롤을 중단합니다.")
-                            break # Stop scrolling for this date
-                else:
-                    no_change_count = 0
-                prev_items_count = new_items_on_page
-
-            log_from_thread(log_q, "🔍 데이터 수집 및 처리 중...")
-            
-            title_elements = driver.find_elements(By.CSS_SELECTOR, "a.title__label")
-            view_elements = driver.find_elements(By.CSS_SELECTOR, "span.fluc-label")
-            thumbnail_elements = driver.find_elements(By.CSS_SELECTOR, "div.thumb-wrapper.image div.thumb.lazy-image")
-            channel_elements = driver.find_elements(By.CSS_SELECTOR, "td.channel a span.name")
-            subscriber_elements = driver.find_elements(By.CSS_SELECTOR, "div.subs span.subs__count")
-
-            log_from_thread(log_q, f"총 {len(title_elements)}개 항목을 페이지에서 발견하여 처리를 시작합니다.")
-            
-            for i in range(len(title_elements)):
-                if len(all_collected_data) >= max_items:
-                    log_from_thread(log_q, f"목표 수집량({max_items}개)에 도달하여 수집을 중단합니다.")
-                    break 
-                if stop_event.is_set(): break
-                    
-                try:
-                    title = title_elements[i].text.strip()
-                    channel = channel_elements[i].text.strip() if i < len(channel_elements) else "N/A"
-                    
-                    item_hash = generate_hash(title, channel)
-                    if item_hash in processed_hashes:
-                        continue
-
-                    views = view_elements[i].text.strip() if i < len(view_elements) else "N/A"
-                    subscriber_count_text = subscriber_elements[i].text.strip() if i < len(subscriber_elements) else "구독자 정보 없음"
-                    
-                    subscriber_count_int = convert_subscriber_count_to_int(subscriber_count_text)
-                    views_numeric = parse_views_to_int(views)
-
-                    # Pass filter_settings to the check function
-                    if not should_include_subscriber(subscriber_count_int, filter_settings):
-                        continue
-
-                    thumb_url = ""
-                    if i < len(thumbnail_elements):
-                        thumb_url_raw = thumbnail_elements[i].get_attribute("data-background-image")
-                        if thumb_url_raw and thumb_url_raw.startswith("//"):
-                            thumb_url = "https:" + thumb_url_raw
-
-                    video_href = title_elements[i].get_attribute("href")
-                    video_id = extract_video_id_from_href(video_href) or extract_video_id_from_thumbnail(thumb_url)
-                    youtube_url = f"https://www.youtube.com/watch?v={video_id}" if video_id else ""
-
-                    all_collected_data.append({
-                        'Thumbnail': thumb_url,
-                        'Title': title,
-                        'Views': views,
-                        'Views_numeric': views_numeric,
-                        'Channel': channel,
-                        'Date': date_obj.strftime('%Y-%m-%d'),
-                        'Subscribers': subscriber_count_text,
-                        'Subscribers_numeric': subscriber_count_int,
-                        'Hash': item_hash,
-                        'YouTube URL': youtube_url
-                    })
-                    processed_hashes.add(item_hash)
-                    
-                    # 진행률 업데이트
-                    current_progress = int((len(all_collected_data) / max_items) * 100)
-                    log_q.put(f"PROGRESS:{current_progress}")
-
-                except Exception as e:
-                    log_from_thread(log_q, f"⚠️ 항목 {i+1} 처리 중 오류 발생: {e}")
-                    continue 
-
-        result_q.put(pd.DataFrame(all_collected_data))
-
+        pool.release(pool.lease())
     except Exception as e:
-        log_from_thread(log_q, f"❌ 크롤링 중 심각한 오류 발생: {e}")
-        result_q.put(pd.DataFrame())
-    finally:
-        log_from_thread(log_q, "CRAWL_COMPLETE")
-
+        if pool.failure is not None:
+            pool.shutdown()
+        st.session_state.login_status = f"❌ 로그인 실패: {e}"
+        log(st.session_state.login_status)
+        return
+    st.session_state.driver_pool = pool
+    st.session_state.login_credentials = (email, password)
+    attach_account_log()
+    st.session_state.login_status = "✅ 로그인 성공! (공유 드라이버 풀)"
+    log(st.session_state.login_status)
+
+def get_worker_client():
+    return CrawlWorkerClient()
+
+def do_worker_login(email, password):
+    client = get_worker_client()
+    log("🌍 크롤링 작업자 프로세스에 연결하는 중...")
+    try:
+        client.ensure_running()
+        client.login(email, password, headless=st.session_state.get("run_headless", True), driver_profile=driver_profile())
+    except (OSError, CrawlWorkerError) as e:
+        st.session_state.login_status = f"❌ 로그인 실패: {e}"
+        log(st.session_state.login_status)
+        return
+    st.session_state.use_worker = True
+    st.session_state.login_credentials = (email, password)
+    attach_account_log()
+    st.session_state.login_status = "✅ 로그인 성공! (백그라운드 작업자)"
+    log(st.session_state.login_status)
+
+def attach_worker_job(job_id):
+    """Follows a worker job from this session; the id is kept in the URL so a refreshed page reattaches."""
+    st.session_state.worker_job_id = job_id
+    st.session_state.progress = {}
+    st.session_state.metrics_report = None
+    st.session_state.worker_log_seq = 0
+    st.session_state.worker_batch_seq = 0
+    st.session_state.is_scraping = True
+    st.query_params["job"] = job_id
+
+def can_start_crawl():
+    return st.session_state.driver is not None or st.session_state.driver_pool is not None or st.session_state.use_worker
 
 # --- Streamlit UI ---
 st.title("📊 Playboard Scraper")
@@ -542,12 +387,27 @@ with st.sidebar:
         #     st.success("API 키가 저장되었습니다.")
 
         st.checkbox("헤드리스 모드로 실행", value=True, key="run_headless", help="체크 해제 시 크롬 창이 나타나며, 캡챠를 직접 해결할 수 있습니다.")
+        st.checkbox("경량 브라우저 프로필", value=False, key="lean_profile", disabled=not st.session_state.get("run_headless", True), help="차트 텍스트만 읽으므로 이미지, 폰트, 광고/추적 스크립트를 받지 않고 DOM이 준비되면 바로 수집을 시작합니다. 브라우저 메모리와 페이지 로딩 시간이 줄어듭니다. 헤드리스 모드에서만 사용할 수 있습니다.")
+
+        st.radio(
+            "실행 방식",
+            ("session", "pool", "worker"),
+            format_func=lambda v: {"session": "이 세션의 브라우저", "pool": "공유 드라이버 풀", "worker": "백그라운드 작업자"}[v],
+            key="driver_mode",
+            help="공유 드라이버 풀은 서버에서 미리 로그인해 둔 크롬을 크롤링하는 동안만 빌려 씁니다. 백그라운드 작업자는 별도 프로세스에서 크롤링하므로 페이지를 새로고침하거나 닫아도 작업이 계속됩니다."
+        )
 
-        if st.button("로그인", disabled=st.session_state.driver is not None):
+        is_logged_in = can_start_crawl()
+        if st.button("로그인", disabled=is_logged_in):
             if email and password and api_key_input: # API 키 입력 확인
                 st.session_state['2captcha_api_key'] = api_key_input # 로그인 시 API 키 저장
                 with st.spinner("로그인 중..."):
-                    do_login(email, password)
+                    if st.session_state.driver_mode == "worker":
+                        do_worker_login(email, password)
+                    elif st.session_state.driver_mode == "pool":
+                        do_pool_login(email, password)
+                    else:
+                        do_login(email, password)
                 st.rerun()
             else:
                 st.warning("이메일, 비밀번호, 2Captcha API 키를 모두 입력해주세요.")
@@ -557,7 +417,27 @@ with st.sidebar:
             if st.button("로그아웃/드라이버 종료"):
                 st.session_state.driver.quit()
                 st.session_state.driver = None
+                st.session_state.login_credentials = None
                 st.session_state.login_status = "Not logged in"
+                st.session_state.log_buffer.close()
+                st.rerun()
+        if st.session_state.driver_pool is not None:
+            pool_stats = st.session_state.driver_pool.stats()
+            st.caption(f"드라이버 풀: 대기 {pool_stats['idle']}개, 사용 중 {pool_stats['leased']}개, 준비 중 {pool_stats['starting']}개")
+            if st.button("로그아웃"):
+                # 공유 풀은 다른 세션도 사용하므로 종료하지 않고 참조만 해제합니다.
+                st.session_state.driver_pool = None
+                st.session_state.login_credentials = None
+                st.session_state.login_status = "Not logged in"
+                st.session_state.log_buffer.close()
+                st.rerun()
+        if st.session_state.use_worker:
+            if st.button("로그아웃", key="worker_logout"):
+                # 작업자 프로세스와 실행 중인 작업은 그대로 두고 이 세션의 연결만 해제합니다.
+                st.session_state.use_worker = False
+                st.session_state.login_credentials = None
+                st.session_state.login_status = "Not logged in"
+                st.session_state.log_buffer.close()
                 st.rerun()
 
     with st.expander("📝 크롤링 설정", expanded=True):
@@ -581,19 +461,38 @@ with st.sidebar:
             key="country_selector"
         )
 
+        st.radio(
+            "수집 방식",
+            ("selenium", "http"),
+            format_func=lambda v: {"selenium": "브라우저", "http": "HTTP API (실패 시 브라우저)"}[v],
+            horizontal=True,
+            key="fetch_engine_selector",
+            help="HTTP API는 로그인된 브라우저의 쿠키로 차트 데이터를 직접 요청합니다. 실제 API 형식으로 검증되지 않은 실험 기능이며, 실패하면 브라우저 수집으로 돌아갑니다."
+        )
+        st.checkbox("스크롤 중 증분 수집", value=False, key="incremental_selector", help="스크롤할 때마다 새로 로드된 항목을 바로 수집합니다. 목표 수량 판단도 수집된 데이터 기준으로 합니다.")
+        st.checkbox("수집한 행을 페이지에서 제거", value=False, key="prune_dom_selector", disabled=not st.session_state.get("incremental_selector"), help="증분 수집 시 이미 수집한 행을 DOM에서 제거하여 브라우저 메모리 사용량을 줄입니다.")
+
+        st.checkbox("로컬 차트 저장소 사용", value=True, key="use_chart_store_selector", help="이미 수집한 날짜의 차트는 저장소에서 바로 불러오고, 없거나 더 깊은 순위가 필요한 날짜만 새로 수집합니다. 오늘 차트는 일정 시간이 지나면 다시 수집합니다.")
+        st.number_input("동시 실행 브라우저 수", min_value=1, max_value=MAX_PARALLEL_DRIVERS, value=1, step=1, key="parallel_workers_selector", help="여러 날짜를 크롤링할 때 날짜를 나누어 여러 크롬 브라우저에서 동시에 수집합니다. 브라우저마다 메모리를 추가로 사용합니다.")
+
         if st.button("설정 완료"):
             country_map = {
                 '한국': ('south-korea', '한국'),
                 '미국': ('united-states', '미국'),
                 '일본': ('japan', '일본')
             }
-            parsed_dates = parse_dates(st.session_state.date_input)
+            parsed_dates = parse_dates(st.session_state.date_input, log_fn=log)
             if parsed_dates:
                 st.session_state.crawl_settings = {
                     "max_items": st.session_state.max_items_selector,
                     "dates": parsed_dates,
                     "country_code": country_map[st.session_state.country_selector][0],
-                    "country_name": country_map[st.session_state.country_selector][1]
+                    "country_name": country_map[st.session_state.country_selector][1],
+                    "incremental": st.session_state.incremental_selector,
+                    "prune_dom": st.session_state.incremental_selector and st.session_state.prune_dom_selector,
+                    "parallel_workers": int(st.session_state.parallel_workers_selector),
+                    "fetch_engine": st.session_state.fetch_engine_selector,
+                    "use_chart_store": st.session_state.use_chart_store_selector
                 }
                 st.success("설정이 저장되었습니다!")
                 log(f"설정 저장됨: {st.session_state.crawl_settings['max_items']}개, 날짜: {st.session_state.crawl_settings['dates']}, 국가: {st.session_state.crawl_settings['country_name']}")
@@ -626,34 +525,111 @@ with st.sidebar:
 
 
 # --- Main Area ---
-def start_crawl_thread(is_short, settings):
-    """Creates and starts the background scraping thread."""
-    if st.session_state.driver:
+def current_filter_settings():
+    """Collects the sidebar's subscriber filter settings into a plain dictionary for the crawler."""
+    selected_filters_dict = {
+        range_name: st.session_state.subscriber_filters[cat][range_name]
+        for cat in st.session_state.subscriber_filters
+        for range_name in st.session_state.subscriber_filters[cat]
+    }
+    filter_settings = {
+        'is_filter_applied': st.session_state.is_filter_applied,
+        'selected_filters': selected_filters_dict,
+        'use_custom_filter': st.session_state.use_custom_filter,
+        'custom_min': st.session_state.custom_min,
+        'custom_max': st.session_state.custom_max,
+    }
+    # 선택한 범위를 병합된 구간 목록으로 미리 컴파일해 두면 크롤러는 세션 상태 없이 이 값만 사용합니다.
+    filter_settings['intervals'] = compile_subscriber_filter(filter_settings).intervals
+    return filter_settings
+
+def start_worker_job(is_short, settings, checkpoint=None):
+    """Submits the crawl to the background worker process and follows it from this session."""
+    st.session_state.log_buffer.clear()
+    client = get_worker_client()
+    email, password = st.session_state.login_credentials
+    headless = st.session_state.get("run_headless", True)
+    captcha_api_key = st.session_state.get('2captcha_api_key')
+    try:
+        client.ensure_running()
+        if checkpoint is not None:
+            job_id = client.resume(email, password, checkpoint.job_id, headless=headless, captcha_api_key=captcha_api_key,
+                                   driver_profile=driver_profile())
+            log(f"🔁 작업 {job_id}을(를) 백그라운드 작업자에서 이어서 크롤링합니다.")
+        else:
+            job_id = client.submit(email, password, is_short, settings, current_filter_settings(),
+                                   headless=headless, captcha_api_key=captcha_api_key, driver_profile=driver_profile())
+            log(f"📨 백그라운드 작업자에 크롤링 작업 {job_id}을(를) 등록했습니다.")
+    except (OSError, CrawlWorkerError) as e:
+        log(f"❌ 작업자에 작업을 등록하지 못했습니다: {e}")
+        return
+    attach_worker_job(job_id)
+
+def start_crawl_thread(is_short, settings, checkpoint=None):
+    """Creates and starts the background scraping thread.
+
+    With `checkpoint`, the job's saved parameters are used and the crawl resumes from its pending dates.
+    """
+    if st.session_state.use_worker:
+        start_worker_job(is_short, settings, checkpoint)
+        return
+    if st.session_state.driver or st.session_state.driver_pool:
         st.session_state.is_scraping = True
-        st.session_state.log_messages = []
+        st.session_state.worker_job_id = None
+        if "job" in st.query_params:
+            del st.query_params["job"]
+        st.session_state.log_buffer.clear()
         st.session_state.log_queue = queue.Queue()
         st.session_state.result_queue = queue.Queue()
         st.session_state.stop_event = threading.Event()
+        st.session_state.crawl_progress = CrawlProgress()
+        st.session_state.progress = {}
+        st.session_state.crawl_metrics = CrawlMetrics()
+        st.session_state.metrics_report = None
+
+        if checkpoint is not None:
+            is_short = checkpoint.state['is_short']
+            settings = checkpoint.state['settings']
+            filter_settings = checkpoint.state['filter_settings']
+            log(f"🔁 작업 {checkpoint.job_id}을(를) 이어서 크롤링합니다. 남은 날짜: {checkpoint.pending_dates()}")
+        else:
+            filter_settings = current_filter_settings()
 
-        # Build a dictionary of all filter settings to pass to the thread
-        selected_filters_dict = {
-            range_name: st.session_state.subscriber_filters[cat][range_name]
-            for cat in st.session_state.subscriber_filters
-            for range_name in st.session_state.subscriber_filters[cat]
-        }
-        
-        filter_settings = {
-            'is_filter_applied': st.session_state.is_filter_applied,
-            'selected_filters': selected_filters_dict,
-            'use_custom_filter': st.session_state.use_custom_filter,
-            'custom_min': st.session_state.custom_min,
-            'custom_max': st.session_state.custom_max,
+            try:
+                checkpoint = CrawlCheckpoint.create(job_owner(), is_short, settings, filter_settings)
+            except OSError as e:
+                log(f"⚠️ 체크포인트를 만들 수 없어 이어서 크롤링 없이 진행합니다: {e}")
+
+        crawl_kwargs = {
+            'incremental': settings.get('incremental', False),
+            'prune_dom': settings.get('prune_dom', False),
+            'captcha_api_key': st.session_state.get('2captcha_api_key'),
+            'fetch_engine': settings.get('fetch_engine', 'selenium'),
+            'chart_store': get_chart_store() if settings.get('use_chart_store', True) else None,
+            'checkpoint': checkpoint,
+            'progress': st.session_state.crawl_progress,
+            'metrics': st.session_state.crawl_metrics,
         }
+        target = crawl
+        first_arg = st.session_state.driver
+        workers = settings.get('parallel_workers', 1)
+        if workers > 1 and len(settings['dates']) > 1:
+            target = crawl_parallel
+            crawl_kwargs.update({
+                'workers': workers,
+                'credentials': st.session_state.login_credentials,
+                'headless': st.session_state.get("run_headless", True),
+                'driver_profile': driver_profile(),
+                'driver_pool': st.session_state.driver_pool,
+            })
+        elif st.session_state.driver is None:
+            target = crawl_with_pool
+            first_arg = st.session_state.driver_pool
 
         thread = threading.Thread(
-            target=crawl,
+            target=target,
             args=(
-                st.session_state.driver, 
+                first_arg, 
                 is_short, 
                 settings['dates'], 
                 settings['country_code'], 
@@ -663,146 +639,251 @@ def start_crawl_thread(is_short, settings):
                 st.session_state.log_queue,
                 st.session_state.result_queue,
                 filter_settings  # Pass the settings dictionary
-            )
+            ),
+            kwargs=crawl_kwargs
         )
         st.session_state.thread = thread
         thread.start()
 
 col1, col2 = st.columns(2)
 with col1:
-    if st.button("🚀 숏폼 크롤링 시작", disabled=(st.session_state.is_scraping or st.session_state.driver is None or not st.session_state.crawl_settings['dates']), use_container_width=True):
-        st.session_state.scraped_data = pd.DataFrame() # 새 크롤링 시 결과 초기화
+    if st.button("🚀 숏폼 크롤링 시작", disabled=(st.session_state.is_scraping or not can_start_crawl() or not st.session_state.crawl_settings['dates']), use_container_width=True):
+        st.session_state.scraped_rows = empty_positions() # 새 크롤링 시 결과 초기화
+        release_unused_rows()
         settings = st.session_state.crawl_settings
         start_crawl_thread(True, settings)
         st.rerun()
 
 with col2:
-    if st.button("🎬 롱폼 크롤링 시작", disabled=(st.session_state.is_scraping or st.session_state.driver is None or not st.session_state.crawl_settings['dates']), use_container_width=True):
-        st.session_state.scraped_data = pd.DataFrame() # 새 크롤링 시 결과 초기화
+    if st.button("🎬 롱폼 크롤링 시작", disabled=(st.session_state.is_scraping or not can_start_crawl() or not st.session_state.crawl_settings['dates']), use_container_width=True):
+        st.session_state.scraped_rows = empty_positions() # 새 크롤링 시 결과 초기화
+        release_unused_rows()
         settings = st.session_state.crawl_settings
         start_crawl_thread(False, settings)
         st.rerun()
 
+# --- Resume Interrupted Jobs ---
+resumable_jobs = [] if st.session_state.is_scraping else CrawlCheckpoint.list_jobs(owner=job_owner())
+if resumable_jobs:
+    with st.expander(f"🔁 중단된 크롤링 작업 ({len(resumable_jobs)}개)"):
+        def describe_job(state):
+            dates = state['settings']['dates']
+            kind = "숏폼" if state['is_short'] else "롱폼"
+            failed = f", 실패 {len(state['failed_dates'])}개" if state['failed_dates'] else ""
+            started = datetime.fromtimestamp(state['created_at']).strftime('%m-%d %H:%M')
+            return f"{started} · {state['job_id'][:8]} · {kind} · 날짜 {len(state['completed_dates'])}/{len(dates)} 완료{failed} · {state['status']}"
+
+        job_labels = {describe_job(state): state['job_id'] for state in resumable_jobs}
+        selected_job = st.selectbox("작업 선택", list(job_labels.keys()), key="resume_job_selector")
+        can_resume = can_start_crawl()
+        if st.button("이어서 크롤링", disabled=not can_resume, use_container_width=True):
+            checkpoint = CrawlCheckpoint.load(job_labels[selected_job])
+            # 이전 실행에서 수집한 결과를 먼저 복원합니다.
+            restored = checkpoint.load_rows()
+            st.session_state.scraped_rows = st.session_state.result_table.add(restored)
+            release_unused_rows()
+            start_crawl_thread(None, None, checkpoint=checkpoint)
+            st.rerun()
+        if not can_resume:
+            st.caption("이어서 크롤링하려면 먼저 로그인하세요.")
+
 # --- Real-time Logging and Progress Display ---
-if st.session_state.get('is_scraping'):
-    st.markdown("---")
-    st.subheader("🚀 크롤링 진행 상황")
-    
-    progress_bar = st.progress(st.session_state.get('progress', 0))
-    log_placeholder = st.empty()
-    
-    if st.button("🛑 크롤링 중단", use_container_width=True):
-        if st.session_state.stop_event:
-            st.session_state.stop_event.set()
-        st.session_state.is_scraping = False 
+def drain_result_queue():
+    """Appends any result batches the crawl thread has published so far to the scraped data."""
+    received = 0
+    while not st.session_state.result_queue.empty():
+        new_df = st.session_state.result_queue.get_nowait()
+        if not new_df.empty:
+            add_scraped_results(new_df)
+            received += len(new_df)
+    return received
+
+def poll_crawl_thread():
+    """Drains the local crawl thread's queues; returns False once the crawl has finished."""
+    running = True
+    while not st.session_state.log_queue.empty():
+        message = st.session_state.log_queue.get_nowait()
+        if message == "CRAWL_COMPLETE":
+            running = False
+            break
+        log(message)
+    st.session_state.progress = st.session_state.crawl_progress.snapshot()
+    # 크롤러가 날짜(또는 배치)마다 보내는 결과를 바로 결과 탭에 반영합니다.
+    drain_result_queue()
+    return running
+
+def poll_worker_job():
+    """Pulls new log lines and result batches of the followed worker job; returns False once it has ended."""
+    client = get_worker_client()
+    job_id = st.session_state.worker_job_id
+    try:
+        # 상태를 먼저 읽어야 종료 직전에 올라온 배치까지 함께 받아옵니다.
+        status = client.status(job_id, job_owner())
+        logs = client.logs(job_id, job_owner(), since=st.session_state.worker_log_seq)
+        results = client.results(job_id, job_owner(), since=st.session_state.worker_batch_seq)
+    except (OSError, CrawlWorkerError) as e:
+        log(f"⚠️ 작업자에서 작업 {job_id}의 상태를 가져오지 못했습니다: {e}")
+        return False
+
+    for timestamp, level, message in logs['entries']:
+        st.session_state.log_buffer.add(message, level, timestamp)
+    st.session_state.worker_log_seq = logs['next']
+    for records in results['batches']:
+        add_scraped_results(pd.DataFrame.from_records(records))
+    st.session_state.worker_batch_seq = results['next']
+    st.session_state.progress = status['progress']
+    return status['status'] == 'running'
+
+# 새로고침 후에도 URL에 남은 작업 ID로 백그라운드 작업에 다시 연결합니다.
+# 작업자는 작업을 만든 계정에만 답하므로 같은 계정으로 작업자에 로그인한 뒤에 연결합니다.
+if st.query_params.get("job") and st.session_state.worker_job_id is None and not st.session_state.is_scraping:
+    if st.session_state.use_worker and st.session_state.get('login_credentials'):
+        attach_worker_job(st.query_params["job"])
+    else:
+        st.info("진행 중인 백그라운드 작업이 있습니다. 작업을 시작한 계정으로 로그인하면 다시 연결합니다.")
+
+def collect_metrics_report():
+    """Keeps the finished crawl's timing report for the performance section."""
+    try:
+        if st.session_state.worker_job_id:
+            st.session_state.metrics_report = get_worker_client().report(st.session_state.worker_job_id, job_owner())
+        elif st.session_state.crawl_metrics is not None:
+            st.session_state.metrics_report = st.session_state.crawl_metrics.report()
+    except (OSError, CrawlWorkerError) as e:
+        log(f"⚠️ 성능 리포트를 가져오지 못했습니다: {e}")
+
+@st.fragment(run_every=1)
+def crawl_progress_panel():
+    """Refreshes only the progress panel while a crawl runs, instead of rerunning the whole script."""
+    if not st.session_state.is_scraping:
+        return
+    running = poll_worker_job() if st.session_state.worker_job_id else poll_crawl_thread()
+    if not running:
+        st.session_state.is_scraping = False
+        if not st.session_state.worker_job_id:
+            drain_result_queue()
+        collect_metrics_report()
+        log(f"최종 결과 수신 완료. 총 {len(st.session_state.scraped_rows)}개 항목.")
         st.rerun()
 
-    while st.session_state.is_scraping:
-        while not st.session_state.log_queue.empty():
-            message = st.session_state.log_queue.get_nowait()
-            if message == "CRAWL_COMPLETE":
-                st.session_state.is_scraping = False
-                break
-            elif isinstance(message, str) and message.startswith("PROGRESS:"):
-                st.session_state.progress = int(message.split(':')[1])
-            else:
-                log(message)
-        
-        if not st.session_state.is_scraping:
-             break
+    snapshot = st.session_state.progress
+    st.progress(snapshot.get('percent', 0), text=describe_progress(snapshot) or "크롤링 준비 중...")
+    render_log_tail("실시간 로그", "log_area_scraping")
+    st.caption(f"지금까지 수신한 결과: {len(st.session_state.scraped_rows)}개 항목 (결과 탭은 아래 버튼이나 다른 조작 시 갱신됩니다)")
 
-        progress_bar.progress(st.session_state.progress)
-        log_placeholder.text_area("실시간 로그", "\n".join(st.session_state.log_messages), height=300, key="log_area_scraping")
-        time.sleep(0.5) # UI 업데이트 간격 조정
+    col_stop, col_refresh = st.columns(2)
+    if col_stop.button("🛑 크롤링 중단", use_container_width=True):
+        if st.session_state.worker_job_id:
+            # 작업자가 마지막 배치를 보내고 종료 상태가 될 때까지 계속 따라갑니다.
+            try:
+                get_worker_client().cancel(st.session_state.worker_job_id, job_owner())
+            except (OSError, CrawlWorkerError) as e:
+                log(f"⚠️ 작업 중단 요청 실패: {e}")
+        else:
+            if st.session_state.stop_event:
+                st.session_state.stop_event.set()
+            st.session_state.is_scraping = False
+            collect_metrics_report()
+            st.rerun()
+    if col_refresh.button("🔄 결과 새로고침", use_container_width=True):
         st.rerun()
 
-    # Final result processing after the loop
-    while not st.session_state.result_queue.empty():
-        new_df = st.session_state.result_queue.get_nowait()
-        if not new_df.empty:
-            st.session_state.scraped_data = pd.concat([st.session_state.scraped_data, new_df]).drop_duplicates(subset=['Hash']).reset_index(drop=True)
-    log(f"최종 결과 수신 완료. 총 {len(st.session_state.scraped_data)}개 항목.")
-    st.rerun()
+if st.session_state.get('is_scraping'):
+    st.markdown("---")
+    st.subheader("🚀 크롤링 진행 상황")
+    crawl_progress_panel()
+elif not st.session_state.worker_job_id:
+    # 중단 후에도 작업자가 마지막으로 보낸 결과를 놓치지 않도록 합니다.
+    drain_result_queue()
 
 # --- Final Log Display after scraping ---
-st.markdown("---")
-st.subheader("📋 전체 로그")
-st.text_area("Logs", "\n".join(st.session_state.log_messages), height=300, key="log_area_final")
+if not st.session_state.is_scraping:
+    st.markdown("---")
+    st.subheader("📋 전체 로그")
+    st.selectbox("표시 수준", ("DEBUG", "INFO", "WARNING", "ERROR"), index=1, key="log_level", help="DEBUG를 선택하면 스크롤마다 남기는 진행 로그까지 표시합니다.")
+    render_log_tail(f"Logs (최근 {LOG_TAIL_LINES}줄)", "log_area_final")
+    # 로그 파일은 클릭했을 때만 읽어서 다운로드 버튼에 넘깁니다.
+    if st.button("📥 전체 로그 파일 준비"):
+        st.session_state.log_file_bytes = st.session_state.log_buffer.read_file()
+    if st.session_state.get('log_file_bytes'):
+        st.download_button("전체 로그 다운로드", st.session_state.log_file_bytes, file_name=f"playboard_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log", mime="text/plain")
+
+    # --- Crawl Performance Report ---
+    report = st.session_state.metrics_report
+    if report and report['summary']:
+        with st.expander("⏱️ 크롤링 성능 리포트"):
+            st.caption(f"시작: {report['started_at']} · 전체 소요 시간: {report['wall_s']:.1f}초 (날짜 전체 시간은 다른 단계를 포함합니다)")
+            st.dataframe(pd.DataFrame(report['summary']).rename(columns={
+                'phase': '단계', 'count': '횟수', 'total_s': '합계(초)', 'avg_s': '평균(초)', 'max_s': '최대(초)', 'share_pct': '비중(%)'
+            }), hide_index=True, use_container_width=True)
+            if report['counters']:
+                st.dataframe(pd.DataFrame(list(report['counters'].items()), columns=['지표', '값']), hide_index=True, use_container_width=True)
+            st.download_button("리포트 JSON 다운로드", json.dumps(report, ensure_ascii=False, indent=2), file_name=f"playboard_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", mime="application/json")
 
 # --- Results Display ---
 tab1, tab2 = st.tabs(["📊 크롤링 결과", "📺 유튜브 결과 (현재 세션)"])
 
 with tab1:
     st.header("📊 크롤링 결과")
-    if not st.session_state.scraped_data.empty:
+    if len(st.session_state.scraped_rows):
         # --- Sorting and Controls ---
         sort_option = st.selectbox(
             "결과 정렬",
-            options=["기본", "채널별 정렬", "조회수 높은 순", "조회수 낮은 순", "구독자 많은 순", "구독자 적은 순"],
+            options=list(SORT_OPTIONS),
             key="sort_scraped"
         )
         if st.button("크롤링 결과 초기화", use_container_width=True):
-            st.session_state.scraped_data = pd.DataFrame()
+            st.session_state.scraped_rows = empty_positions()
+            release_unused_rows()
             st.rerun()
 
-        # --- Data Sorting Logic ---
-        display_df = st.session_state.scraped_data.copy()
-        if sort_option == "조회수 높은 순": display_df = display_df.sort_values(by="Views_numeric", ascending=False)
-        elif sort_option == "조회수 낮은 순": display_df = display_df.sort_values(by="Views_numeric", ascending=True)
-        elif sort_option == "구독자 많은 순": display_df = display_df.sort_values(by="Subscribers_numeric", ascending=False)
-        elif sort_option == "구독자 적은 순": display_df = display_df.sort_values(by="Subscribers_numeric", ascending=True)
-        elif sort_option == "채널별 정렬": display_df = display_df.sort_values(by=['Channel', 'Views_numeric'], ascending=[True, False])
-        
-        display_df.insert(0, "선택", False)
-
-        edited_df = st.data_editor(
-            display_df,
+        # --- Sorted, Paginated Results ---
+        edited_df = render_result_page(
+            "results",
+            st.session_state.scraped_rows,
+            sort_option,
             column_config={
                 "선택": st.column_config.CheckboxColumn(required=True),
                 "Thumbnail": st.column_config.ImageColumn("썸네일", help="동영상 썸네일"),
                 "Views_numeric": None, 
                 "Subscribers_numeric": None,
                 "Hash": None # Hash 열 숨기기
-            }, hide_index=True, key="results_editor"
+            }
         )
         
         selected_rows = edited_df[edited_df["선택"]]
         if not selected_rows.empty and st.button(f"{len(selected_rows)}개 항목 유튜브 결과에 추가", use_container_width=True):
-            items_to_add = selected_rows.drop(columns=['선택'])
-            updated_cart = pd.concat([st.session_state.shopping_cart, items_to_add]).drop_duplicates(subset=['Hash']).reset_index(drop=True)
-            st.session_state.shopping_cart = updated_cart
+            items_to_add = positions_of(selected_rows)
+            st.session_state.cart_rows = merge_positions(st.session_state.cart_rows, items_to_add)
             # save_app_data() # 파일 저장 로직 삭제
             st.success(f"{len(items_to_add)}개 항목을 유튜브 결과에 추가했습니다!")
             time.sleep(1); st.rerun()
+
+        with st.expander("💾 크롤링 결과 내보내기 (전체)"):
+            render_export_controls("scraped", st.session_state.scraped_rows, "크롤링 결과", "playboard_results")
     else:
         st.info("크롤링을 시작하면 결과가 여기에 표시됩니다.")
 
 with tab2:
     st.header("📺 유튜브 결과 (현재 세션)")
-    if not st.session_state.shopping_cart.empty:
+    if len(st.session_state.cart_rows):
         sort_option_cart = st.selectbox(
             "유튜브 결과 정렬",
-            options=["기본", "채널별 정렬", "조회수 높은 순", "조회수 낮은 순", "구독자 많은 순", "구독자 적은 순"],
+            options=list(SORT_OPTIONS),
             key="sort_cart"
         )
-        cart_df_with_selector = st.session_state.shopping_cart.copy()
-        if sort_option_cart == "조회수 높은 순": cart_df_with_selector = cart_df_with_selector.sort_values(by="Views_numeric", ascending=False)
-        elif sort_option_cart == "조회수 낮은 순": cart_df_with_selector = cart_df_with_selector.sort_values(by="Views_numeric", ascending=True)
-        elif sort_option_cart == "구독자 많은 순": cart_df_with_selector = cart_df_with_selector.sort_values(by="Subscribers_numeric", ascending=False)
-        elif sort_option_cart == "구독자 적은 순": cart_df_with_selector = cart_df_with_selector.sort_values(by="Subscribers_numeric", ascending=True)
-        elif sort_option_cart == "채널별 정렬": cart_df_with_selector = cart_df_with_selector.sort_values(by=['Channel', 'Views_numeric'], ascending=[True, False])
-
-        cart_df_with_selector.insert(0, "선택", False)
         
         st.info("이곳의 데이터는 앱을 종료해도 유지됩니다. 그룹으로 만들거나 다운로드할 수 있습니다.")
 
-        edited_cart_df = st.data_editor(
-            cart_df_with_selector,
+        edited_cart_df = render_result_page(
+            "cart",
+            st.session_state.cart_rows,
+            sort_option_cart,
             column_config={
                 "선택": st.column_config.CheckboxColumn(required=True), "Thumbnail": st.column_config.ImageColumn("썸네일"),
                 "Views_numeric": None, "Subscribers_numeric": None,
                 "Hash": None # Hash 열 숨기기
-            }, hide_index=True, key="cart_editor"
+            }
         )
         selected_cart_rows = edited_cart_df[edited_cart_df["선택"]]
 
@@ -814,21 +895,19 @@ with tab2:
             if new_group_name in st.session_state.custom_groups:
                 st.error(f"'{new_group_name}' 그룹이 이미 존재합니다.")
             else:
-                st.session_state.custom_groups[new_group_name] = selected_cart_rows.drop(columns=['선택'])
+                st.session_state.custom_groups[new_group_name] = positions_of(selected_cart_rows)
                 # save_app_data() # 파일 저장 로직 삭제
                 st.success(f"'{new_group_name}' 그룹을 만들었습니다.")
                 time.sleep(1); st.rerun()
 
         st.markdown("---") # Visual separator
 
-        csv_cart = convert_df_to_csv(st.session_state.shopping_cart.drop(columns=['Views_numeric', 'Subscribers_numeric'], errors='ignore'))
-        st.download_button("💾 CSV 다운로드 (전체)", csv_cart, f"youtube_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", "text/csv", use_container_width=True)
-        
-        pdf_cart = convert_df_to_pdf(st.session_state.shopping_cart.drop(columns=['Views_numeric', 'Subscribers_numeric', 'Thumbnail', 'YouTube URL', 'Hash'], errors='ignore'))
-        st.download_button("📄 PDF 다운로드 (전체)", pdf_cart, f"youtube_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf", "application/pdf", use_container_width=True)
+        st.write("**내보내기 (전체)**")
+        render_export_controls("cart", st.session_state.cart_rows, "유튜브 결과", "youtube_results")
         
         if st.button("전체 결과 비우기", use_container_width=True):
-            st.session_state.shopping_cart = pd.DataFrame()
+            st.session_state.cart_rows = empty_positions()
+            release_unused_rows()
             # save_app_data() # 파일 저장 로직 삭제
             st.rerun()
 
@@ -842,9 +921,19 @@ with tab2:
     else:
         for group_name in list(st.session_state.custom_groups.keys()):
             with st.expander(f"**{group_name}** ({len(st.session_state.custom_groups[group_name])}개 항목)"):
-                group_df = st.session_state.custom_groups[group_name]
-                st.dataframe(group_df, column_config={"Thumbnail": st.column_config.ImageColumn("썸네일"), "Views_numeric": None, "Subscribers_numeric": None, "Hash": None}, hide_index=True)
+                # 접힌 expander의 내용도 매번 실행되므로, 항목 표와 썸네일 변환은 켠 그룹의 현재 페이지에만 합니다.
+                if st.toggle("항목 보기", key=f"show_group_{group_name}"):
+                    render_result_page(
+                        f"group_{group_name}",
+                        st.session_state.custom_groups[group_name],
+                        "기본",
+                        column_config={"Thumbnail": st.column_config.ImageColumn("썸네일"), "Views_numeric": None, "Subscribers_numeric": None, "Hash": None},
+                        selectable=False,
+                    )
+                render_export_controls(f"group_{group_name}", st.session_state.custom_groups[group_name], group_name, f"group_{group_name}")
                 if st.button(f"'{group_name}' 그룹 삭제", key=f"delete_{group_name}", use_container_width=True):
                     del st.session_state.custom_groups[group_name]
+                    st.session_state.result_views.pop(f"group_{group_name}", None)
+                    release_unused_rows()
                     # save_app_data() # 파일 저장 로직 삭제
                     st.rerun()
@@ -0,0 +1,2371 @@
+"""Playboard chart scraping core.
+
+Everything needed to log in, crawl and parse Playboard charts lives here so that it can be used
+without Streamlit: by the Streamlit app, by the background crawl worker process and by scripts.
+"""
+import os
+import re
+import time
+import threading
+import queue
+import random
+import hashlib
+import hmac
+import uuid
+import json
+import sqlite3
+import atexit
+import bisect
+import logging
+import weakref
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone, timedelta
+
+import requests
+from urllib3.util.retry import Retry
+import numpy as np
+import pandas as pd
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from twocaptcha import TwoCaptcha
+
+# --- State Paths ---
+# 앱과 작업자 프로세스는 작업 디렉터리가 다를 수 있으므로 상태 파일은 항상 STATE_DIR 기준의 절대 경로를 씁니다.
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.environ.get("PLAYBOARD_STATE_DIR", ""))
+
+def state_path(env_name, default):
+    """Absolute path from `$env_name` (or `default`); relative paths are taken relative to STATE_DIR."""
+    return os.path.abspath(os.path.join(STATE_DIR, os.path.expanduser(os.environ.get(env_name, default))))
+
+# --- Logging ---
+LOG_DIR = state_path("PLAYBOARD_LOG_DIR", ".playboard_logs")
+# 메모리에 보관하는 최근 로그 줄 수와 화면에 보여 주는 줄 수
+LOG_BUFFER_LINES = 2000
+LOG_TAIL_LINES = 200
+LOG_FILE_MAX_BYTES = 2 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+# 이 시간(초) 동안 기록되지 않은 로그 파일은 prune_log_files()가 지웁니다.
+LOG_FILE_RETENTION = int(os.environ.get("PLAYBOARD_LOG_RETENTION", str(7 * 24 * 60 * 60)))
+LOG_LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+
+def console_log(message):
+    print(f"[LOG] {message}")
+
+def log_level_of(message):
+    """Infers the level of a crawler log message from its prefix."""
+    if message.startswith("❌"):
+        return "ERROR"
+    if message.startswith("⚠️"):
+        return "WARNING"
+    # 스크롤마다 보내는 진행 로그는 양이 많아 기본 화면에서는 숨깁니다.
+    if message.startswith("스크롤 "):
+        return "DEBUG"
+    return "INFO"
+
+# 같은 계정의 여러 세션이나 이어서 실행한 작업은 같은 파일에 기록하므로, 파일 핸들러는 경로별로 하나만 열고 참조 수로 닫습니다.
+_log_handlers = {}
+_log_handlers_lock = threading.Lock()
+
+def _acquire_log_handler(path):
+    with _log_handlers_lock:
+        entry = _log_handlers.get(path)
+        if entry is None:
+            handler = RotatingFileHandler(path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS,
+                                          encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            entry = _log_handlers[path] = [handler, 0]
+        entry[1] += 1
+        return entry[0]
+
+def _release_log_handler(path):
+    with _log_handlers_lock:
+        entry = _log_handlers.get(path)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del _log_handlers[path]
+            entry[0].close()
+
+def prune_log_files(log_dir=LOG_DIR, max_age=LOG_FILE_RETENTION):
+    """Deletes log files, rotated backups included, that are not open in this process and older than `max_age` seconds."""
+    try:
+        names = os.listdir(log_dir)
+    except OSError:
+        return 0
+    cutoff = time.time() - max_age
+    with _log_handlers_lock:
+        open_paths = set(_log_handlers)
+    removed = 0
+    for name in names:
+        path = os.path.abspath(os.path.join(log_dir, name))
+        base = re.sub(r"\.\d+$", "", path)
+        if not base.endswith(".log") or base in open_paths:
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+class LogBuffer:
+    """Keeps the last `max_lines` log entries in memory and, once a file is attached, writes every entry to it.
+
+    Entries are numbered so readers can fetch only what they have not seen yet with `since()`. Buffers attached
+    to the same name share one rotating file; the file handler is released by `close()` or when the buffer is
+    garbage collected.
+    """
+
+    def __init__(self, name=None, max_lines=LOG_BUFFER_LINES, log_dir=LOG_DIR):
+        self.path = None
+        self._entries = deque(maxlen=max_lines)
+        self._seq = 0
+        self._file_seq = 0
+        self._lock = threading.Lock()
+        self._handler = None
+        self._finalizer = None
+        if name is not None:
+            self.attach_file(name, log_dir)
+
+    def attach_file(self, name, log_dir=LOG_DIR):
+        """Writes entries to `<log_dir>/<name>.log` from now on, starting with buffered ones not yet written to a file."""
+        path = os.path.abspath(os.path.join(log_dir, f"{name}.log"))
+        if path == self.path:
+            return
+        self.close()
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            handler = _acquire_log_handler(path)
+        except OSError as e:
+            console_log(f"⚠️ 로그 파일을 열 수 없어 메모리에만 기록합니다: {e}")
+            return
+        self.path = path
+        self._finalizer = weakref.finalize(self, _release_log_handler, path)
+        with self._lock:
+            self._handler = handler
+            pending = [(level, message) for seq, _, level, message in self._entries if seq > self._file_seq]
+            self._file_seq = self._seq
+        for level, message in pending:
+            self._write(handler, level, message)
+
+    @staticmethod
+    def _write(handler, level, message):
+        handler.handle(logging.makeLogRecord({'msg': message, 'levelno': LOG_LEVELS[level], 'levelname': level}))
+
+    def add(self, message, level=None, timestamp=None):
+        level = level or log_level_of(message)
+        timestamp = timestamp or datetime.now().strftime("%H:%M:%S")
+        with self._lock:
+            self._seq += 1
+            self._entries.append((self._seq, timestamp, level, message))
+            handler = self._handler
+            if handler is not None:
+                self._file_seq = self._seq
+        if handler is not None:
+            self._write(handler, level, message)
+
+    def tail(self, n=LOG_TAIL_LINES, min_level="INFO"):
+        """Returns the last `n` formatted lines at or above `min_level`."""
+        threshold = LOG_LEVELS[min_level]
+        lines = []
+        with self._lock:
+            for _, timestamp, level, message in reversed(self._entries):
+                if LOG_LEVELS[level] >= threshold:
+                    lines.append(f"[{timestamp}] {message}")
+                    if len(lines) >= n:
+                        break
+        lines.reverse()
+        return lines
+
+    def since(self, seq):
+        """Returns `(entries, next_seq)` for entries newer than `seq` that are still in the buffer."""
+        with self._lock:
+            entries = [(timestamp, level, message) for s, timestamp, level, message in self._entries if s > seq]
+            return entries, self._seq
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def read_file(self):
+        """Returns the full log, rotated backups included, oldest first; without a file, the buffered entries."""
+        if self._handler is None:
+            with self._lock:
+                return "".join(f"{timestamp} {level} {message}\n" for _, timestamp, level, message in self._entries).encode('utf-8')
+        self._handler.flush()
+        paths = [f"{self.path}.{i}" for i in range(LOG_FILE_BACKUPS, 0, -1)] + [self.path]
+        chunks = []
+        for path in paths:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    chunks.append(f.read())
+        return b"".join(chunks)
+
+    def close(self):
+        """Detaches the log file; later entries are kept in memory only."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self.path = self._handler = self._finalizer = None
+
+# --- Progress Reporting ---
+# 진행률 스냅샷을 다시 계산하는 최소 간격(초)
+PROGRESS_MIN_INTERVAL = 0.3
+
+class CrawlProgress:
+    """Latest-value progress of a crawl, shared between the crawl threads and whoever displays it.
+
+    Crawlers report per-date item counts with `update()` as often as they like; the snapshot returned
+    by `snapshot()` is recomputed at most every `min_interval` seconds, so reporting cost does not grow
+    with the number of items.
+    """
+
+    def __init__(self, min_interval=PROGRESS_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self.start([], 0)
+
+    def start(self, dates, max_items):
+        with self._lock:
+            self._dates = list(dates)
+            self._max_items = max_items
+            self._counts = {}
+            self._done = set()
+            self._current_date = None
+            self._started_at = time.monotonic()
+            self._published_at = 0.0
+            self._finished = False
+            self._publish()
+
+    def update(self, a_date, count):
+        with self._lock:
+            self._counts[a_date] = count
+            self._current_date = a_date
+            if time.monotonic() - self._published_at >= self.min_interval:
+                self._publish()
+
+    def finish_date(self, a_date):
+        """Counts `a_date` as fully done, even when it yielded fewer than `max_items` items."""
+        with self._lock:
+            self._done.add(a_date)
+            self._publish()
+
+    def finish(self):
+        with self._lock:
+            self._finished = True
+            self._publish()
+
+    def _publish(self):
+        target = len(self._dates) * self._max_items
+        done_units = sum(self._max_items if d in self._done else min(self._counts.get(d, 0), self._max_items)
+                         for d in self._dates)
+        fraction = done_units / target if target else 0.0
+        items = sum(self._counts.values())
+        elapsed = time.monotonic() - self._started_at
+        self._snapshot = {
+            'percent': int(fraction * 100),
+            'current_date': self._current_date,
+            'items': items,
+            'items_per_sec': items / elapsed if elapsed > 0 else 0.0,
+            'eta_seconds': elapsed * (1 - fraction) / fraction if 0 < fraction < 1 else None,
+            'dates_done': len(self._done),
+            'dates_total': len(self._dates),
+            'elapsed': elapsed,
+            'finished': self._finished,
+        }
+        self._published_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._snapshot)
+
+def describe_progress(snapshot):
+    """One-line Korean summary of a progress snapshot for the UI and console."""
+    if not snapshot:
+        return ""
+    parts = []
+    if snapshot['current_date']:
+        parts.append(f"{snapshot['current_date']} ({snapshot['dates_done']}/{snapshot['dates_total']}일 완료)")
+    parts.append(f"{snapshot['items']}개 수집")
+    parts.append(f"{snapshot['items_per_sec']:.1f}개/초")
+    if snapshot['eta_seconds'] is not None:
+        minutes, seconds = divmod(int(snapshot['eta_seconds']), 60)
+        parts.append(f"남은 시간 약 {minutes}분 {seconds}초")
+    return " · ".join(parts)
+
+# --- Crawl Metrics ---
+class CrawlMetrics:
+    """Timing spans and event counters of one crawl run, broken down by date; shared by all workers of the run.
+
+    Phases are recorded with `span()` (or `record()` for durations measured elsewhere) and counters with
+    `incr()`. `report()` returns a JSON-serializable summary that can be saved and compared across runs.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._spans = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, phase, a_date=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start, a_date)
+
+    def record(self, phase, seconds, a_date=None):
+        with self._lock:
+            stats = self._spans.setdefault((a_date, phase), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def incr(self, name, n=1, a_date=None):
+        with self._lock:
+            self._counters[(a_date, name)] = self._counters.get((a_date, name), 0) + n
+
+    @contextmanager
+    def track_driver(self, driver, a_date=None):
+        """Counts every WebDriver command `driver` sends while the block runs."""
+        original = driver.execute
+        patched_instance = 'execute' in vars(driver)
+
+        def execute(*args, **kwargs):
+            self.incr('webdriver_calls', a_date=a_date)
+            return original(*args, **kwargs)
+
+        driver.execute = execute
+        try:
+            yield
+        finally:
+            # 풀에 돌려줄 드라이버에 래퍼가 남지 않도록 원래 상태로 되돌립니다.
+            if patched_instance:
+                driver.execute = original
+            else:
+                del driver.execute
+
+    def report(self):
+        with self._lock:
+            spans = [(a_date, phase, *stats) for (a_date, phase), stats in self._spans.items()]
+            counters = [(a_date, name, value) for (a_date, name), value in self._counters.items()]
+
+        phases = {}
+        for _, phase, count, total, longest in spans:
+            stats = phases.setdefault(phase, [0, 0.0, 0.0])
+            stats[0] += count
+            stats[1] += total
+            stats[2] = max(stats[2], longest)
+        # 날짜 전체 시간은 다른 단계를 포함하므로 비중 계산에서 제외합니다.
+        measured = sum(total for phase, (_, total, _) in phases.items() if phase != 'date_total') or 1.0
+        summary = [
+            {
+                'phase': phase,
+                'count': count,
+                'total_s': round(total, 3),
+                'avg_s': round(total / count, 3),
+                'max_s': round(longest, 3),
+                'share_pct': None if phase == 'date_total' else round(total / measured * 100, 1),
+            }
+            for phase, (count, total, longest) in sorted(phases.items(), key=lambda kv: -kv[1][1])
+        ]
+        totals = {}
+        for _, name, value in counters:
+            totals[name] = totals.get(name, 0) + value
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'wall_s': round(time.time() - self.started_at, 3),
+            'summary': summary,
+            'counters': dict(sorted(totals.items())),
+            'by_date': [
+                {'date': a_date, 'phase': phase, 'count': count, 'total_s': round(total, 3), 'max_s': round(longest, 3)}
+                for a_date, phase, count, total, longest in sorted(spans, key=lambda s: (str(s[0]), s[1]))
+            ],
+            'counters_by_date': [
+                {'date': a_date, 'name': name, 'value': value}
+                for a_date, name, value in sorted(counters, key=lambda c: (str(c[0]), c[1]))
+            ],
+        }
+
+    def to_json(self):
+        return json.dumps(self.report(), ensure_ascii=False, indent=2)
+
+# --- Helper Functions ---
+def extract_video_id_from_thumbnail(thumb_url):
+    if "ytimg.com/vi/" in thumb_url:
+        parts = thumb_url.split("ytimg.com/vi/")
+        if len(parts) > 1:
+            video_id = parts[1].split("/")[0].split("_")[0]
+            if 8 <= len(video_id) <= 15:
+                return video_id
+    return None
+
+def extract_video_id_from_href(href):
+    if "/video/" in href:
+        parts = href.split("/video/")
+        if len(parts) > 1:
+            video_id = parts[1].split("?")[0].split("&")[0]
+            if 8 <= len(video_id) <= 15:
+                return video_id
+    return None
+
+def parse_subscriber_count(count_text):
+    if not count_text or count_text == "구독자 정보 없음":
+        return count_text
+    return re.sub(r'[^0-9,]', '', count_text)
+
+def convert_subscriber_count_to_int(count_text):
+    if not count_text or count_text == "구독자 정보 없음":
+        return -1
+    try:
+        return int(count_text.replace(',', ''))
+    except (ValueError, TypeError):
+        return -1
+
+def parse_views_to_int(view_text):
+    """Converts view counts with suffixes (K, M, B) to integers."""
+    view_text = str(view_text).strip().upper()
+    view_text = view_text.replace(',', '')
+    if 'K' in view_text:
+        return int(float(view_text.replace('K', '')) * 1000)
+    if 'M' in view_text:
+        return int(float(view_text.replace('M', '')) * 1000000)
+    if 'B' in view_text:
+        return int(float(view_text.replace('B', '')) * 1000000000)
+    try:
+        return int(view_text)
+    except (ValueError, TypeError):
+        return 0
+
+def generate_hash(title, channel):
+    normalized_title = re.sub(r'[^\w]', '', title.lower())
+    normalized_channel = channel.lower()
+    combined = f"{normalized_title}|{normalized_channel}"
+    return hashlib.md5(combined.encode()).hexdigest()
+
+def parse_dates(date_str, log_fn=None):
+    dates = []
+    parts = date_str.replace(" ", "").split(',')
+    for part in parts:
+        if '-' in part:
+            try:
+                start_s, end_s = part.split('-')
+                start_d = datetime.strptime(start_s, '%Y%m%d')
+                end_d = datetime.strptime(end_s, '%Y%m%d')
+                delta = end_d - start_d
+                for i in range(delta.days + 1):
+                    day = start_d + timedelta(days=i)
+                    dates.append(day.strftime('%Y%m%d'))
+            except Exception as e:
+                (log_fn or console_log)(f"날짜 범위 파싱 오류 '{part}': {e}")
+        elif len(part) == 8 and part.isdigit():
+            dates.append(part)
+    return sorted(list(set(dates)))
+
+# --- Filter Logic ---
+SUBSCRIBER_FILTER_RANGES = {
+    "0~1K": (0, 1000), "1K~5K": (1000, 5000), "5K~10K": (5000, 10000), "10K~50K": (10000, 50000), "50K~100K": (50000, 100000),
+    "100K~500K": (100000, 500000), "500K~1M": (500000, 1000000),
+    "1M~1.5M": (1000000, 1500000), "1.5M~2M": (1500000, 2000000), "2M~2.5M": (2000000, 2500000), "2.5M~3M": (2500000, 3000000), "3M~3.5M": (3000000, 3500000), "3.5M~4M": (3500000, 4000000), "4M~4.5M": (4000000, 4500000), "4.5M~5M": (4500000, 5000000),
+    "5M~5.5M": (5000000, 5500000), "5.5M~6M": (5500000, 6000000), "6M~6.5M": (6000000, 6500000), "6.5M~7M": (6500000, 7000000), "7M~7.5M": (7000000, 7500000), "7.5M~8M": (7500000, 8000000), "8M~8.5M": (8000000, 8500000), "8.5M~9M": (8500000, 9000000), "9M~9.5M": (9000000, 9500000), "9.5M~10M": (9500000, 10000000),
+    "10M+": (10000000, float('inf'))
+}
+
+class SubscriberFilter:
+    """Subscriber count filter compiled into sorted, merged half-open intervals [start, end).
+
+    `intervals=None` accepts every count; with `exclude_unknown`, channels without a subscriber count
+    (-1) are rejected.
+    """
+
+    def __init__(self, intervals=None, exclude_unknown=False):
+        self.exclude_unknown = exclude_unknown
+        self.intervals = None if intervals is None else self._merge(intervals)
+        if self.intervals is not None:
+            self._starts = [start for start, _ in self.intervals]
+            self._ends = [end for _, end in self.intervals]
+
+    @staticmethod
+    def _merge(intervals):
+        merged = []
+        for start, end in sorted(intervals):
+            if start >= end:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def includes(self, value):
+        if self.exclude_unknown and value == -1:
+            return False
+        if self.intervals is None:
+            return True
+        i = bisect.bisect_right(self._starts, value) - 1
+        return i >= 0 and value < self._ends[i]
+
+    __contains__ = includes
+
+    def mask(self, values):
+        """Vectorized includes() over an array of counts, with one searchsorted call."""
+        values = np.asarray(values)
+        if self.intervals is None:
+            keep = np.ones(len(values), dtype=bool)
+        elif not self.intervals:
+            keep = np.zeros(len(values), dtype=bool)
+        else:
+            i = np.searchsorted(self._starts, values, side='right') - 1
+            keep = (i >= 0) & (values < np.asarray(self._ends)[np.clip(i, 0, None)])
+        if self.exclude_unknown:
+            keep &= values != -1
+        return keep
+
+def compile_subscriber_filter(filter_settings):
+    """Builds a SubscriberFilter from the sidebar filter settings.
+
+    Checked ranges and the custom min/max (both inclusive) are combined into one interval set. Settings
+    that already carry compiled `intervals` are used as they are.
+    """
+    if isinstance(filter_settings, SubscriberFilter):
+        return filter_settings
+    if not filter_settings['is_filter_applied']:
+        return SubscriberFilter()
+    if 'intervals' in filter_settings:
+        return SubscriberFilter(filter_settings['intervals'], exclude_unknown=True)
+
+    intervals = [SUBSCRIBER_FILTER_RANGES[name] for name, is_selected in filter_settings['selected_filters'].items() if is_selected]
+    use_custom = filter_settings['use_custom_filter']
+    if use_custom:
+        # 구독자 수는 정수이므로 최대값 포함 조건은 max + 1 미만으로 바꿉니다.
+        min_val = filter_settings['custom_min']
+        max_val = filter_settings['custom_max']
+        if min_val >= 0 or max_val >= 0:
+            intervals.append((min_val if min_val >= 0 else float('-inf'), max_val + 1 if max_val >= 0 else float('inf')))
+    if not intervals and not use_custom:
+        # 적용만 하고 아무 범위도 고르지 않았다면 구독자 수가 있는 채널은 모두 통과합니다.
+        return SubscriberFilter(exclude_unknown=True)
+    return SubscriberFilter(intervals, exclude_unknown=True)
+
+def should_include_subscriber(subscriber_count, filter_settings):
+    """Checks if a subscriber count passes the filter; accepts a SubscriberFilter or raw filter settings."""
+    return compile_subscriber_filter(filter_settings).includes(subscriber_count)
+
+def log_from_thread(log_queue, message):
+    """Safely log messages from a background thread using a queue."""
+    log_queue.put(message)
+
+# --- DOM Extraction ---
+# 차트 테이블을 행 단위로 순회하며 필요한 필드를 한 번의 execute_script 호출로 가져옵니다.
+# 각 필드는 같은 행(tr) 안에서만 찾기 때문에 인덱스가 어긋나는 일이 없습니다.
+ROW_READER_JS = """
+const textOf = (row, sel) => {
+    const el = row.querySelector(sel);
+    return el ? (el.innerText || el.textContent || '').trim() : null;
+};
+const rowOf = (a) => a.closest('tr') || a.parentElement;
+const readRow = (a, row) => {
+    const thumb = row.querySelector('div.thumb-wrapper.image div.thumb.lazy-image');
+    return {
+        title: (a.innerText || a.textContent || '').trim(),
+        href: a.getAttribute('href') ? a.href : '',
+        views: textOf(row, 'span.fluc-label'),
+        channel: textOf(row, 'td.channel a span.name'),
+        subscribers: textOf(row, 'div.subs span.subs__count'),
+        thumbnail: thumb ? thumb.getAttribute('data-background-image') : null
+    };
+};
+"""
+
+EXTRACT_ROWS_JS = ROW_READER_JS + """
+const start = arguments[0] || 0;
+const anchors = document.querySelectorAll('a.title__label');
+const rows = [];
+for (let i = start; i < anchors.length; i++) {
+    rows.push(readRow(anchors[i], rowOf(anchors[i])));
+}
+return JSON.stringify(rows);
+"""
+
+# 아직 수집하지 않은 행만 읽고 표시합니다. prune이 켜져 있으면 이미 수집한 행을 DOM에서 제거하되,
+# 무한 스크롤 트리거가 유지되도록 마지막 keepTail개 행은 남겨 둡니다.
+HARVEST_NEW_ROWS_JS = ROW_READER_JS + """
+const prune = arguments[0];
+const keepTail = arguments[1];
+const harvested = [];
+const rows = [];
+for (const a of document.querySelectorAll('a.title__label')) {
+    const row = rowOf(a);
+    harvested.push(row);
+    if (row.dataset.pbHarvested) continue;
+    row.dataset.pbHarvested = '1';
+    rows.push(readRow(a, row));
+}
+let pruned = 0;
+if (prune) {
+    for (let i = 0; i < harvested.length - keepTail; i++) {
+        harvested[i].remove();
+        pruned++;
+    }
+}
+return JSON.stringify({rows: rows, remaining: harvested.length - pruned, pruned: pruned});
+"""
+PRUNE_KEEP_TAIL = 20
+
+def extract_rows_bulk(driver, start=0):
+    """Returns the raw fields of every chart row (from `start`) using a single WebDriver round trip."""
+    return json.loads(driver.execute_script(EXTRACT_ROWS_JS, start) or "[]")
+
+def extract_rows_per_element(driver, start=0):
+    """Legacy extraction that reads each field through separate WebElement calls."""
+    title_elements = driver.find_elements(By.CSS_SELECTOR, "a.title__label")
+    view_elements = driver.find_elements(By.CSS_SELECTOR, "span.fluc-label")
+    thumbnail_elements = driver.find_elements(By.CSS_SELECTOR, "div.thumb-wrapper.image div.thumb.lazy-image")
+    channel_elements = driver.find_elements(By.CSS_SELECTOR, "td.channel a span.name")
+    subscriber_elements = driver.find_elements(By.CSS_SELECTOR, "div.subs span.subs__count")
+
+    rows = []
+    for i in range(start, len(title_elements)):
+        rows.append({
+            'title': title_elements[i].text.strip(),
+            'href': title_elements[i].get_attribute("href") or "",
+            'views': view_elements[i].text.strip() if i < len(view_elements) else None,
+            'channel': channel_elements[i].text.strip() if i < len(channel_elements) else None,
+            'subscribers': subscriber_elements[i].text.strip() if i < len(subscriber_elements) else None,
+            'thumbnail': thumbnail_elements[i].get_attribute("data-background-image") if i < len(thumbnail_elements) else None,
+        })
+    return rows
+
+def harvest_new_rows(driver, prune_dom=False):
+    """Reads rows appended since the last harvest and optionally removes older harvested rows.
+
+    Returns (raw_rows, rows_left_on_page, pruned_count).
+    """
+    batch = json.loads(driver.execute_script(HARVEST_NEW_ROWS_JS, prune_dom, PRUNE_KEEP_TAIL) or "{}")
+    return batch.get('rows', []), batch.get('remaining', 0), batch.get('pruned', 0)
+
+def extract_rows(driver, log_q, extraction_mode="bulk", start=0):
+    """Extracts raw chart rows, falling back to per-element reads if the bulk script fails."""
+    if extraction_mode == "bulk":
+        try:
+            return extract_rows_bulk(driver, start)
+        except Exception as e:
+            log_from_thread(log_q, f"⚠️ 일괄 추출 실패, 개별 추출로 전환합니다: {e}")
+    return extract_rows_per_element(driver, start)
+
+def build_record(raw, date_str):
+    """Turns one raw extracted row into a result record without deduplication or filtering."""
+    title = (raw.get('title') or "").strip()
+    channel = raw['channel'].strip() if raw.get('channel') is not None else "N/A"
+
+    item_hash = generate_hash(title, channel)
+
+    views = raw['views'].strip() if raw.get('views') is not None else "N/A"
+    subscriber_count_text = raw['subscribers'].strip() if raw.get('subscribers') is not None else "구독자 정보 없음"
+
+    subscriber_count_int = convert_subscriber_count_to_int(subscriber_count_text)
+    views_numeric = parse_views_to_int(views)
+
+    thumb_url = ""
+    thumb_url_raw = raw.get('thumbnail')
+    if thumb_url_raw and thumb_url_raw.startswith("//"):
+        thumb_url = "https:" + thumb_url_raw
+
+    video_href = raw.get('href') or ""
+    video_id = extract_video_id_from_href(video_href) or extract_video_id_from_thumbnail(thumb_url)
+    youtube_url = f"https://www.youtube.com/watch?v={video_id}" if video_id else ""
+
+    return {
+        'Thumbnail': thumb_url,
+        'Title': title,
+        'Views': views,
+        'Views_numeric': views_numeric,
+        'Channel': channel,
+        'Date': date_str,
+        'Subscribers': subscriber_count_text,
+        'Subscribers_numeric': subscriber_count_int,
+        'Hash': item_hash,
+        'YouTube URL': youtube_url
+    }
+
+def build_item(raw, date_str, processed_hashes, filter_settings):
+    """Turns one raw extracted row into a result record, or None if it is a duplicate or filtered out."""
+    record = build_record(raw, date_str)
+    if record['Hash'] in processed_hashes:
+        return None
+    if not should_include_subscriber(record['Subscribers_numeric'], filter_settings):
+        return None
+    return record
+
+# --- Batch Record Processing ---
+# build_record()/should_include_subscriber()와 같은 결과를 날짜 단위 배치로 한 번에 계산합니다.
+# 항목별 함수는 기준 구현으로 남겨 두고, 배치 처리가 실패하면 그쪽으로 돌아갑니다.
+RECORD_COLUMNS = ['Thumbnail', 'Title', 'Views', 'Views_numeric', 'Channel', 'Date', 'Subscribers', 'Subscribers_numeric', 'Hash', 'YouTube URL']
+RAW_COLUMNS = ['title', 'href', 'views', 'channel', 'subscribers', 'thumbnail']
+
+def _stripped(column, default):
+    return column.where(column.notna(), default).astype(str).str.strip()
+
+def parse_views_series(views):
+    """Vectorized parse_views_to_int(); returns (values, valid) where invalid rows would raise per row."""
+    text = views.astype(str).str.strip().str.upper().str.replace(',', '', regex=False)
+    values = pd.Series(0.0, index=text.index)
+    remaining = pd.Series(True, index=text.index)
+    for suffix, scale in (('K', 1000), ('M', 1000000), ('B', 1000000000)):
+        has_suffix = remaining & text.str.contains(suffix, regex=False)
+        numbers = pd.to_numeric(text[has_suffix].str.replace(suffix, '', regex=False).str.strip(), errors='coerce')
+        values[has_suffix] = numbers * scale
+        remaining &= ~has_suffix
+    plain = remaining & text.str.fullmatch(r'[+-]?[0-9]+')
+    values[plain] = pd.to_numeric(text[plain], errors='coerce')
+    valid = np.isfinite(values)
+    return np.trunc(values.where(valid, 0)).astype('int64'), valid
+
+def parse_subscribers_series(subscribers):
+    """Vectorized convert_subscriber_count_to_int()."""
+    cleaned = subscribers.str.replace(',', '', regex=False)
+    is_number = cleaned.str.fullmatch(r'[+-]?[0-9]+') & (subscribers != "구독자 정보 없음")
+    return pd.to_numeric(cleaned.where(is_number), errors='coerce').fillna(-1).astype('int64')
+
+def _video_id_series(text, marker, extra_separators=()):
+    # extract_video_id_from_href/thumbnail: 첫 번째와 두 번째 marker 사이 문자열에서 구분자 앞부분만 사용합니다.
+    # 배치에 marker가 있는 행이 하나도 없으면 extract가 float 열을 돌려주므로 문자열 열로 맞춥니다.
+    ids = text.str.extract(f"{re.escape(marker)}(.*?)(?:{re.escape(marker)}|$)", expand=False).astype("string")
+    for separator in extra_separators:
+        ids = ids.str.split(separator, regex=False).str[0]
+    valid = ids.str.len().between(8, 15).fillna(False).astype(bool)
+    return ids.astype(object).where(valid, np.nan)
+
+def hash_series(titles, channels):
+    """generate_hash() over two columns."""
+    # pyarrow 문자열 열의 정규식(RE2)은 \w가 ASCII만 가리켜 한글/일본어 제목의 해시가 달라지므로 항목별 함수를 씁니다.
+    return pd.Series([generate_hash(t, c) for t, c in zip(titles, channels)], index=titles.index, dtype=object)
+
+def build_records_frame(raw_rows, date_str):
+    """Turns a batch of raw extracted rows into result records at once, like build_record() per row.
+
+    Rows that build_record() would fail on are left out; the returned frame keeps the row positions of
+    `raw_rows` as its index.
+    """
+    raw = pd.DataFrame.from_records(raw_rows, columns=RAW_COLUMNS)
+    title = raw['title'].where(raw['title'].notna() & (raw['title'] != ""), "").astype(str).str.strip()
+    channel = _stripped(raw['channel'], "N/A")
+    views = _stripped(raw['views'], "N/A")
+    subscribers = _stripped(raw['subscribers'], "구독자 정보 없음")
+    views_numeric, valid = parse_views_series(views)
+
+    thumbnail_raw = raw['thumbnail'].fillna("").astype(str)
+    thumbnail = ("https:" + thumbnail_raw).where(thumbnail_raw.str.startswith("//"), "")
+    href = raw['href'].where(raw['href'].notna() & (raw['href'] != ""), "").astype(str)
+    video_id = _video_id_series(href, "/video/", ("?", "&")).fillna(
+        _video_id_series(thumbnail, "ytimg.com/vi/", ("/", "_")))
+    youtube_url = ("https://www.youtube.com/watch?v=" + video_id).fillna("")
+
+    frame = pd.DataFrame({
+        'Thumbnail': thumbnail,
+        'Title': title,
+        'Views': views,
+        'Views_numeric': views_numeric,
+        'Channel': channel,
+        'Date': date_str,
+        'Subscribers': subscribers,
+        'Subscribers_numeric': parse_subscribers_series(subscribers),
+        'Hash': hash_series(title, channel),
+        'YouTube URL': youtube_url,
+    }, columns=RECORD_COLUMNS)
+    return frame[valid.to_numpy()]
+
+def subscriber_filter_mask(subscribers, filter_settings):
+    """Vectorized should_include_subscriber() over an array of subscriber counts."""
+    return compile_subscriber_filter(filter_settings).mask(subscribers)
+
+# --- Scroll Engine ---
+# 고정 대기 대신 새 행이 추가되는 순간 반환합니다. 증가가 멈추면 대기 상한을 점차 늘립니다.
+SCROLL_WAIT_MIN = 3.0
+SCROLL_WAIT_MAX = 12.0
+SCROLL_WAIT_BACKOFF = 1.5
+
+SCROLL_AND_WAIT_JS = """
+const prev = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const count = () => document.querySelectorAll('a.title__label').length;
+window.scrollTo(0, document.body.scrollHeight);
+if (count() > prev) { done(count()); return; }
+let finished = false;
+let timer = null;
+const observer = new MutationObserver((mutations) => {
+    if (mutations.some(m => m.addedNodes.length) && count() > prev) finish();
+});
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(count());
+};
+observer.observe(document.body, {childList: true, subtree: true});
+timer = setTimeout(finish, timeoutMs);
+"""
+
+def count_rows(driver):
+    return len(driver.find_elements(By.CSS_SELECTOR, "a.title__label"))
+
+def scroll_and_wait(driver, prev_count, timeout):
+    """Scrolls to the bottom and waits until the row count grows past `prev_count` or `timeout` expires.
+
+    Returns (row_count, elapsed_seconds).
+    """
+    started = time.monotonic()
+    try:
+        driver.set_script_timeout(timeout + 5)
+        new_count = driver.execute_async_script(SCROLL_AND_WAIT_JS, prev_count, int(timeout * 1000))
+    except Exception:
+        # MutationObserver 주입에 실패하면 짧은 간격의 폴링으로 대체합니다.
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.25).until(lambda d: count_rows(d) > prev_count)
+        except TimeoutException:
+            pass
+        new_count = count_rows(driver)
+    return int(new_count), time.monotonic() - started
+
+def summarize_scroll_timings(timings):
+    if not timings:
+        return "스크롤 없음"
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"스크롤 {len(timings)}회, 평균 {sum(timings) / len(timings):.2f}s, p95 {p95:.2f}s, 최대 {ordered[-1]:.2f}s, 합계 {sum(timings):.1f}s"
+
+# --- HTTP Chart Fetcher ---
+# 브라우저 없이 차트 페이지가 호출하는 백엔드 API를 직접 호출합니다. 로그인 쿠키는 Selenium 드라이버에서 가져오며,
+# 실패하거나 결과가 없으면 Selenium 수집으로 대체합니다. API 주소는 환경 변수로 바꿀 수 있어 로컬 스텁 서버로도 검증할 수 있습니다.
+# 주의: 아래 경로, 요청 파라미터, 응답 키는 실제 API 응답으로 확인한 것이 아니라 추정한 형식입니다.
+# tests/test_http_fetcher.py는 tests/fixtures/playboard_api의 가정된 응답으로만 검증하므로, 실제 사이트에서는 브라우저 수집으로 대체될 수 있습니다.
+PLAYBOARD_API_BASE = os.environ.get("PLAYBOARD_API_BASE", "https://lapi.playboard.co/v1")
+PLAYBOARD_SHORT_CHART_PATH = "/chart/short/most-viewed-all-videos-in-{country_code}-daily"
+PLAYBOARD_VIDEO_CHART_PATH = "/chart/video"
+HTTP_PAGE_SIZE = 100
+HTTP_TIMEOUT = 20
+
+class PlayboardHttpFetcher:
+    """Fetches chart rows from Playboard's data endpoints with a pooled requests.Session.
+
+    Endpoint paths, params and response keys are unverified against the live API; callers fall back to the browser.
+    """
+
+    def __init__(self, cookies=None, user_agent=None, base_url=PLAYBOARD_API_BASE, page_size=HTTP_PAGE_SIZE, pool_size=4):
+        self.base_url = base_url.rstrip('/')
+        self.page_size = page_size
+        self.reached_end = False
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Referer': 'https://playboard.co/',
+            'Origin': 'https://playboard.co',
+        })
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        for cookie in cookies or []:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+    @classmethod
+    def from_driver(cls, driver, **kwargs):
+        """Builds a fetcher that reuses the cookies and user agent of a logged-in driver."""
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        return cls(cookies=driver.get_cookies(), user_agent=user_agent, **kwargs)
+
+    def chart_url(self, is_short, country_code):
+        if is_short:
+            return self.base_url + PLAYBOARD_SHORT_CHART_PATH.format(country_code=country_code)
+        return self.base_url + PLAYBOARD_VIDEO_CHART_PATH
+
+    @staticmethod
+    def _first(mapping, *keys):
+        for key in keys:
+            if isinstance(mapping, dict) and mapping.get(key) not in (None, ""):
+                return mapping[key]
+        return None
+
+    @classmethod
+    def row_from_item(cls, item):
+        """Maps one API item to the raw row format produced by the DOM extractors."""
+        video = cls._first(item, 'video', 'contents') or item
+        channel = cls._first(item, 'channel') or cls._first(video, 'channel') or {}
+        video_id = cls._first(video, 'videoId', 'id')
+        views = cls._first(item, 'score', 'views', 'viewCount') or cls._first(video, 'viewCount', 'views')
+        subscribers = cls._first(channel, 'subscriberCount', 'subscribers')
+        thumbnail = cls._first(video, 'thumbnail', 'thumbnailUrl')
+        if isinstance(thumbnail, str) and thumbnail.startswith("https:"):
+            thumbnail = thumbnail[len("https:"):]
+        elif not thumbnail and video_id:
+            thumbnail = f"//i.ytimg.com/vi/{video_id}/mqdefault.jpg"
+        return {
+            'title': cls._first(video, 'title', 'name') or "",
+            'href': f"https://playboard.co/video/{video_id}" if video_id else "",
+            'views': f"{views:,}" if isinstance(views, (int, float)) else views,
+            'channel': cls._first(channel, 'name', 'title'),
+            'subscribers': f"{int(subscribers):,}" if isinstance(subscribers, (int, float)) else subscribers,
+            'thumbnail': thumbnail,
+        }
+
+    def fetch_chart(self, is_short, period_key, country_code, max_items, stop_event=None):
+        """Pages through one chart and returns up to `max_items` raw rows.
+
+        Afterwards `reached_end` tells whether the API reported the end of the chart (an empty page or a null cursor).
+        """
+        url = self.chart_url(is_short, country_code)
+        rows = []
+        cursor = None
+        self.reached_end = False
+        while len(rows) < max_items:
+            if stop_event is not None and stop_event.is_set():
+                break
+            params = {'period': period_key, 'size': min(self.page_size, max_items - len(rows))}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.session.get(url, params=params, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            payload = response.json()
+            body = self._first(payload, 'data') if isinstance(payload, dict) and isinstance(payload.get('data'), dict) else payload
+            items = body if isinstance(body, list) else self._first(body, 'list', 'items', 'data') or []
+            if not items:
+                self.reached_end = True
+                break
+            rows.extend(self.row_from_item(item) for item in items)
+            cursor = None if isinstance(body, list) else self._first(body, 'cursor', 'nextCursor', 'next')
+            if not cursor:
+                # 커서 키가 있는데 비어 있을 때만 차트 끝으로 봅니다. 목록만 오는 응답은 끝인지 알 수 없습니다.
+                self.reached_end = isinstance(body, dict) and any(key in body for key in ('cursor', 'nextCursor', 'next'))
+                break
+        return rows[:max_items]
+
+    def close(self):
+        self.session.close()
+
+# --- Local Chart Store ---
+# 지난 날짜의 일간 차트는 바뀌지 않으므로 (롱폼/숏폼, 국가, 날짜)별로 필터 적용 전의 전체 순위를 SQLite에 저장합니다.
+# 저장된 깊이가 요청한 max_items 이상이면 사이트에 접속하지 않고 저장소에서 바로 반환합니다.
+CHART_STORE_PATH = state_path("PLAYBOARD_CHART_DB", "playboard_charts.sqlite3")
+CHART_STORE_TODAY_MAX_AGE = int(os.environ.get("PLAYBOARD_CHART_TODAY_MAX_AGE", str(60 * 60)))
+
+CHART_STORE_COLUMNS = [
+    ('Thumbnail', 'thumbnail'), ('Title', 'title'), ('Views', 'views'), ('Views_numeric', 'views_numeric'),
+    ('Channel', 'channel'), ('Date', 'chart_date'), ('Subscribers', 'subscribers'),
+    ('Subscribers_numeric', 'subscribers_numeric'), ('Hash', 'hash'), ('YouTube URL', 'youtube_url'),
+]
+
+class ChartStore:
+    """SQLite store of crawled chart rows keyed by (chart type, country, date) with the rank depth covered."""
+
+    def __init__(self, path=CHART_STORE_PATH, today_max_age=CHART_STORE_TODAY_MAX_AGE):
+        self.path = path
+        self.today_max_age = today_max_age
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS charts (
+                    chart_type TEXT NOT NULL, country_code TEXT NOT NULL, chart_date TEXT NOT NULL,
+                    depth INTEGER NOT NULL, crawled_at REAL NOT NULL,
+                    PRIMARY KEY (chart_type, country_code, chart_date)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chart_rows (
+                    chart_type TEXT NOT NULL, country_code TEXT NOT NULL, chart_date TEXT NOT NULL, rank INTEGER NOT NULL,
+                    thumbnail TEXT, title TEXT, views TEXT, views_numeric INTEGER, channel TEXT,
+                    subscribers TEXT, subscribers_numeric INTEGER, hash TEXT, youtube_url TEXT,
+                    PRIMARY KEY (chart_type, country_code, chart_date, rank)
+                )""")
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3 연결의 with 문은 트랜잭션만 끝내고 연결은 닫지 않으므로 직접 닫습니다.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def chart_key(is_short, country_code, date_str):
+        # 롱폼 차트 URL은 국가와 무관하므로 국가를 구분하지 않습니다.
+        return ("short" if is_short else "video", country_code if is_short else "all", date_str)
+
+    def _is_fresh(self, date_str, crawled_at):
+        today_kst = datetime.now(timezone(timedelta(hours=9))).strftime('%Y-%m-%d')
+        if date_str < today_kst:
+            return True
+        return time.time() - crawled_at <= self.today_max_age
+
+    def load(self, is_short, country_code, date_str, max_items):
+        """Returns up to `max_items` stored records in rank order, or None if the stored chart is too shallow or stale."""
+        key = self.chart_key(is_short, country_code, date_str)
+        with self._lock, self._connect() as conn:
+            meta = conn.execute(
+                "SELECT depth, crawled_at FROM charts WHERE chart_type=? AND country_code=? AND chart_date=?", key
+            ).fetchone()
+            if meta is None or meta[0] < max_items or not self._is_fresh(date_str, meta[1]):
+                return None
+            rows = conn.execute(
+                f"SELECT {', '.join(col for _, col in CHART_STORE_COLUMNS)} FROM chart_rows "
+                "WHERE chart_type=? AND country_code=? AND chart_date=? ORDER BY rank LIMIT ?", key + (max_items,)
+            ).fetchall()
+        return [dict(zip((name for name, _ in CHART_STORE_COLUMNS), row)) for row in rows]
+
+    def save(self, is_short, country_code, date_str, records, depth):
+        """Replaces the stored chart unless a deeper crawl of it is already stored and still fresh."""
+        key = self.chart_key(is_short, country_code, date_str)
+        with self._lock, self._connect() as conn:
+            meta = conn.execute(
+                "SELECT depth, crawled_at FROM charts WHERE chart_type=? AND country_code=? AND chart_date=?", key
+            ).fetchone()
+            if meta is not None and meta[0] > depth and self._is_fresh(date_str, meta[1]):
+                return False
+            conn.execute("DELETE FROM chart_rows WHERE chart_type=? AND country_code=? AND chart_date=?", key)
+            conn.executemany(
+                f"INSERT INTO chart_rows (chart_type, country_code, chart_date, rank, "
+                f"{', '.join(col for _, col in CHART_STORE_COLUMNS if col != 'chart_date')}) "
+                f"VALUES ({', '.join('?' * (len(CHART_STORE_COLUMNS) + 3))})",
+                [key + (rank,) + tuple(record[name] for name, col in CHART_STORE_COLUMNS if col != 'chart_date')
+                 for rank, record in enumerate(records, start=1)]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO charts (chart_type, country_code, chart_date, depth, crawled_at) VALUES (?, ?, ?, ?, ?)",
+                key + (depth, time.time())
+            )
+        return True
+
+# --- Crawl Checkpoints ---
+# 크롤링 작업마다 완료한 날짜와 날짜별 마지막 수집 순위는 상태 JSON에, 수집한 행은 행 로그(.rows.jsonl)에 기록합니다.
+# 세션이 새로고침되거나 드라이버가 죽어도 '이어서 크롤링'으로 마지막 체크포인트부터 다시 시작할 수 있습니다.
+CRAWL_JOB_DIR = state_path("PLAYBOARD_JOB_DIR", ".playboard_jobs")
+# 이 시간(초) 동안 갱신되지 않은 작업은 CrawlCheckpoint.prune()이 행 로그와 함께 지웁니다.
+CRAWL_JOB_RETENTION = int(os.environ.get("PLAYBOARD_JOB_RETENTION", str(7 * 24 * 60 * 60)))
+
+class CrawlCheckpoint:
+    """Persisted progress of one crawl job: parameters, completed/failed dates, last rank per date and collected rows."""
+
+    def __init__(self, job_id, state):
+        self.job_id = job_id
+        self.state = state
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _path(job_id, suffix=".json"):
+        # 작업 ID는 URL과 작업자 요청으로도 들어오므로 경로 문자가 섞이지 않았는지 확인합니다.
+        if not re.fullmatch(r"[0-9A-Za-z_]+", str(job_id)):
+            raise ValueError(f"올바르지 않은 작업 ID입니다: {job_id}")
+        return os.path.join(CRAWL_JOB_DIR, f"{job_id}{suffix}")
+
+    @classmethod
+    def create(cls, owner, is_short, settings, filter_settings):
+        os.makedirs(CRAWL_JOB_DIR, exist_ok=True)
+        # 작업 ID만 알면 작업자에서 결과를 볼 수 있었으므로 추측할 수 없는 무작위 ID를 씁니다.
+        job_id = uuid.uuid4().hex
+        checkpoint = cls(job_id, {
+            'job_id': job_id,
+            'owner': owner,
+            'is_short': is_short,
+            'settings': settings,
+            'filter_settings': filter_settings,
+            'status': 'running',
+            'completed_dates': [],
+            'failed_dates': {},
+            'last_rank': {},
+            'created_at': time.time(),
+            'updated_at': time.time(),
+        })
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, job_id):
+        with open(cls._path(job_id), encoding='utf-8') as f:
+            state = json.load(f)
+        # 예전 체크포인트는 해시 목록을 상태에 함께 저장했습니다. 이제는 행 로그에서 다시 만듭니다.
+        state.pop('hashes', None)
+        return cls(job_id, state)
+
+    @classmethod
+    def list_jobs(cls, owner=None, include_completed=False):
+        """Returns the saved job states, newest first."""
+        jobs = []
+        if not os.path.isdir(CRAWL_JOB_DIR):
+            return jobs
+        for name in os.listdir(CRAWL_JOB_DIR):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(CRAWL_JOB_DIR, name), encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if owner is not None and state.get('owner') != owner:
+                continue
+            if not include_completed and state.get('status') == 'completed':
+                continue
+            jobs.append(state)
+        return sorted(jobs, key=lambda s: s.get('updated_at', 0), reverse=True)
+
+    @classmethod
+    def prune(cls, max_age=CRAWL_JOB_RETENTION, keep=()):
+        """Deletes jobs (state, row log and leftover temp files) not updated for `max_age` seconds, except the IDs in `keep`."""
+        try:
+            names = os.listdir(CRAWL_JOB_DIR)
+        except OSError:
+            return 0
+        cutoff = time.time() - max_age
+        files = {}
+        for name in names:
+            files.setdefault(name.split(".", 1)[0], []).append(os.path.join(CRAWL_JOB_DIR, name))
+        removed = 0
+        for job_id, paths in files.items():
+            if job_id in keep:
+                continue
+            try:
+                # 작업의 파일 중 하나라도 최근에 기록됐으면 아직 쓰는 작업으로 봅니다.
+                if max(os.path.getmtime(path) for path in paths) >= cutoff:
+                    continue
+            except OSError:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            removed += 1
+        return removed
+
+    def save(self):
+        with self._lock:
+            self.state['updated_at'] = time.time()
+            tmp_path = self._path(self.job_id, f".json.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(self.job_id))
+
+    def pending_dates(self):
+        completed = set(self.state['completed_dates'])
+        return [d for d in self.state['settings']['dates'] if d not in completed]
+
+    def start_rank(self, a_date):
+        return self.state['last_rank'].get(a_date, 0)
+
+    def record_batch(self, a_date, rows, rank):
+        """Appends a finalized batch to the job's row log and advances the date's last harvested rank."""
+        with self._lock:
+            with open(self._path(self.job_id, ".rows.jsonl"), 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.state['last_rank'][a_date] = max(rank, self.state['last_rank'].get(a_date, 0))
+        self.save()
+
+    def complete_date(self, a_date):
+        with self._lock:
+            if a_date not in self.state['completed_dates']:
+                self.state['completed_dates'].append(a_date)
+            self.state['failed_dates'].pop(a_date, None)
+        self.save()
+
+    def fail_date(self, a_date, error):
+        with self._lock:
+            self.state['failed_dates'][a_date] = str(error)[:500]
+        self.save()
+
+    def finish(self, stopped=False):
+        with self._lock:
+            if not self.pending_dates():
+                self.state['status'] = 'completed'
+            else:
+                self.state['status'] = 'stopped' if stopped else 'interrupted'
+        self.save()
+
+    def read_rows(self, start=0, end=None):
+        """Returns rows `start` to `end` (exclusive) of the job's row log as dictionaries, in the order they were recorded."""
+        path = self._path(self.job_id, ".rows.jsonl")
+        if not os.path.exists(path):
+            return []
+        rows = []
+        with open(path, encoding='utf-8') as f:
+            for i, line in enumerate(line for line in f if line.strip()):
+                if end is not None and i >= end:
+                    break
+                if i >= start:
+                    rows.append(json.loads(line))
+        return rows
+
+    def collected_hashes(self):
+        """Returns the hashes of all rows in the job's row log."""
+        return {row['Hash'] for row in self.read_rows()}
+
+    def row_count(self):
+        path = self._path(self.job_id, ".rows.jsonl")
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    def load_rows(self):
+        """Returns the rows collected so far as a DataFrame."""
+        return pd.DataFrame(self.read_rows())
+
+# --- Selenium/Scraping Logic ---
+# 'lean' 프로필은 차트에서 텍스트와 속성만 읽는다는 점을 이용해 이미지, 미디어, 폰트와 추적/광고 스크립트를
+# 받지 않습니다. 썸네일 주소는 data-background-image 속성으로 읽으므로 이미지를 막아도 그대로 남습니다.
+DRIVER_PROFILES = ("standard", "lean")
+DRIVER_PROFILE = os.environ.get("PLAYBOARD_DRIVER_PROFILE", "standard")
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*adservice.google.com*", "*facebook.net*", "*connect.facebook.com*", "*scorecardresearch.com*",
+    "*hotjar.com*", "*clarity.ms*",
+]
+LEAN_JS_HEAP_MB = 512
+
+def create_driver(headless=True, profile=None):
+    """Starts a Chrome WebDriver without touching session state, so worker threads can call it.
+
+    `profile` is "standard" or "lean" (DRIVER_PROFILE by default). The lean profile returns from page loads
+    at DOMContentLoaded, blocks images, media, fonts and known trackers, and caps the renderer's JS heap.
+    """
+    profile = profile or DRIVER_PROFILE
+    if profile not in DRIVER_PROFILES:
+        raise ValueError(f"Unknown driver profile: {profile}")
+    options = Options()
+    if headless:
+        options.add_argument("--headless")
+        options.add_argument("--window-size=1920,1080")
+
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+
+    if profile == "lean":
+        options.page_load_strategy = "eager"
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument(f"--js-flags=--max-old-space-size={LEAN_JS_HEAP_MB}")
+        options.add_argument("--renderer-process-limit=2")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+        options.add_argument("--mute-audio")
+
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(30)
+    if profile == "lean":
+        try:
+            # 확장자와 도메인으로 폰트, 미디어, 추적 스크립트 요청을 네트워크 단계에서 막습니다.
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+        except Exception as e:
+            console_log(f"⚠️ 리소스 차단 설정 실패, 이미지 차단만 적용합니다: {e}")
+    return driver
+
+def login_driver(driver, email, password):
+    """Runs the Playboard login form on `driver`. Raises if the login does not complete."""
+    driver.get("https://playboard.co")
+    wait = WebDriverWait(driver, 15)
+    
+    login_link = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[text()='로그인']")))
+    login_link.click()
+
+    email_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@name='email']")))
+    password_input = wait.until(EC.presence_of_element_located((By.XPATH, "//input[@name='password']")))
+    email_input.send_keys(email)
+    password_input.send_keys(password)
+
+    login_button = wait.until(EC.element_to_be_clickable((By.XPATH, "//button[@type='submit' and .//span[text()='로그인']]")))
+    login_button.click()
+
+    wait.until(EC.invisibility_of_element_located((By.XPATH, "//input[@name='email']")))
+
+# --- Login Session Snapshots ---
+# 로그인에 성공하면 쿠키와 localStorage를 저장해 두었다가 새 드라이버에 주입합니다.
+# 스냅샷이 만료되었거나 검증에 실패한 경우에만 로그인 폼을 사용합니다.
+SESSION_SNAPSHOT_DIR = state_path("PLAYBOARD_SESSION_DIR", ".playboard_sessions")
+SESSION_SNAPSHOT_MAX_AGE = int(os.environ.get("PLAYBOARD_SESSION_MAX_AGE", str(12 * 60 * 60)))
+# 쿠키는 같은 도메인의 문서가 열려 있어야 추가할 수 있으므로 가벼운 텍스트 리소스를 먼저 엽니다.
+# 경량 프로필의 LEAN_BLOCKED_URLS에 걸리지 않는 주소여야 합니다.
+SESSION_RESTORE_URL = "https://playboard.co/robots.txt"
+# 스냅샷 복원과 작업 소유자 확인에 쓰는 비밀번호 해시(PBKDF2) 반복 횟수
+PASSWORD_HASH_ITERATIONS = 200_000
+_snapshot_lock = threading.Lock()
+
+def _password_hash(password, salt):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, PASSWORD_HASH_ITERATIONS)
+
+def account_owner(email, password):
+    """Identifies an account for crawl jobs and logs by a keyed hash of its email and password.
+
+    Knowing the email alone is not enough to reach another account's jobs; changing the password starts a new owner.
+    """
+    salt = f"playboard-owner:{email.strip().lower()}".encode('utf-8')
+    return _password_hash(password, salt).hex()[:32]
+
+def _snapshot_path(email):
+    name = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:16]
+    return os.path.join(SESSION_SNAPSHOT_DIR, f"{name}.json")
+
+def save_session_snapshot(driver, email, password):
+    """Stores the authenticated cookie jar and local storage of `driver` for `email`, with a verifier of `password`."""
+    local_storage = driver.execute_script("return JSON.stringify(Object.assign({}, window.localStorage));")
+    salt = os.urandom(16)
+    snapshot = {
+        'saved_at': time.time(),
+        'verifier': {'salt': salt.hex(), 'hash': _password_hash(password, salt).hex()},
+        'cookies': [c for c in driver.get_cookies() if c.get('domain', '').lstrip('.').endswith('playboard.co')],
+        'local_storage': json.loads(local_storage or "{}"),
+    }
+    path = _snapshot_path(email)
+    with _snapshot_lock:
+        os.makedirs(SESSION_SNAPSHOT_DIR, mode=0o700, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+
+def load_session_snapshot(email, password):
+    """Returns the saved snapshot for `email`, or None if there is none, it has expired or `password` doesn't match it."""
+    try:
+        with open(_snapshot_path(email), encoding='utf-8') as f:
+            snapshot = json.load(f)
+        verifier = snapshot['verifier']
+        expected = bytes.fromhex(verifier['hash'])
+        salt = bytes.fromhex(verifier['salt'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # 이메일만 알고 비밀번호가 틀리면 다른 사용자의 로그인 세션을 복원하지 않습니다.
+    if not hmac.compare_digest(_password_hash(password, salt), expected):
+        return None
+    now = time.time()
+    if now - snapshot.get('saved_at', 0) > SESSION_SNAPSHOT_MAX_AGE:
+        return None
+    snapshot['cookies'] = [c for c in snapshot.get('cookies', []) if not c.get('expiry') or c['expiry'] > now]
+    if not snapshot['cookies']:
+        return None
+    return snapshot
+
+def clear_session_snapshot(email):
+    try:
+        os.remove(_snapshot_path(email))
+    except OSError:
+        pass
+
+def is_logged_in(driver):
+    return not driver.find_elements(By.XPATH, "//a[text()='로그인']")
+
+def restore_session_snapshot(driver, snapshot):
+    """Injects a saved session into `driver` and validates it with a single page load."""
+    driver.get(SESSION_RESTORE_URL)
+    restored = 0
+    for cookie in snapshot['cookies']:
+        try:
+            driver.add_cookie({k: v for k, v in cookie.items() if k in ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')})
+            restored += 1
+        except Exception:
+            continue
+    if not restored:
+        raise RuntimeError(f"{driver.current_url}에서 저장된 쿠키를 하나도 추가하지 못했습니다.")
+    if snapshot.get('local_storage'):
+        driver.execute_script(
+            "const items = arguments[0]; for (const k in items) { window.localStorage.setItem(k, items[k]); }",
+            snapshot['local_storage']
+        )
+    driver.get("https://playboard.co")
+    WebDriverWait(driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
+    return is_logged_in(driver)
+
+def authenticate_driver(driver, email, password, log_fn=None):
+    """Logs `driver` in, preferring a saved session snapshot over the login form.
+
+    Returns "snapshot" or "form" depending on which path succeeded; raises if the form login fails.
+    """
+    log_fn = log_fn or console_log
+    snapshot = load_session_snapshot(email, password)
+    if snapshot:
+        try:
+            if restore_session_snapshot(driver, snapshot):
+                log_fn("🍪 저장된 로그인 세션을 복원했습니다.")
+                return "snapshot"
+            log_fn("INFO: 저장된 로그인 세션이 만료되어 로그인 폼을 사용합니다.")
+        except Exception as e:
+            log_fn(f"⚠️ 저장된 로그인 세션 복원 실패: {e}")
+        clear_session_snapshot(email)
+        driver.delete_all_cookies()
+
+    login_driver(driver, email, password)
+    try:
+        save_session_snapshot(driver, email, password)
+    except Exception as e:
+        log_fn(f"⚠️ 로그인 세션 저장 실패: {e}")
+    return "form"
+
+def verify_login(email, password, headless=True, profile=None):
+    """Logs a throwaway driver in with the given credentials and quits it; raises if the login fails."""
+    driver = create_driver(headless, profile)
+    try:
+        authenticate_driver(driver, email, password)
+    finally:
+        driver.quit()
+
+# --- Captcha Solving ---
+# 2Captcha 풀이는 20~60초가 걸리므로 별도 스레드에서 진행하고, 그동안 크롤러는 중단 요청을 확인하며
+# (증분 수집 중이면) 이미 로드된 행을 계속 수집합니다.
+CAPTCHA_POLL_INTERVAL = 0.5
+CAPTCHA_SETTLE_TIMEOUT = 15
+CAPTCHA_SOLVER_WORKERS = 4
+# 풀이를 이 시간(초)보다 오래 기다리면 포기하고 스크롤을 중단합니다.
+CAPTCHA_SOLVE_TIMEOUT = int(os.environ.get("PLAYBOARD_CAPTCHA_TIMEOUT", "180"))
+# API 키별 CaptchaService는 최근에 쓴 것만 이 개수까지 보관합니다.
+CAPTCHA_SERVICE_CACHE_SIZE = 8
+
+# 모든 CaptchaService가 풀이 스레드 풀 하나를 같이 써서, API 키가 늘어나도 스레드 수는 CAPTCHA_SOLVER_WORKERS로 묶입니다.
+_captcha_executor = None
+_captcha_executor_lock = threading.Lock()
+
+def _shared_captcha_executor():
+    global _captcha_executor
+    with _captcha_executor_lock:
+        if _captcha_executor is None:
+            _captcha_executor = ThreadPoolExecutor(max_workers=CAPTCHA_SOLVER_WORKERS, thread_name_prefix="captcha")
+            atexit.register(_captcha_executor.shutdown, wait=False, cancel_futures=True)
+        return _captcha_executor
+
+class CaptchaService:
+    """Solves reCAPTCHAs in the background on one shared solver client and keeps solve statistics.
+
+    `solver` is anything with TwoCaptcha's `recaptcha(sitekey=..., url=...)` method returning {'code': token}
+    (a TwoCaptcha client for `api_key` by default), so crawls can run against a fake solver. Solves run on
+    `executor`, by default the process-wide pool of CAPTCHA_SOLVER_WORKERS threads.
+    """
+
+    def __init__(self, api_key=None, solver=None, executor=None):
+        self.solver = solver if solver is not None else (TwoCaptcha(apiKey=api_key) if api_key else None)
+        self._executor = executor or _shared_captcha_executor()
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._failures = 0
+
+    @property
+    def available(self):
+        return self.solver is not None
+
+    def submit(self, site_key, page_url):
+        """Starts a solve and returns a Future of (token, seconds); failures are raised by the Future."""
+        return self._executor.submit(self._solve, site_key, page_url)
+
+    def _solve(self, site_key, page_url):
+        started = time.perf_counter()
+        try:
+            token = self.solver.recaptcha(sitekey=site_key, url=page_url)['code']
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._latencies.append(elapsed)
+        return token, elapsed
+
+    def stats(self):
+        with self._lock:
+            solved = len(self._latencies)
+            attempts = solved + self._failures
+            return {
+                'attempts': attempts,
+                'solved': solved,
+                'failed': self._failures,
+                'success_rate': round(solved / attempts, 3) if attempts else None,
+                'avg_solve_s': round(sum(self._latencies) / solved, 2) if solved else None,
+                'max_solve_s': round(max(self._latencies), 2) if solved else None,
+            }
+
+_captcha_services = OrderedDict()
+_captcha_services_lock = threading.Lock()
+
+def captcha_service_for(api_key):
+    """Returns the process-wide CaptchaService for an API key, so all crawls reuse one solver client.
+
+    Only the CAPTCHA_SERVICE_CACHE_SIZE most recently used keys are kept; services hold no threads of their own.
+    """
+    with _captcha_services_lock:
+        service = _captcha_services.get(api_key)
+        if service is None:
+            service = _captcha_services[api_key] = CaptchaService(api_key)
+        _captcha_services.move_to_end(api_key)
+        while len(_captcha_services) > CAPTCHA_SERVICE_CACHE_SIZE:
+            _captcha_services.popitem(last=False)
+        return service
+
+def find_captcha(driver):
+    """Returns (site_key, callback) of a reCAPTCHA shown on the page, or None."""
+    # 1. 메인 프레임에서 'reCAPTCHA' iframe 찾기
+    if not driver.find_elements(By.CSS_SELECTOR, "iframe[title='reCAPTCHA']"):
+        return None
+    site_key_element = driver.find_element(By.CSS_SELECTOR, ".g-recaptcha")
+    return site_key_element.get_attribute("data-sitekey"), site_key_element.get_attribute("data-callback")
+
+def apply_captcha_token(driver, token, callback, log_fn=console_log):
+    # JavaScript를 사용하여 숨겨진 textarea에 값 설정 및 콜백 실행
+    driver.execute_script("document.getElementById('g-recaptcha-response').innerHTML = arguments[0];", token)
+    if callback:
+        driver.execute_script(f"{callback}(arguments[0]);", token)
+        log_fn("INFO: 캡챠 콜백 함수를 실행했습니다.")
+    else:
+        log_fn("WARN: 콜백 함수를 찾을 수 없습니다. 직접 제출을 시도해야 할 수 있습니다.")
+
+def wait_for_captcha_cleared(driver, rows_before, timeout=CAPTCHA_SETTLE_TIMEOUT):
+    """Waits until the reCAPTCHA iframe is gone or new rows appear; returns False on timeout."""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(
+            lambda d: not d.find_elements(By.CSS_SELECTOR, "iframe[title='reCAPTCHA']") or count_rows(d) > rows_before
+        )
+        return True
+    except TimeoutException:
+        return False
+
+def detect_and_handle_captcha(driver, api_key=None, log_fn=console_log, service=None, stop_event=None, while_waiting=None, metrics=None, a_date=None,
+                              timeout=CAPTCHA_SOLVE_TIMEOUT):
+    """Solves a reCAPTCHA on the page, if any; returns True when the page can be scrolled again.
+
+    The solve runs on `service` (the shared CaptchaService for `api_key` by default). While it is pending,
+    `while_waiting()` is called every CAPTCHA_POLL_INTERVAL seconds and `stop_event` cancels the wait; a solve
+    still pending after `timeout` seconds counts as failed. Solve latency is recorded in `metrics` as the
+    'captcha_solve' phase.
+    """
+    try:
+        captcha = find_captcha(driver)
+        if captcha is None:
+            return True # 캡챠가 더 이상 보이지 않으면 성공으로 간주
+
+        log_fn("INFO: '로봇이 아닙니다' 캡챠 iframe 발견.")
+        site_key, callback = captcha
+        if service is None and api_key:
+            service = captcha_service_for(api_key)
+        if service is None or not service.available:
+            log_fn("🚨 캡챠가 감지되었으나, 2Captcha API 키가 없습니다. 자동 해결을 건너뜁니다.")
+            return False
+
+        log_fn("🚨 캡챠 감지됨! 2Captcha로 자동 해결을 시도합니다.")
+        future = service.submit(site_key, driver.current_url)
+        deadline = time.monotonic() + timeout
+        while not future.done():
+            if time.monotonic() >= deadline:
+                # 풀이는 백그라운드에서 끝나도록 두고 이 캡챠는 실패로 처리합니다.
+                if metrics is not None:
+                    metrics.incr('captcha_failures', a_date=a_date)
+                log_fn(f"❌ 2Captcha 해결이 {timeout}초 안에 끝나지 않았습니다.")
+                return False
+            if while_waiting is not None:
+                while_waiting()
+            if stop_event is None:
+                time.sleep(CAPTCHA_POLL_INTERVAL)
+            elif stop_event.wait(CAPTCHA_POLL_INTERVAL):
+                # 풀이는 백그라운드에서 끝나도록 두고 크롤링만 멈춥니다.
+                log_fn("🛑 캡챠 해결을 기다리던 중 크롤링이 중단되었습니다.")
+                return False
+
+        try:
+            token, elapsed = future.result()
+        except Exception as e:
+            if metrics is not None:
+                metrics.incr('captcha_failures', a_date=a_date)
+            log_fn(f"❌ 2Captcha 해결 실패: {e}")
+            return False
+        if metrics is not None:
+            metrics.record('captcha_solve', elapsed, a_date)
+        log_fn(f"✅ 2Captcha 해결 완료 ({elapsed:.1f}초). 토큰을 주입합니다.")
+
+        rows_before = count_rows(driver)
+        apply_captcha_token(driver, token, callback, log_fn)
+        # 고정 시간 대기 대신 캡챠가 사라지거나 새 행이 로드될 때까지만 기다립니다.
+        if not wait_for_captcha_cleared(driver, rows_before):
+            log_fn(f"⚠️ 토큰 주입 후 {CAPTCHA_SETTLE_TIMEOUT}초 동안 페이지가 바뀌지 않았습니다.")
+        return True
+
+    except Exception as e:
+        log_fn(f"⚠️ 캡챠 감지/처리 중 예상치 못한 오류: {e}")
+        return False
+
+# 차트 페이지 주소. 벤치마크에서는 로컬 테스트 서버를 가리키도록 바꿉니다.
+PLAYBOARD_CHART_BASE = os.environ.get("PLAYBOARD_CHART_BASE", "https://playboard.co")
+# 크롤링 결과는 날짜가 끝날 때마다, 또는 이 개수만큼 모일 때마다 result_q로 보냅니다.
+RESULT_BATCH_SIZE = 500
+# 페이지 로딩이 실패하면 지수 백오프로 다시 시도합니다.
+PAGE_LOAD_ATTEMPTS = 3
+PAGE_LOAD_RETRY_BASE_DELAY = 5
+
+class PageLoadError(Exception):
+    """Raised when a chart page could not be loaded after all retries."""
+
+def crawl_date(driver, is_short, a_date, country_code, max_items, stop_event, log_q, filter_settings, processed_hashes,
+               on_progress=None, extraction_mode="bulk", incremental=False, prune_dom=False, captcha_api_key=None,
+               http_fetcher=None, chart_store=None, on_batch=None, start_rank=0, metrics=None, captcha_service=None):
+    """Crawls the chart of a single date on `driver` and returns the collected items.
+
+    `on_progress` is called with the number of items collected for this date so far. When `http_fetcher`
+    is given, the chart is fetched over HTTP first and the browser is only used as a fallback. With
+    `chart_store`, a stored chart that is deep and fresh enough is served without touching the site, and
+    newly crawled charts are written back. `on_batch(items, rank)` receives finalized items in batches of
+    RESULT_BATCH_SIZE as they are collected, with the remainder flushed when the date finishes. Rows up to
+    `start_rank` were harvested by an earlier run and are skipped. Phase timings and counters go to
+    `metrics` (a CrawlMetrics). Captchas are solved on `captcha_service` (the shared CaptchaService of
+    `captcha_api_key` by default). Raises PageLoadError if the chart page cannot be loaded after
+    PAGE_LOAD_ATTEMPTS tries.
+    """
+    if metrics is None:
+        metrics = CrawlMetrics()
+    subscriber_filter = compile_subscriber_filter(filter_settings)
+    try:
+        date_obj = datetime.strptime(a_date, '%Y%m%d')
+        kst = timezone(timedelta(hours=9))
+        date_obj = date_obj.replace(tzinfo=kst)
+        key = int(date_obj.timestamp())
+    except ValueError:
+        log_from_thread(log_q, f"❌ 날짜 형식이 올바르지 않습니다: {a_date}")
+        return []
+
+    log_from_thread(log_q, f"🎯 {date_obj.strftime('%Y-%m-%d')} 날짜 크롤링 시작 (목표: {max_items}개)...")
+
+    date_str = date_obj.strftime('%Y-%m-%d')
+    date_items = []
+    chart_records = []
+    rows_seen = 0
+    published = 0
+
+    def publish(final=False):
+        nonlocal published
+        if on_batch is None:
+            return
+        if len(date_items) - published >= (1 if final else RESULT_BATCH_SIZE):
+            on_batch(date_items[published:], rows_seen)
+            published = len(date_items)
+
+    def collect(raw_rows, from_store=False):
+        with metrics.span('process', a_date):
+            try:
+                counts = _collect_batch(raw_rows, from_store)
+            except Exception as e:
+                log_from_thread(log_q, f"⚠️ 일괄 처리 실패, 항목별 처리로 전환합니다: {e}")
+                counts = _collect_rows(raw_rows, from_store)
+        for name, value in counts.items():
+            if value:
+                metrics.incr(name, value, a_date)
+
+    def _collect_batch(raw_rows, from_store):
+        nonlocal rows_seen
+        counts = {'rows_seen': 0, 'rows_collected': 0, 'duplicate_hashes': 0, 'rows_filtered': 0, 'row_errors': 0}
+        if stop_event.is_set():
+            return counts
+        # 수집한 항목 수는 확인한 순위 수를 넘지 않으므로 순위 기준으로만 자르면 됩니다.
+        raw_rows = raw_rows[:max(0, max_items - rows_seen)]
+        if not raw_rows:
+            return counts
+
+        if from_store:
+            frame = pd.DataFrame.from_records(raw_rows, columns=RECORD_COLUMNS)
+        else:
+            frame = build_records_frame(raw_rows, date_str)
+        ranks = rows_seen + 1 + frame.index.to_numpy()
+        hashes = frame['Hash']
+        fresh = ranks > start_rank
+        known = fresh & hashes.isin(processed_hashes).to_numpy()
+        passes = subscriber_filter.mask(frame['Subscribers_numeric'].to_numpy())
+        candidates = fresh & ~known & passes
+        # 같은 배치 안에서 반복되는 해시는 처음 나온 항목만 남깁니다.
+        repeated = candidates & hashes.where(candidates).duplicated().to_numpy()
+        keep = candidates & ~repeated
+
+        rows_seen += len(raw_rows)
+        counts['rows_seen'] = len(raw_rows)
+        counts['row_errors'] = len(raw_rows) - len(frame)
+        counts['duplicate_hashes'] = int(known.sum() + repeated.sum())
+        counts['rows_filtered'] = int((fresh & ~known & ~passes).sum())
+        if counts['row_errors']:
+            log_from_thread(log_q, f"⚠️ 처리할 수 없는 항목 {counts['row_errors']}개를 건너뜁니다.")
+        if not from_store:
+            chart_records.extend(frame.to_dict('records'))
+
+        new_items = frame[keep].to_dict('records')
+        if new_items:
+            date_items.extend(new_items)
+            processed_hashes.update(item['Hash'] for item in new_items)
+            counts['rows_collected'] = len(new_items)
+            if on_progress:
+                on_progress(len(date_items))
+            publish()
+        return counts
+
+    def _collect_rows(raw_rows, from_store):
+        """Reference per-row implementation of _collect_batch(), used if the batch path fails."""
+        nonlocal rows_seen
+        counts = {'rows_seen': 0, 'rows_collected': 0, 'duplicate_hashes': 0, 'rows_filtered': 0, 'row_errors': 0}
+        for raw in raw_rows:
+            if len(date_items) >= max_items or rows_seen >= max_items:
+                break
+            if stop_event.is_set(): break
+            rows_seen += 1
+            counts['rows_seen'] += 1
+
+            try:
+                item = raw if from_store else build_record(raw, date_str)
+                if not from_store:
+                    chart_records.append(item)
+                # 이전 실행에서 이미 수집한 순위는 건너뜁니다.
+                if rows_seen <= start_rank:
+                    continue
+                if item['Hash'] in processed_hashes:
+                    counts['duplicate_hashes'] += 1
+                    continue
+                if not subscriber_filter.includes(item['Subscribers_numeric']):
+                    counts['rows_filtered'] += 1
+                    continue
+
+                date_items.append(item)
+                processed_hashes.add(item['Hash'])
+                counts['rows_collected'] += 1
+
+                # 진행률 업데이트
+                if on_progress:
+                    on_progress(len(date_items))
+                publish()
+
+            except Exception as e:
+                counts['row_errors'] += 1
+                log_from_thread(log_q, f"⚠️ 항목 {rows_seen} 처리 중 오류 발생: {e}")
+                continue
+        return counts
+
+    def store_chart(depth):
+        if chart_store is None or not chart_records:
+            return
+        try:
+            with metrics.span('store_save', a_date):
+                chart_store.save(is_short, country_code, date_str, chart_records, depth)
+        except Exception as e:
+            log_from_thread(log_q, f"⚠️ 차트 저장소 기록 실패: {e}")
+
+    if chart_store is not None:
+        try:
+            with metrics.span('store_load', a_date):
+                stored = chart_store.load(is_short, country_code, date_str, max_items)
+        except Exception as e:
+            log_from_thread(log_q, f"⚠️ 차트 저장소 조회 실패: {e}")
+            stored = None
+        if stored is not None:
+            metrics.incr('store_hits', a_date=a_date)
+            collect(stored, from_store=True)
+            log_from_thread(log_q, f"💾 {date_str}: 저장소에서 {len(date_items)}개 항목을 불러왔습니다.")
+            publish(final=True)
+            return date_items
+
+    if http_fetcher is not None:
+        try:
+            log_from_thread(log_q, "🌐 HTTP로 차트 데이터를 가져오는 중...")
+            with metrics.span('http_fetch', a_date):
+                raw_rows = http_fetcher.fetch_chart(is_short, key, country_code, max_items, stop_event)
+        except Exception as e:
+            metrics.incr('http_failures', a_date=a_date)
+            log_from_thread(log_q, f"⚠️ HTTP 수집 실패, 브라우저 수집으로 전환합니다: {e}")
+            raw_rows = []
+        if raw_rows:
+            collect(raw_rows)
+            # API가 차트 끝을 알려준 경우에만 요청한 깊이까지 확인한 것으로 기록하고, 아니면 받은 만큼만 기록합니다.
+            if not stop_event.is_set():
+                store_chart(max_items if http_fetcher.reached_end else len(raw_rows))
+            log_from_thread(log_q, f"📦 {date_str}: {len(date_items)}개 항목 수집 완료 (HTTP).")
+            publish(final=True)
+            return date_items
+        log_from_thread(log_q, "⚠️ HTTP 응답에 항목이 없어 브라우저 수집으로 전환합니다.")
+
+    if is_short:
+        url = f"{PLAYBOARD_CHART_BASE}/chart/short/most-viewed-all-videos-in-{country_code}-daily?period={key}"
+    else:
+        url = f"{PLAYBOARD_CHART_BASE}/chart/video/?period={key}"
+    
+    log_from_thread(log_q, f"➡️ URL로 이동 중: {url}")
+    
+    for attempt in range(1, PAGE_LOAD_ATTEMPTS + 1):
+        try:
+            with metrics.span('driver_get', a_date):
+                driver.get(url)
+            log_from_thread(log_q, "...페이지 로딩 대기 중...")
+            with metrics.span('load_wait', a_date):
+                WebDriverWait(driver, 45).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "a.title__label")))
+            log_from_thread(log_q, "✅ 페이지 로딩 완료.")
+            break
+        except Exception as e:
+            metrics.incr('page_load_failures', a_date=a_date)
+            log_from_thread(log_q, f"❌ 페이지 로딩 실패 ({attempt}/{PAGE_LOAD_ATTEMPTS}): {e}")
+            if attempt == PAGE_LOAD_ATTEMPTS:
+                raise PageLoadError(str(e)) from e
+            delay = PAGE_LOAD_RETRY_BASE_DELAY * 2 ** (attempt - 1) + random.uniform(0, 1)
+            log_from_thread(log_q, f"🔁 {delay:.0f}초 후 다시 시도합니다.")
+            if stop_event.wait(delay):
+                return []
+
+    scroll_count = 0
+    max_scrolls = (max_items // 20) + 15
+    no_change_count = 0
+    scroll_wait = SCROLL_WAIT_MIN
+    scroll_timings = []
+    pruned_total = 0
+    target_reached = False
+    
+    current_items_on_page = count_rows(driver)
+    while not stop_event.is_set():
+        if incremental:
+            # 스크롤할 때마다 새로 추가된 행만 바로 수집하고, 중단 조건은 수집된 데이터 기준으로 판단합니다.
+            with metrics.span('harvest', a_date):
+                new_rows, current_items_on_page, pruned = harvest_new_rows(driver, prune_dom)
+            pruned_total += pruned
+            collect(new_rows)
+            target_reached = len(date_items) >= max_items or rows_seen >= max_items
+            progress_text = f"수집: {len(date_items)}개 (확인한 순위: {rows_seen}, DOM 행: {current_items_on_page}, 제거된 행: {pruned_total})"
+        else:
+            target_reached = current_items_on_page >= max_items
+            progress_text = f"페이지 항목: {current_items_on_page}개"
+
+        last_scroll = f" ({scroll_timings[-1]:.2f}s)" if scroll_timings else ""
+        log_from_thread(log_q, f"스크롤 {scroll_count}회, {progress_text}{last_scroll}")
+        
+        if target_reached:
+            log_from_thread(log_q, "✅ 목표 항목 수에 도달하여 스크롤을 중단합니다.")
+            break
+        if scroll_count >= max_scrolls:
+            log_from_thread(log_q, f"⚠️ 최대 스크롤 횟수({max_scrolls}회)에 도달하여 스크롤을 중단합니다.")
+            break
+        
+        prev_items_count = current_items_on_page
+        current_items_on_page, elapsed = scroll_and_wait(driver, prev_items_count, scroll_wait)
+        scroll_count += 1
+        scroll_timings.append(elapsed)
+        metrics.record('scroll', elapsed, a_date)
+        metrics.incr('scroll_iterations', a_date=a_date)
+
+        if current_items_on_page == prev_items_count:
+            no_change_count += 1
+            log_from_thread(log_q, f"⚠️ 스크롤 후 {elapsed:.1f}초 동안 새 항목이 로드되지 않았습니다. ({no_change_count}/3)")
+            scroll_wait = min(scroll_wait * SCROLL_WAIT_BACKOFF, SCROLL_WAIT_MAX)
+            if no_change_count >= 3:
+                log_from_thread(log_q, "더 이상 새 항목이 로드되지 않아 캡챠 해결을 시도합니다.")
+                def harvest_while_waiting():
+                    # 캡챠를 푸는 동안 이미 로드된 행을 계속 수집합니다.
+                    nonlocal pruned_total
+                    try:
+                        with metrics.span('harvest', a_date):
+                            new_rows, _, pruned = harvest_new_rows(driver, prune_dom)
+                    except Exception as e:
+                        log_from_thread(log_q, f"⚠️ 캡챠 대기 중 행 수집 실패: {e}")
+                        return
+                    pruned_total += pruned
+                    collect(new_rows)
+
+                # Call captcha handler
+                metrics.incr('captcha_attempts', a_date=a_date)
+                with metrics.span('captcha', a_date):
+                    captcha_solved = detect_and_handle_captcha(
+                        driver, captcha_api_key, log_fn=lambda m: log_from_thread(log_q, m), service=captcha_service,
+                        stop_event=stop_event, while_waiting=harvest_while_waiting if incremental else None,
+                        metrics=metrics, a_date=a_date
+                    )
+                if captcha_solved:
+                    metrics.incr('captcha_solved', a_date=a_date)
+                    log_from_thread(log_q, "캡챠 해결 후 스크롤을 계속합니다.")
+                    no_change_count = 0 # Reset counter after handling
+                    scroll_wait = SCROLL_WAIT_MIN
+                    current_items_on_page = count_rows(driver)
+                else:
+                    log_from_thread(log_q, "캡챠 해결에 실패하여 스크롤을 중단합니다.")
+                    break # Stop scrolling for this date
+        else:
+            no_change_count = 0
+            scroll_wait = SCROLL_WAIT_MIN
+
+    log_from_thread(log_q, f"⏱️ {summarize_scroll_timings(scroll_timings)}")
+
+    if incremental:
+        # 마지막 스크롤로 추가된 행까지 수집합니다.
+        if not stop_event.is_set():
+            with metrics.span('harvest', a_date):
+                new_rows, _, _ = harvest_new_rows(driver, prune_dom)
+            collect(new_rows)
+    else:
+        log_from_thread(log_q, "🔍 데이터 수집 및 처리 중...")
+        with metrics.span('extract', a_date):
+            raw_rows = extract_rows(driver, log_q, extraction_mode)
+        log_from_thread(log_q, f"총 {len(raw_rows)}개 항목을 페이지에서 발견하여 처리를 시작합니다.")
+        collect(raw_rows)
+
+    # 목표 수에 도달했을 때만 요청한 깊이까지 확인한 것으로 기록합니다. 최대 스크롤 횟수에 걸렸다면 사이트가
+    # 행을 더 내려주지 않은 것일 수 있어(차트 끝인지 알 수 없음), 다음 크롤링이 짧은 차트를 받지 않도록 본 만큼만 기록합니다.
+    store_chart(max(rows_seen, max_items) if target_reached and not stop_event.is_set() else rows_seen)
+
+    if len(date_items) >= max_items:
+        log_from_thread(log_q, f"목표 수집량({max_items}개)에 도달하여 수집을 중단합니다.")
+    log_from_thread(log_q, f"📦 {date_str}: {len(date_items)}개 항목 수집 완료.")
+    publish(final=True)
+    return date_items
+
+def crawl(driver, is_short, dates, country_code, country_name, max_items, stop_event, log_q, result_q, filter_settings,
+          extraction_mode="bulk", incremental=False, prune_dom=False, captcha_api_key=None, fetch_engine="selenium",
+          chart_store=None, checkpoint=None, progress=None, metrics=None, captcha_service=None):
+    http_fetcher = None
+    if metrics is None:
+        metrics = CrawlMetrics()
+    try:
+        # 필터는 크롤링마다 한 번만 구간 집합으로 컴파일해 모든 날짜에서 재사용합니다.
+        filter_settings = compile_subscriber_filter(filter_settings)
+        collected_count = 0
+        processed_hashes = set()
+        if checkpoint is not None:
+            # 체크포인트가 있으면 이미 끝난 날짜는 건너뛰고 수집한 해시를 이어받습니다.
+            processed_hashes.update(checkpoint.collected_hashes())
+            dates = checkpoint.pending_dates()
+        if progress is not None:
+            progress.start(dates, max_items)
+        
+        if not driver:
+            log_from_thread(log_q, "❌ 드라이버가 없습니다. 먼저 로그인 해주세요.")
+            result_q.put(pd.DataFrame())
+            return
+
+        if fetch_engine == "http":
+            http_fetcher = PlayboardHttpFetcher.from_driver(driver)
+
+        for a_date in dates:
+            if stop_event.is_set():
+                log_from_thread(log_q, "🛑 사용자에 의해 크롤링이 중단되었습니다.")
+                break
+
+            def on_progress(count, a_date=a_date):
+                if progress is not None:
+                    progress.update(a_date, count)
+
+            def on_batch(rows, rank, a_date=a_date):
+                if checkpoint is not None:
+                    checkpoint.record_batch(a_date, rows, rank)
+                result_q.put(pd.DataFrame(rows))
+
+            # 결과는 배치 단위로 바로 result_q에 보내므로 여기서 전체 목록을 들고 있지 않습니다.
+            try:
+                with metrics.span('date_total', a_date), metrics.track_driver(driver, a_date):
+                    collected_count += len(crawl_date(
+                        driver, is_short, a_date, country_code, max_items, stop_event, log_q, filter_settings, processed_hashes,
+                        on_progress=on_progress, extraction_mode=extraction_mode, incremental=incremental,
+                        prune_dom=prune_dom, captcha_api_key=captcha_api_key, http_fetcher=http_fetcher,
+                        chart_store=chart_store, on_batch=on_batch,
+                        start_rank=checkpoint.start_rank(a_date) if checkpoint is not None else 0, metrics=metrics,
+                        captcha_service=captcha_service
+                    ))
+            except PageLoadError as e:
+                log_from_thread(log_q, f"⏭️ {a_date} 날짜를 건너뜁니다. '이어서 크롤링'으로 다시 시도할 수 있습니다.")
+                if checkpoint is not None:
+                    checkpoint.fail_date(a_date, e)
+                if progress is not None:
+                    progress.finish_date(a_date)
+                continue
+            if progress is not None:
+                progress.finish_date(a_date)
+            if checkpoint is not None and not stop_event.is_set():
+                checkpoint.complete_date(a_date)
+
+        log_from_thread(log_q, f"✅ 전체 {collected_count}개 항목 수집을 마쳤습니다.")
+
+    except Exception as e:
+        log_from_thread(log_q, f"❌ 크롤링 중 심각한 오류 발생: {e}")
+        result_q.put(pd.DataFrame())
+    finally:
+        if http_fetcher is not None:
+            http_fetcher.close()
+        if checkpoint is not None:
+            checkpoint.finish(stopped=stop_event.is_set())
+        if progress is not None:
+            progress.finish()
+        log_from_thread(log_q, "CRAWL_COMPLETE")
+
+# --- Parallel Crawling ---
+MAX_PARALLEL_DRIVERS = 4
+
+class _DateOrderedPublisher:
+    """Publishes the batches of concurrently crawled dates in date order, like a sequential crawl would.
+
+    Each date is crawled with its own set of seen hashes. Batches of a date wait until every earlier date
+    has finished, and rows whose Hash an earlier date already published are dropped then. A date is marked
+    complete in the checkpoint only once all of its rows have been published.
+    """
+
+    def __init__(self, dates, result_q, checkpoint=None, seen=()):
+        self._dates = list(dates)
+        self._next = 0
+        self._pending = {a_date: [] for a_date in self._dates}
+        self._finished = {}
+        self._seen = set(seen)
+        self._result_q = result_q
+        self._checkpoint = checkpoint
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def add(self, a_date, rows, rank):
+        with self._lock:
+            self._pending[a_date].append((rows, rank))
+            self._flush()
+
+    def finish(self, a_date, completed):
+        with self._lock:
+            self._finished[a_date] = completed
+            self._flush()
+
+    def close(self):
+        """Publishes whatever is still waiting, e.g. after a stop left earlier dates unfinished."""
+        with self._lock:
+            for a_date in self._dates[self._next:]:
+                self._publish_pending(a_date)
+            self._next = len(self._dates)
+
+    def _publish_pending(self, a_date):
+        for rows, rank in self._pending[a_date]:
+            rows = [row for row in rows if row['Hash'] not in self._seen]
+            self._seen.update(row['Hash'] for row in rows)
+            # 체크포인트에 먼저 기록해 두면 행 기록 파일의 순서가 발행 순서와 같고 항상 발행한 행을 모두 담습니다.
+            if self._checkpoint is not None:
+                self._checkpoint.record_batch(a_date, rows, rank)
+            if rows:
+                self._result_q.put(pd.DataFrame(rows))
+                self.published += len(rows)
+        self._pending[a_date] = []
+
+    def _flush(self):
+        while self._next < len(self._dates):
+            a_date = self._dates[self._next]
+            self._publish_pending(a_date)
+            if a_date not in self._finished:
+                return
+            if self._finished[a_date] and self._checkpoint is not None:
+                self._checkpoint.complete_date(a_date)
+            self._next += 1
+
+def crawl_parallel(driver, is_short, dates, country_code, country_name, max_items, stop_event, log_q, result_q, filter_settings,
+                   workers=2, credentials=None, headless=True, extraction_mode="bulk", incremental=False, prune_dom=False,
+                   captcha_api_key=None, driver_pool=None, fetch_engine="selenium", chart_store=None, checkpoint=None,
+                   progress=None, metrics=None, captcha_service=None, driver_profile=None):
+    """Crawls `dates` concurrently on a pool of logged-in drivers.
+
+    The session's own `driver` is reused as the first worker; the remaining workers get fresh drivers with
+    `driver_profile`, logged in with `credentials`, and are shut down when the crawl ends. With `driver_pool`,
+    workers lease their drivers from the shared pool instead and return them afterwards. Batches go to
+    `result_q` in date order with cross-date duplicates removed, so the results match a sequential crawl().
+    """
+    if metrics is None:
+        metrics = CrawlMetrics()
+    publisher = None
+    try:
+        filter_settings = compile_subscriber_filter(filter_settings)
+        if not driver and driver_pool is None:
+            log_from_thread(log_q, "❌ 드라이버가 없습니다. 먼저 로그인 해주세요.")
+            result_q.put(pd.DataFrame())
+            return
+
+        seen_hashes = set()
+        if checkpoint is not None:
+            seen_hashes.update(checkpoint.collected_hashes())
+            dates = checkpoint.pending_dates()
+            if not dates:
+                log_from_thread(log_q, "✅ 남은 날짜가 없습니다.")
+                return
+        if progress is not None:
+            progress.start(dates, max_items)
+        # 날짜마다 따로 중복을 걸러 수집하고, 날짜 간 중복은 발행할 때 날짜 순서대로 제거합니다.
+        # 공유 집합을 쓰면 여러 날짜에 오른 동영상이 어느 날짜에 남을지가 스레드 타이밍에 따라 달라집니다.
+        publisher = _DateOrderedPublisher(dates, result_q, checkpoint, seen_hashes)
+
+        workers = max(1, min(workers, MAX_PARALLEL_DRIVERS, len(dates)))
+        date_queue = queue.Queue()
+        for a_date in dates:
+            date_queue.put(a_date)
+
+        def on_progress(a_date, count):
+            if progress is not None:
+                progress.update(a_date, count)
+
+        def worker(worker_id):
+            worker_log = lambda m: log_from_thread(log_q, f"[W{worker_id}] {m}")
+            worker_driver = driver if worker_id == 1 else None
+            leased = False
+            pages = 0
+            http_fetcher = None
+            try:
+                if worker_driver is None and driver_pool is not None:
+                    with metrics.span('driver_lease'):
+                        worker_driver = driver_pool.lease()
+                    leased = True
+                elif worker_driver is None:
+                    if not credentials:
+                        worker_log("⚠️ 로그인 정보가 없어 추가 드라이버를 시작하지 않습니다.")
+                        return
+                    worker_log("INFO: 추가 WebDriver를 초기화하고 로그인합니다.")
+                    worker_driver = create_driver(headless, driver_profile)
+                    authenticate_driver(worker_driver, *credentials, log_fn=worker_log)
+                    worker_log("✅ 로그인 성공!")
+
+                if fetch_engine == "http":
+                    http_fetcher = PlayboardHttpFetcher.from_driver(worker_driver)
+
+                while not stop_event.is_set():
+                    try:
+                        a_date = date_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    def on_batch(rows, rank, a_date=a_date):
+                        publisher.add(a_date, rows, rank)
+
+                    completed = False
+                    try:
+                        with metrics.span('date_total', a_date), metrics.track_driver(worker_driver, a_date):
+                            crawl_date(
+                                worker_driver, is_short, a_date, country_code, max_items, stop_event, log_q, filter_settings, set(seen_hashes),
+                                on_progress=lambda count, a_date=a_date: on_progress(a_date, count),
+                                extraction_mode=extraction_mode, incremental=incremental, prune_dom=prune_dom,
+                                captcha_api_key=captcha_api_key, http_fetcher=http_fetcher, chart_store=chart_store,
+                                on_batch=on_batch, start_rank=checkpoint.start_rank(a_date) if checkpoint is not None else 0,
+                                metrics=metrics, captcha_service=captcha_service
+                            )
+                        completed = not stop_event.is_set()
+                    except PageLoadError as e:
+                        worker_log(f"⏭️ {a_date} 날짜를 건너뜁니다. '이어서 크롤링'으로 다시 시도할 수 있습니다.")
+                        if checkpoint is not None:
+                            checkpoint.fail_date(a_date, e)
+                    finally:
+                        pages += 1
+                        publisher.finish(a_date, completed)
+                        if progress is not None:
+                            progress.finish_date(a_date)
+            except Exception as e:
+                worker_log(f"❌ 작업자 오류: {e}")
+            finally:
+                if http_fetcher is not None:
+                    http_fetcher.close()
+                if leased:
+                    driver_pool.release(worker_driver, pages=pages)
+                elif worker_driver is not None and worker_driver is not driver:
+                    try:
+                        worker_driver.quit()
+                    except Exception:
+                        pass
+
+        log_from_thread(log_q, f"🧵 {len(dates)}개 날짜를 {workers}개의 브라우저로 병렬 크롤링합니다.")
+        threads = [threading.Thread(target=worker, args=(i + 1,), daemon=True) for i in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        publisher.close()
+
+        if stop_event.is_set():
+            log_from_thread(log_q, "🛑 사용자에 의해 크롤링이 중단되었습니다.")
+        elif not date_queue.empty():
+            log_from_thread(log_q, f"⚠️ 처리되지 않은 날짜가 {date_queue.qsize()}개 남아 있습니다.")
+
+        log_from_thread(log_q, f"✅ 전체 {publisher.published}개 항목 수집을 마쳤습니다.")
+
+    except Exception as e:
+        log_from_thread(log_q, f"❌ 크롤링 중 심각한 오류 발생: {e}")
+        result_q.put(pd.DataFrame())
+    finally:
+        if publisher is not None:
+            publisher.close()
+        if checkpoint is not None:
+            checkpoint.finish(stopped=stop_event.is_set())
+        if progress is not None:
+            progress.finish()
+        log_from_thread(log_q, "CRAWL_COMPLETE")
+
+
+# --- Shared Driver Pool ---
+# 여러 사용자가 같은 프로세스를 공유하는 배포 환경에서 미리 로그인해 둔 크롬을 크롤링 동안만 빌려줍니다.
+DRIVER_POOL_SIZE = int(os.environ.get("PLAYBOARD_DRIVER_POOL_SIZE", "2"))
+DRIVER_POOL_MAX_PAGES = int(os.environ.get("PLAYBOARD_DRIVER_POOL_MAX_PAGES", "50"))
+DRIVER_POOL_LEASE_TIMEOUT = 120
+# lease()가 빈 풀을 기다리며 드라이버 준비 실패를 확인하는 간격(초)
+DRIVER_POOL_POLL_INTERVAL = 1
+
+class DriverPool:
+    """Process-wide pool of pre-authenticated Chrome drivers.
+
+    Drivers are launched and logged in on background threads, leased to one crawl at a time,
+    health-checked on lease, recycled after `max_pages` chart pages and quit on shutdown. If a launch
+    fails before any driver has logged in (e.g. a wrong password), `failure` holds the error, no more
+    drivers are launched and `lease()` raises right away.
+    """
+
+    def __init__(self, email, password, size=DRIVER_POOL_SIZE, headless=True, max_pages=DRIVER_POOL_MAX_PAGES, profile=None):
+        self.credentials = (email, password)
+        self.size = max(1, size)
+        self.headless = headless
+        self.profile = profile
+        self.max_pages = max_pages
+        self._idle = queue.Queue()
+        self._leased = set()
+        self._pages = {}
+        self._starting = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._authenticated = False
+        self.failure = None
+        atexit.register(self.shutdown)
+        self._top_up()
+
+    def _alive_count(self):
+        return self._idle.qsize() + len(self._leased) + self._starting
+
+    def _top_up(self):
+        with self._lock:
+            missing = 0 if self._closed or self.failure is not None else self.size - self._alive_count()
+            self._starting += max(0, missing)
+        for _ in range(max(0, missing)):
+            threading.Thread(target=self._launch, daemon=True).start()
+
+    def _launch(self):
+        driver = None
+        try:
+            driver = create_driver(self.headless, self.profile)
+            authenticate_driver(driver, *self.credentials)
+        except Exception as e:
+            console_log(f"❌ 드라이버 풀: 드라이버 준비 실패: {e}")
+            self._quit(driver)
+            driver = None
+            with self._lock:
+                # 한 번도 로그인하지 못했다면 계정 정보가 틀렸을 수 있으므로 브라우저를 계속 다시 띄우지 않습니다.
+                if not self._authenticated and self.failure is None:
+                    self.failure = e
+        with self._lock:
+            self._starting -= 1
+            if driver is not None and not self._closed and self.failure is None:
+                self._authenticated = True
+                self._pages[id(driver)] = 0
+                self._idle.put(driver)
+                return
+        self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, driver):
+        """Checks that the browser still responds and that the session has not been logged out."""
+        try:
+            driver.execute_script("return document.readyState")
+        except Exception:
+            return False
+        try:
+            if not is_logged_in(driver):
+                console_log("⚠️ 드라이버 풀: 로그아웃된 드라이버를 다시 로그인합니다.")
+                authenticate_driver(driver, *self.credentials)
+            return True
+        except Exception:
+            return False
+
+    def _retire(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self._leased.discard(driver)
+        self._quit(driver)
+        self._top_up()
+
+    def lease(self, timeout=DRIVER_POOL_LEASE_TIMEOUT):
+        """Returns a healthy, logged-in driver. Raises TimeoutError if none becomes available in time."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("드라이버 풀이 종료되었습니다.")
+            if self.failure is not None:
+                raise RuntimeError(f"드라이버를 준비하지 못했습니다: {self.failure}")
+            self._top_up()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("사용 가능한 드라이버가 없습니다.")
+            try:
+                driver = self._idle.get(timeout=min(remaining, DRIVER_POOL_POLL_INTERVAL))
+            except queue.Empty:
+                continue
+            if self._is_healthy(driver):
+                with self._lock:
+                    self._leased.add(driver)
+                return driver
+            console_log("⚠️ 드라이버 풀: 응답하지 않는 드라이버를 교체합니다.")
+            self._retire(driver)
+
+    def release(self, driver, pages=0):
+        """Returns a leased driver; drivers that have served `max_pages` pages are replaced."""
+        with self._lock:
+            self._leased.discard(driver)
+            used = self._pages.get(id(driver), 0) + pages
+            self._pages[id(driver)] = used
+            recycle = self._closed or used >= self.max_pages
+            if not recycle:
+                self._idle.put(driver)
+        if recycle:
+            self._retire(driver)
+
+    def stats(self):
+        with self._lock:
+            return {'idle': self._idle.qsize(), 'leased': len(self._leased), 'starting': self._starting}
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            drivers = list(self._leased)
+            self._leased.clear()
+        while True:
+            try:
+                drivers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for driver in drivers:
+            self._quit(driver)
+
+def crawl_with_pool(driver_pool, is_short, dates, country_code, country_name, max_items, stop_event, log_q, result_q, filter_settings, **kwargs):
+    """Leases a driver from `driver_pool` for the length of a sequential crawl."""
+    metrics = kwargs.setdefault('metrics', CrawlMetrics())
+    try:
+        log_from_thread(log_q, "🔄 공유 드라이버 풀에서 드라이버를 빌리는 중...")
+        with metrics.span('driver_lease'):
+            driver = driver_pool.lease()
+    except Exception as e:
+        log_from_thread(log_q, f"❌ 드라이버를 빌리지 못했습니다: {e}")
+        result_q.put(pd.DataFrame())
+        log_from_thread(log_q, "CRAWL_COMPLETE")
+        return
+    try:
+        crawl(driver, is_short, dates, country_code, country_name, max_items, stop_event, log_q, result_q, filter_settings, **kwargs)
+    finally:
+        driver_pool.release(driver, pages=len(dates))
@@ -0,0 +1,262 @@
+"""File exports of result records.
+
+ResultExporter builds CSV, Parquet, Excel and PDF files of rows in a ResultTable only when asked, and
+reuses a file while its rows and the table version are unchanged. Tabular formats are expanded and encoded
+in chunks straight to disk. PDF exports are laid out as a table with a fixed number of rows per page,
+expanded one page at a time and written page by page into PdfPages, so memory stays bounded.
+"""
+import io
+import os
+import math
+import uuid
+import shutil
+import weakref
+import tempfile
+
+import requests
+import pandas as pd
+import matplotlib
+from matplotlib import font_manager
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+from PIL import Image
+
+from playboard_core import RECORD_COLUMNS, console_log
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+EXPORT_CHUNK_ROWS = 5000
+# 레코드에서 int64인 열입니다. 나머지 열은 모두 문자열입니다.
+RECORD_NUMERIC_COLUMNS = ('Views_numeric', 'Subscribers_numeric')
+# CSV/Excel은 사람이 보는 파일이라 정렬용 숫자 열을 빼고, Parquet은 타입이 있는 숫자 열까지 모두 담습니다.
+TABLE_EXPORT_COLUMNS = [column for column in RECORD_COLUMNS if column not in RECORD_NUMERIC_COLUMNS]
+EXPORT_FORMATS = {
+    'csv': {'label': "CSV", 'extension': ".csv", 'mime': "text/csv"},
+    'xlsx': {'label': "Excel", 'extension': ".xlsx", 'mime': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    'parquet': {'label': "Parquet", 'extension': ".parquet", 'mime': "application/vnd.apache.parquet"},
+    'pdf': {'label': "PDF", 'extension': ".pdf", 'mime': "application/pdf"},
+}
+
+PDF_COLUMNS = ['Title', 'Views', 'Channel', 'Date', 'Subscribers']
+PDF_EXPORT_COLUMNS = ['Thumbnail'] + PDF_COLUMNS
+PDF_ROWS_PER_PAGE = 25
+# 열 너비는 처음 이 행 수만큼만 읽어서 정합니다. 셀은 어차피 PDF_MAX_CELL_CHARS에서 잘립니다.
+PDF_WIDTH_SAMPLE_ROWS = 1000
+PDF_PAGE_SIZE = (11.69, 8.27)  # A4 가로 (인치)
+PDF_FONT_SIZE = 7
+PDF_MAX_CELL_CHARS = 60
+PDF_FONT_CANDIDATES = ('Malgun Gothic', 'AppleGothic', 'NanumGothic', 'Noto Sans CJK KR', 'Noto Sans KR')
+PDF_THUMBNAIL_SHARE = 0.08
+PDF_THUMBNAIL_SIZE = (160, 90)
+THUMBNAIL_TIMEOUT = 5
+
+def pdf_font_family(log_fn=console_log):
+    """Returns the first installed font that can render Korean, or None."""
+    installed = {font.name for font in font_manager.fontManager.ttflist}
+    for name in PDF_FONT_CANDIDATES:
+        if name in installed:
+            return name
+    log_fn("⚠️ 한글 폰트를 찾을 수 없습니다. PDF의 한글이 깨질 수 있습니다.")
+    return None
+
+def _cell_text(value):
+    text = str(value)
+    return text if len(text) <= PDF_MAX_CELL_CHARS else text[:PDF_MAX_CELL_CHARS - 1] + "…"
+
+def pdf_column_widths(df, columns):
+    """Relative column widths from the longest value of each column (header included, capped per cell)."""
+    widths = []
+    for column in columns:
+        longest = int(df[column].astype(str).str.len().max()) if len(df) else 0
+        widths.append(max(4, min(max(longest, len(column)), PDF_MAX_CELL_CHARS)))
+    total = sum(widths)
+    return [width / total for width in widths]
+
+def fetch_thumbnail(url, session=None):
+    """Downloads a thumbnail and shrinks it for a table cell; returns None when it can't be loaded."""
+    if not url:
+        return None
+    try:
+        response = (session or requests).get(url, timeout=THUMBNAIL_TIMEOUT)
+        response.raise_for_status()
+        image = Image.open(io.BytesIO(response.content)).convert('RGB')
+    except (requests.RequestException, OSError):
+        return None
+    image.thumbnail(PDF_THUMBNAIL_SIZE)
+    return image
+
+def write_pdf(pages, total_rows, out, rows_per_page=PDF_ROWS_PER_PAGE, thumbnails=False, thumbnail_loader=None, title=None,
+              log_fn=console_log):
+    """Writes result records as a paginated table into `out` (a path or binary file); returns the page count.
+
+    `pages` yields record DataFrames of at most `rows_per_page` rows, one per page (iter_record_chunks with
+    `chunk_rows=rows_per_page`), and `total_rows` is their total. Column widths come from the first
+    PDF_WIDTH_SAMPLE_ROWS rows. With `thumbnails`, each row gets its thumbnail image from
+    `thumbnail_loader(url)` (downloaded by default).
+    """
+    pages = iter(pages)
+    sample = []
+    sampled_rows = 0
+    for chunk in pages:
+        sample.append(chunk)
+        sampled_rows += len(chunk)
+        if sampled_rows >= PDF_WIDTH_SAMPLE_ROWS:
+            break
+    if not sample:
+        sample = [pd.DataFrame(columns=PDF_EXPORT_COLUMNS)]
+    columns = [column for column in PDF_COLUMNS if column in sample[0].columns]
+    widths = pdf_column_widths(pd.concat([chunk[columns] for chunk in sample]), columns)
+    thumbnails = thumbnails and 'Thumbnail' in sample[0].columns
+    labels = list(columns)
+    session = None
+    if thumbnails:
+        if thumbnail_loader is None:
+            session = requests.Session()
+            thumbnail_loader = lambda url: fetch_thumbnail(url, session)
+        widths = [PDF_THUMBNAIL_SHARE] + [width * (1 - PDF_THUMBNAIL_SHARE) for width in widths]
+        labels = [""] + labels
+
+    font = pdf_font_family(log_fn)
+    rc = {'font.family': font, 'axes.unicode_minus': False} if font else {}
+    def all_pages():
+        # 미리 읽은 페이지는 그리는 즉시 목록에서 빼서 메모리에서 놓아 줍니다.
+        while sample:
+            yield sample.pop(0)
+        yield from pages
+
+    page_count = max(1, math.ceil(total_rows / rows_per_page))
+    # 마지막 페이지도 행 높이가 같도록 표 높이를 페이지당 행 수 기준으로 잡습니다.
+    row_height = 1 / (rows_per_page + 1)
+    try:
+        with matplotlib.rc_context(rc), PdfPages(out) as pdf:
+            for page, chunk in enumerate(all_pages()):
+                cells = [[_cell_text(value) for value in row] for row in chunk[columns].itertuples(index=False)]
+                if thumbnails:
+                    cells = [[""] + row for row in cells]
+                cells = cells or [[""] * len(labels)]
+
+                fig = Figure(figsize=PDF_PAGE_SIZE)
+                heading = f"{title} · " if title else ""
+                fig.text(0.03, 0.96, f"{heading}{page + 1}/{page_count} 페이지 · 전체 {total_rows}개 항목", fontsize=9)
+                ax = fig.add_axes([0.03, 0.04, 0.94, 0.9])
+                ax.axis('off')
+                table_height = (len(cells) + 1) * row_height
+                table = ax.table(cellText=cells, colLabels=labels, colWidths=widths, cellLoc='left',
+                                 bbox=[0, 1 - table_height, 1, table_height])
+                table.auto_set_font_size(False)
+                table.set_fontsize(PDF_FONT_SIZE)
+
+                if thumbnails:
+                    for i, url in enumerate(chunk['Thumbnail']):
+                        image = thumbnail_loader(url)
+                        if image is None:
+                            continue
+                        cell_ax = ax.inset_axes([0, 1 - (i + 2) * row_height, widths[0], row_height])
+                        cell_ax.imshow(image)
+                        cell_ax.axis('off')
+
+                pdf.savefig(fig)
+    finally:
+        if session is not None:
+            session.close()
+    return page_count
+
+# --- Tabular Exports ---
+def available_formats():
+    """Export formats whose optional libraries are installed."""
+    missing = {'parquet': pq is None, 'xlsx': Workbook is None}
+    return [fmt for fmt in EXPORT_FORMATS if not missing.get(fmt)]
+
+def iter_record_chunks(table, positions, columns, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields the rows at `positions` of a ResultTable as records, `chunk_rows` at a time."""
+    for start in range(0, len(positions), chunk_rows):
+        yield table.expand(positions[start:start + chunk_rows])[columns]
+
+def write_csv(chunks, columns, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        pd.DataFrame(columns=columns).to_csv(f, index=False)
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=False)
+
+def write_excel(chunks, columns, path):
+    # write_only 통합 문서는 행을 바로 파일 버퍼로 내보내므로 전체 시트를 메모리에 만들지 않습니다.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("results")
+    sheet.append(columns)
+    for chunk in chunks:
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(path)
+
+def parquet_schema(columns):
+    """Arrow schema of result records; fixed up front so that empty and non-empty exports have the same types."""
+    return pa.schema([(column, pa.int64() if column in RECORD_NUMERIC_COLUMNS else pa.string()) for column in columns])
+
+def write_parquet(chunks, columns, path):
+    schema = parquet_schema(columns)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk[columns], schema=schema, preserve_index=False))
+
+class ResultExporter:
+    """Builds export files of ResultTable rows on request and keeps the latest file of each export.
+
+    An export is identified by a name (e.g. "cart") and format. Its file is reused while the row set (by
+    identity), the table version and the options are unchanged. Files live in a private temporary directory
+    that is removed with the exporter. PDF thumbnails are loaded with `thumbnail_loader` when given.
+    """
+
+    def __init__(self, table, log_fn=console_log, thumbnail_loader=None):
+        self.table = table
+        self.log_fn = log_fn
+        self.thumbnail_loader = thumbnail_loader
+        self.directory = tempfile.mkdtemp(prefix="playboard_export_")
+        self._files = {}
+        weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    def cached(self, name, positions, fmt, **options):
+        """Returns the path of an up-to-date file for this export, or None."""
+        entry = self._files.get((name, fmt))
+        if entry is None or entry['positions'] is not positions or entry['version'] != self.table.version or entry['options'] != options:
+            return None
+        return entry['path'] if os.path.exists(entry['path']) else None
+
+    def export(self, name, positions, fmt, **options):
+        """Builds (or reuses) the file for exporting the rows at `positions`; PDF options go to write_pdf()."""
+        path = self.cached(name, positions, fmt, **options)
+        if path:
+            return path
+        if fmt not in available_formats():
+            raise ValueError(f"지원하지 않는 파일 형식입니다: {fmt}")
+
+        path = os.path.join(self.directory, uuid.uuid4().hex + EXPORT_FORMATS[fmt]['extension'])
+        version = self.table.version
+        try:
+            if fmt == 'pdf':
+                write_pdf(iter_record_chunks(self.table, positions, PDF_EXPORT_COLUMNS, PDF_ROWS_PER_PAGE), len(positions), path,
+                          thumbnail_loader=self.thumbnail_loader, log_fn=self.log_fn, **options)
+            elif fmt == 'parquet':
+                write_parquet(iter_record_chunks(self.table, positions, RECORD_COLUMNS), RECORD_COLUMNS, path)
+            elif fmt == 'xlsx':
+                write_excel(iter_record_chunks(self.table, positions, TABLE_EXPORT_COLUMNS), TABLE_EXPORT_COLUMNS, path)
+            else:
+                write_csv(iter_record_chunks(self.table, positions, TABLE_EXPORT_COLUMNS), TABLE_EXPORT_COLUMNS, path)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+        previous = self._files.get((name, fmt))
+        if previous is not None and os.path.exists(previous['path']):
+            os.remove(previous['path'])
+        self._files[(name, fmt)] = {'positions': positions, 'version': version, 'options': options, 'path': path}
+        return path
@@ -0,0 +1,269 @@
+"""Compact result model for a Streamlit session.
+
+Every result row of a session is stored once in a ResultTable with a typed schema: categorical
+channel/date/subscriber text, int64 and nullable Int64 counts, and the video id instead of the YouTube
+and thumbnail URLs, which are rebuilt on demand. Rows are keyed by video and chart date. The scraped
+results, the YouTube cart and custom groups keep only arrays of row positions into that table, and rows
+none of them refers to any more are dropped with `ResultTable.retain()`.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from playboard_core import RECORD_COLUMNS
+
+YOUTUBE_WATCH_URL = "https://www.youtube.com/watch?v="
+VIDEO_ID_PLACEHOLDER = "{video_id}"
+
+COMPACT_DTYPES = {
+    'Hash': 'string',
+    'Title': 'string',
+    'Views': 'string',
+    'Views_numeric': 'int64',
+    'Channel': 'category',
+    'Date': 'category',
+    'Subscribers': 'category',
+    'Subscribers_numeric': 'Int64',
+    'video_id': 'string',
+    # 썸네일 주소에서 동영상 ID 부분을 자리표시자로 바꾼 형태라 대부분의 행이 몇 개의 값을 공유합니다.
+    'thumbnail_template': 'category',
+}
+
+def empty_positions():
+    return np.empty(0, dtype=np.int64)
+
+def compact_records(records):
+    """Converts result records (RECORD_COLUMNS) into the compact schema, one row per Hash and Date."""
+    df = pd.DataFrame(records).drop_duplicates(subset=['Hash', 'Date'])
+    url = df['YouTube URL'].fillna("").astype(str)
+    video_id = url.str.slice(len(YOUTUBE_WATCH_URL)).where(url.str.startswith(YOUTUBE_WATCH_URL) & (url != YOUTUBE_WATCH_URL))
+    thumbnail = df['Thumbnail'].fillna("").astype(str)
+    template = [
+        t.replace(v, VIDEO_ID_PLACEHOLDER) if isinstance(v, str) and v in t else t
+        for t, v in zip(thumbnail, video_id)
+    ]
+    subscribers_numeric = df['Subscribers_numeric'].astype('Int64')
+    compact = pd.DataFrame({
+        'Hash': df['Hash'],
+        'Title': df['Title'],
+        'Views': df['Views'],
+        'Views_numeric': df['Views_numeric'],
+        'Channel': df['Channel'],
+        'Date': df['Date'],
+        'Subscribers': df['Subscribers'],
+        # 구독자 수를 알 수 없는 채널(-1)은 결측값으로 둡니다.
+        'Subscribers_numeric': subscribers_numeric.mask(subscribers_numeric == -1),
+        'video_id': video_id,
+        'thumbnail_template': template,
+    })
+    return compact.astype(COMPACT_DTYPES).reset_index(drop=True)
+
+def expand_records(compact):
+    """Rebuilds result records with the original columns (and plain string values) from compact rows."""
+    video_id = compact['video_id']
+    has_id = video_id.notna().to_numpy()
+    ids = video_id.fillna("").astype(str)
+    thumbnails = [
+        t.replace(VIDEO_ID_PLACEHOLDER, v) if ok else t
+        for t, v, ok in zip(compact['thumbnail_template'].astype(str), ids, has_id)
+    ]
+    expanded = pd.DataFrame({
+        'Thumbnail': thumbnails,
+        'Title': compact['Title'].astype(object),
+        'Views': compact['Views'].astype(object),
+        'Views_numeric': compact['Views_numeric'],
+        'Channel': compact['Channel'].astype(object),
+        'Date': compact['Date'].astype(object),
+        'Subscribers': compact['Subscribers'].astype(object),
+        'Subscribers_numeric': compact['Subscribers_numeric'].fillna(-1).astype('int64'),
+        'Hash': compact['Hash'].astype(object),
+        'YouTube URL': np.where(has_id, YOUTUBE_WATCH_URL + ids, ""),
+    }, index=compact.index)
+    return expanded[RECORD_COLUMNS]
+
+def _concat_compact(left, right):
+    if left.empty:
+        return right
+    columns = {}
+    for name, dtype in COMPACT_DTYPES.items():
+        if dtype == 'category':
+            columns[name] = pd.Series(union_categoricals([left[name], right[name]], ignore_order=True))
+        else:
+            columns[name] = pd.concat([left[name], right[name]], ignore_index=True)
+    return pd.DataFrame(columns)
+
+def _row_keys(hashes, dates):
+    return pd.MultiIndex.from_arrays([pd.Index(hashes, dtype=object), pd.Index(dates, dtype=object)])
+
+def _changed_rows(old, new):
+    # 결측값끼리도 같은 값으로 보도록 문자열로 바꿔서 비교합니다.
+    changed = np.zeros(len(new), dtype=bool)
+    for name in COMPACT_DTYPES:
+        changed |= old[name].astype(str).to_numpy() != new[name].astype(str).to_numpy()
+    return changed
+
+def merge_positions(existing, new):
+    """Appends the positions in `new` that are not in `existing`, keeping the order of both."""
+    new = pd.unique(np.asarray(new, dtype=np.int64))
+    return np.concatenate([existing, new[~np.isin(new, existing)]])
+
+class ResultTable:
+    """Table of all result rows of a session, addressed by row position and keyed by (Hash, Date).
+
+    `version` changes whenever rows are added, updated or dropped, so derived views can be cached per version.
+    """
+
+    def __init__(self):
+        self.frame = compact_records(pd.DataFrame(columns=RECORD_COLUMNS))
+        self.version = 0
+        self._key_index = _row_keys([], [])
+        self._ranks = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _reindex(self):
+        self._key_index = _row_keys(self.frame['Hash'], self.frame['Date'])
+        self.version += 1
+
+    def add(self, records):
+        """Stores the given rows and returns their positions, in order.
+
+        A video on a chart date not seen before gets a new row. A row crawled again for the same date is
+        refreshed in place, so positions held by the cart and groups stay valid and show the latest values.
+        """
+        if len(records) == 0:
+            return empty_positions()
+        compact = compact_records(records)
+        positions = self._key_index.get_indexer(_row_keys(compact['Hash'], compact['Date']))
+        is_new = positions == -1
+        changed = False
+        if not is_new.all():
+            known = compact[~is_new].reset_index(drop=True)
+            rows = positions[~is_new]
+            stale = _changed_rows(self.frame.iloc[rows].reset_index(drop=True), known)
+            if stale.any():
+                self._update(rows[stale], known[stale])
+                changed = True
+        if is_new.any():
+            new_rows = compact[is_new].reset_index(drop=True)
+            positions[is_new] = np.arange(len(self.frame), len(self.frame) + len(new_rows))
+            self.frame = _concat_compact(self.frame, new_rows)
+            changed = True
+        if changed:
+            self._reindex()
+        return positions.astype(np.int64)
+
+    def _update(self, rows, compact):
+        frame = self.frame.copy()
+        for name, dtype in COMPACT_DTYPES.items():
+            values = compact[name]
+            if dtype == 'category':
+                missing = values.cat.categories.difference(frame[name].cat.categories)
+                if len(missing):
+                    frame[name] = frame[name].cat.add_categories(missing)
+                values = values.to_numpy(dtype=object)
+            else:
+                values = values.array
+            frame.iloc[rows, frame.columns.get_loc(name)] = values
+        self.frame = frame
+
+    def retain(self, position_sets):
+        """Drops the rows no array in `position_sets` refers to; returns the arrays remapped to the new positions."""
+        position_sets = [np.asarray(positions, dtype=np.int64) for positions in position_sets]
+        keep = np.unique(np.concatenate([empty_positions()] + position_sets))
+        if len(keep) == len(self.frame):
+            return position_sets
+        remap = np.full(len(self.frame), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        frame = self.frame.iloc[keep].reset_index(drop=True)
+        for name, dtype in COMPACT_DTYPES.items():
+            if dtype == 'category':
+                frame[name] = frame[name].cat.remove_unused_categories()
+        self.frame = frame
+        self._reindex()
+        return [remap[positions] for positions in position_sets]
+
+    def positions_of(self, hashes, dates):
+        """Returns the positions of the known (hash, date) pairs, ignoring unknown ones."""
+        positions = self._key_index.get_indexer(_row_keys(hashes, dates))
+        return positions[positions >= 0].astype(np.int64)
+
+    def _sort_order(self, sort_key):
+        # 'channel'은 채널 이름순, 같은 채널 안에서는 조회수 높은 순입니다.
+        views = self.frame['Views_numeric'].to_numpy()
+        if sort_key == 'views_desc':
+            return np.argsort(-views, kind='stable')
+        if sort_key == 'views_asc':
+            return np.argsort(views, kind='stable')
+        # 구독자 수를 알 수 없는 행(-1)은 예전처럼 가장 작은 값으로 정렬합니다.
+        subscribers = self.frame['Subscribers_numeric'].fillna(-1).to_numpy(dtype=np.int64)
+        if sort_key == 'subscribers_desc':
+            return np.argsort(-subscribers, kind='stable')
+        if sort_key == 'subscribers_asc':
+            return np.argsort(subscribers, kind='stable')
+        if sort_key == 'channel':
+            channel = self.frame['Channel'].cat
+            # 카테고리는 등장 순서로 쌓이므로 이름순 순위로 바꿔서 코드에 매핑합니다.
+            category_rank = np.argsort(np.argsort(np.asarray(channel.categories, dtype=object), kind='stable'))
+            codes = channel.codes.to_numpy()
+            channel_rank = np.where(codes >= 0, category_rank[codes], len(category_rank))
+            return np.lexsort((-views, channel_rank))
+        raise ValueError(f"Unknown sort key: {sort_key}")
+
+    def rank(self, sort_key):
+        """Returns every row's rank under `sort_key`; computed once per table version."""
+        version, rank = self._ranks.get(sort_key, (None, None))
+        if version != self.version:
+            order = self._sort_order(sort_key)
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self._ranks[sort_key] = (self.version, rank)
+        return rank
+
+    def sorted_positions(self, positions, sort_key=None):
+        """Orders `positions` by `sort_key` (None keeps them as they are)."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if sort_key is None:
+            return positions
+        return positions[np.argsort(self.rank(sort_key)[positions], kind='stable')]
+
+    def take(self, positions):
+        return self.frame.iloc[np.asarray(positions, dtype=np.int64)]
+
+    def expand(self, positions):
+        """Returns the rows at `positions` as ordinary result records."""
+        return expand_records(self.take(positions))
+
+class ResultView:
+    """Memoized, paginated view of a set of rows in a ResultTable.
+
+    The sorted order is recomputed only when the row set (by identity), the table version or the sort key
+    changes, and only the requested page is expanded into records.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._positions = None
+        self._key = None
+        self._order = empty_positions()
+        self._page_key = None
+        self._page = None
+
+    def order(self, positions, sort_key=None):
+        key = (self.table.version, sort_key)
+        if positions is not self._positions or key != self._key:
+            self._order = self.table.sorted_positions(positions, sort_key)
+            self._positions = positions
+            self._key = key
+            self._page_key = None
+        return self._order
+
+    def page(self, positions, sort_key, page, page_size):
+        """Returns the records on zero-based `page` of the sorted rows."""
+        order = self.order(positions, sort_key)
+        page_key = (page, page_size)
+        if page_key != self._page_key:
+            self._page = self.table.expand(order[page * page_size:(page + 1) * page_size])
+            self._page_key = page_key
+        return self._page
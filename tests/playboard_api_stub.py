@@ -0,0 +1,57 @@
+"""Local stand-in for Playboard's chart API that replays JSON fixtures.
+
+A request for `<base>/.../<name>?cursor=<c>` is answered with `fixtures/playboard_api/<name>.<c>.json`
+(or `<name>.json` without a cursor); anything else gets a 404. Every request is recorded with its query
+parameters and headers so tests can check what the fetcher sent.
+"""
+import os
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "playboard_api")
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append({'path': url.path, 'params': params, 'headers': dict(self.headers)})
+        name = url.path.rstrip('/').rsplit('/', 1)[-1]
+        if params.get('cursor'):
+            name = f"{name}.{params['cursor']}"
+        path = os.path.join(self.server.fixture_dir, f"{name}.json")
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class PlayboardApiStub:
+    """Serves the fixtures on a free local port for the length of a `with` block; `base_url` is the API root."""
+
+    def __init__(self, fixture_dir=FIXTURE_DIR):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.fixture_dir = fixture_dir
+        self.server.requests = []
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
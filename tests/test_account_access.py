@@ -0,0 +1,54 @@
+"""Saved sessions and crawl jobs must only be reachable with the account's password, not just its email."""
+import time
+
+import pytest
+
+import playboard_core
+from playboard_core import account_owner, authenticate_driver, load_session_snapshot, save_session_snapshot
+
+EMAIL = "victim@example.com"
+PASSWORD = "correct horse"
+
+class FakeDriver:
+    def __init__(self):
+        self.cookies = []
+
+    def execute_script(self, script, *args):
+        return '{"token": "xyz"}'
+
+    def get_cookies(self):
+        return [{'name': "session", 'value': "abc", 'domain': ".playboard.co", 'path': "/", 'expiry': time.time() + 3600}]
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(playboard_core, "SESSION_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(playboard_core, "PASSWORD_HASH_ITERATIONS", 1000)
+
+def test_snapshot_needs_the_password_it_was_saved_with():
+    save_session_snapshot(FakeDriver(), EMAIL, PASSWORD)
+    assert load_session_snapshot(" Victim@Example.com ", PASSWORD) is not None
+    assert load_session_snapshot(EMAIL, "wrong password") is None
+    assert load_session_snapshot(EMAIL, "") is None
+
+def test_wrong_password_falls_through_to_the_login_form(monkeypatch):
+    save_session_snapshot(FakeDriver(), EMAIL, PASSWORD)
+    restored = []
+    monkeypatch.setattr(playboard_core, "restore_session_snapshot", lambda driver, snapshot: restored.append(snapshot) or True)
+
+    def login_driver(driver, email, password):
+        raise RuntimeError("login failed")
+
+    monkeypatch.setattr(playboard_core, "login_driver", login_driver)
+    with pytest.raises(RuntimeError):
+        authenticate_driver(FakeDriver(), EMAIL, "wrong password", log_fn=lambda message: None)
+    assert restored == []
+    # 틀린 비밀번호로 시도해도 원래 사용자의 스냅샷은 지우지 않습니다.
+    assert load_session_snapshot(EMAIL, PASSWORD) is not None
+
+    assert authenticate_driver(FakeDriver(), EMAIL, PASSWORD, log_fn=lambda message: None) == "snapshot"
+    assert len(restored) == 1
+
+def test_account_owner_depends_on_the_password():
+    assert account_owner(EMAIL, PASSWORD) == account_owner(" VICTIM@example.com", PASSWORD)
+    assert account_owner(EMAIL, PASSWORD) != account_owner(EMAIL, "wrong password")
+    assert account_owner(EMAIL, PASSWORD) != account_owner("other@example.com", PASSWORD)
@@ -0,0 +1,96 @@
+"""Batch record processing must give the same records and filter decisions as the per-row reference functions."""
+import random
+
+import numpy as np
+import pytest
+
+from playboard_core import (
+    SUBSCRIBER_FILTER_RANGES, build_record, build_records_frame, should_include_subscriber, subscriber_filter_mask,
+)
+
+DATE = "20240101"
+VIDEO_IDS = ["dQw4w9WgXcQ", "abcdefgh", "abcdefghijklmno", "short", "abcdefghijklmnop", "a-b_c1234XY"]
+TITLES = ["Synthetic video", "  공백이 있는 제목  ", "Emoji 🎉 & punctuation!?", "", None, "UPPER lower", "ナルト"]
+CHANNELS = ["Channel A", " 채널 ", "", None, "channel a"]
+VIEWS = ["1.2K", "3M", "1.5B", "1,234", "12", "-7", " 4.5k ", "N/A", "", None, "K", "1MB", "abc", "0.3M"]
+SUBSCRIBERS = ["1,234", "12", "구독자 정보 없음", "", None, "12만", " 5,000 ", "-1"]
+
+def _href(rng):
+    video_id = rng.choice(VIDEO_IDS)
+    return rng.choice([f"/video/{video_id}", f"/video/{video_id}?period=1", f"/video/{video_id}&a=b",
+                       "/channel/UC123", "", None, f"/video/{video_id}/video/x"])
+
+def _thumbnail(rng):
+    video_id = rng.choice(VIDEO_IDS)
+    return rng.choice([f"//i.ytimg.com/vi/{video_id}/hqdefault.jpg", f"//i.ytimg.com/vi/{video_id}_live/mq.jpg",
+                       f"https://i.ytimg.com/vi/{video_id}/hq.jpg", "//example.com/x.jpg", "", None])
+
+def random_row(rng):
+    return {
+        'title': rng.choice(TITLES),
+        'href': _href(rng),
+        'views': rng.choice(VIEWS),
+        'channel': rng.choice(CHANNELS),
+        'subscribers': rng.choice(SUBSCRIBERS),
+        'thumbnail': _thumbnail(rng),
+    }
+
+def reference_records(raw_rows):
+    """Per-row records keyed by row position; rows build_record() fails on are left out."""
+    records = {}
+    for i, raw in enumerate(raw_rows):
+        try:
+            records[i] = build_record(raw, DATE)
+        except (ValueError, TypeError):
+            continue
+    return records
+
+def assert_same_records(raw_rows):
+    frame = build_records_frame(raw_rows, DATE)
+    expected = reference_records(raw_rows)
+    assert list(frame.index) == list(expected)
+    for i, record in expected.items():
+        assert frame.loc[i].to_dict() == record, raw_rows[i]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_batches_match_build_record(seed):
+    rng = random.Random(seed)
+    assert_same_records([random_row(rng) for _ in range(rng.randint(1, 200))])
+
+@pytest.mark.parametrize("overrides", [
+    {'thumbnail': None},
+    {'thumbnail': ""},
+    {'href': None},
+    {'href': ""},
+    {'href': None, 'thumbnail': None},
+    {'href': "/channel/UC123", 'thumbnail': "//example.com/x.jpg"},
+    {'views': None, 'subscribers': None, 'channel': None, 'title': None},
+], ids=["no-thumbnails", "empty-thumbnails", "no-hrefs", "empty-hrefs", "no-ids", "no-matching-ids", "all-missing"])
+@pytest.mark.parametrize("size", [1, 25])
+def test_batches_without_ids_match_build_record(overrides, size):
+    rng = random.Random(size)
+    assert_same_records([dict(random_row(rng), **overrides) for _ in range(size)])
+
+def test_empty_batch():
+    frame = build_records_frame([], DATE)
+    assert frame.empty
+    assert list(frame.columns) == list(build_record(random_row(random.Random(0)), DATE))
+
+def random_filter_settings(rng):
+    return {
+        'is_filter_applied': rng.random() < 0.85,
+        'selected_filters': {name: rng.random() < 0.15 for name in SUBSCRIBER_FILTER_RANGES},
+        'use_custom_filter': rng.random() < 0.5,
+        'custom_min': rng.choice([-1, 0, 5, 1000, 5000, 2000000]),
+        'custom_max': rng.choice([-1, 0, 5, 1000, 1500000, 3000000]),
+    }
+
+@pytest.mark.parametrize("seed", range(50))
+def test_subscriber_filter_mask_matches_should_include_subscriber(seed):
+    rng = random.Random(seed)
+    boundaries = [start for start, _ in SUBSCRIBER_FILTER_RANGES.values()]
+    values = [-1, 0, 1, 999, 10000000, 99999999] + [b + d for b in boundaries for d in (-1, 0, 1)]
+    values += [rng.randint(-1, 20000000) for _ in range(200)]
+    filter_settings = random_filter_settings(rng)
+    expected = [should_include_subscriber(value, filter_settings) for value in values]
+    assert list(subscriber_filter_mask(np.array(values), filter_settings)) == expected
@@ -0,0 +1,115 @@
+"""Captcha handling against benchmark.py's fake solver on a stand-in for its local reCAPTCHA page."""
+import threading
+import time
+
+import pytest
+
+import playboard_core
+from benchmark import FakeCaptchaSolver
+from playboard_core import CaptchaService, CrawlMetrics, captcha_service_for, detect_and_handle_captcha
+
+SITE_KEY = "synthetic-site-key"
+
+class FakeElement:
+    def __init__(self, attributes):
+        self.attributes = attributes
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+class FakeCaptchaPage:
+    """Behaves like benchmark.py's synthetic chart once its captcha shows: rows stop loading until the callback gets a token."""
+
+    def __init__(self, captcha=True, rows=20):
+        self.captcha = captcha
+        self.rows = rows
+        self.token = None
+        self.current_url = "http://127.0.0.1/chart/short/most-viewed-all-videos-in-south-korea-daily?period=1704067200"
+
+    def find_elements(self, by, value):
+        if value == "iframe[title='reCAPTCHA']":
+            return ["iframe"] if self.captcha else []
+        if value == "a.title__label":
+            return ["row"] * self.rows
+        return []
+
+    def find_element(self, by, value):
+        return FakeElement({'data-sitekey': SITE_KEY, 'data-callback': "onCaptchaSolved"})
+
+    def execute_script(self, script, *args):
+        if "g-recaptcha-response" in script:
+            self.token = args[0]
+        elif script.startswith("onCaptchaSolved(") and args[0] == self.token:
+            self.captcha = False
+            self.rows += 20
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(playboard_core, "CAPTCHA_POLL_INTERVAL", 0.02)
+
+def handle(page, solver, **kwargs):
+    messages = []
+    solved = detect_and_handle_captcha(page, service=CaptchaService(solver=solver), log_fn=messages.append, **kwargs)
+    return solved, messages
+
+def test_solves_and_applies_token():
+    page = FakeCaptchaPage()
+    metrics = CrawlMetrics()
+    service = CaptchaService(solver=FakeCaptchaSolver(delay=0.05))
+    assert detect_and_handle_captcha(page, service=service, log_fn=lambda message: None, metrics=metrics)
+    assert page.token == f"synthetic-token-{SITE_KEY}"
+    assert not page.captcha and page.rows == 40
+    assert service.stats()['solved'] == 1
+    assert [phase['phase'] for phase in metrics.report()['summary']] == ['captcha_solve']
+
+def test_no_captcha_needs_no_solver():
+    solved, _ = handle(FakeCaptchaPage(captcha=False), solver=None)
+    assert solved
+
+def test_captcha_without_solver_fails():
+    solved, messages = handle(FakeCaptchaPage(), solver=None)
+    assert not solved
+    assert any("API 키가 없습니다" in message for message in messages)
+
+def test_solver_failure():
+    page = FakeCaptchaPage()
+    service = CaptchaService(solver=FakeCaptchaSolver(delay=0, fail=True))
+    assert not detect_and_handle_captcha(page, service=service, log_fn=lambda message: None)
+    assert page.captcha and page.token is None
+    assert service.stats()['failed'] == 1
+
+def test_slow_solve_times_out():
+    page = FakeCaptchaPage()
+    started = time.monotonic()
+    solved, messages = handle(page, FakeCaptchaSolver(delay=1.0), timeout=0.1)
+    assert not solved
+    assert time.monotonic() - started < 0.8
+    assert page.token is None
+    assert any("0.1초 안에" in message for message in messages)
+
+def test_stop_event_cancels_the_wait():
+    stop_event = threading.Event()
+    threading.Timer(0.1, stop_event.set).start()
+    started = time.monotonic()
+    solved, messages = handle(FakeCaptchaPage(), FakeCaptchaSolver(delay=1.0), stop_event=stop_event)
+    assert not solved
+    assert time.monotonic() - started < 0.8
+    assert any("중단" in message for message in messages)
+
+def test_harvests_while_waiting():
+    page = FakeCaptchaPage()
+    calls = []
+    solved, _ = handle(page, FakeCaptchaSolver(delay=0.2), while_waiting=lambda: calls.append(page.captcha))
+    assert solved
+    # 풀이를 기다리는 동안(캡챠가 떠 있는 동안) 여러 번 호출됩니다.
+    assert len(calls) >= 3 and all(calls)
+
+def test_services_share_one_bounded_executor(monkeypatch):
+    monkeypatch.setattr(playboard_core, "TwoCaptcha", lambda apiKey: FakeCaptchaSolver(delay=0))
+    monkeypatch.setattr(playboard_core, "_captcha_services", type(playboard_core._captcha_services)())
+    services = [captcha_service_for(f"key-{i}") for i in range(playboard_core.CAPTCHA_SERVICE_CACHE_SIZE + 5)]
+    assert len(playboard_core._captcha_services) == playboard_core.CAPTCHA_SERVICE_CACHE_SIZE
+    assert len({id(service._executor) for service in services}) == 1
+    assert services[0]._executor._max_workers == playboard_core.CAPTCHA_SOLVER_WORKERS
+    # 최근에 쓴 키는 같은 서비스를 돌려받습니다.
+    assert captcha_service_for(f"key-{len(services) - 1}") is services[-1]
@@ -0,0 +1,65 @@
+"""A browser crawl may only record the requested chart depth when it actually scrolled that far."""
+import queue
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import playboard_core
+from playboard_core import ChartStore, crawl_date
+
+NO_FILTER = {'is_filter_applied': False, 'selected_filters': {}, 'use_custom_filter': False, 'custom_min': -1, 'custom_max': -1}
+
+class FakeWait:
+    def __init__(self, driver, timeout, **kwargs):
+        self.driver = driver
+
+    def until(self, condition):
+        return True
+
+class FakeChartPage:
+    """A chart page that loads 20 more rows per scroll until `available` rows are shown."""
+
+    def __init__(self, available):
+        self.available = available
+        self.shown = 20
+
+    def get(self, url):
+        self.shown = 20
+
+    def scroll(self, driver, prev_count, timeout):
+        self.shown = min(self.available, self.shown + 20)
+        return self.shown, 0.0
+
+    def rows(self, driver, log_q, extraction_mode):
+        return [{'title': f"Video {rank}", 'href': f"/video/abc{rank:08d}", 'views': "1,000", 'channel': "Channel",
+                 'subscribers': "1,000", 'thumbnail': None} for rank in range(1, self.shown + 1)]
+
+@pytest.fixture
+def page(monkeypatch):
+    def make(available):
+        chart = FakeChartPage(available)
+        monkeypatch.setattr(playboard_core, "WebDriverWait", FakeWait)
+        monkeypatch.setattr(playboard_core, "EC", SimpleNamespace(presence_of_all_elements_located=lambda locator: None))
+        monkeypatch.setattr(playboard_core, "count_rows", lambda driver: chart.shown)
+        monkeypatch.setattr(playboard_core, "scroll_and_wait", chart.scroll)
+        monkeypatch.setattr(playboard_core, "extract_rows", chart.rows)
+        # 캡챠 iframe이 없으면 해결된 것으로 보고 스크롤을 계속합니다.
+        monkeypatch.setattr(playboard_core, "detect_and_handle_captcha", lambda *args, **kwargs: True)
+        return chart
+    return make
+
+def stored_depth(chart_store):
+    with sqlite3.connect(chart_store.path) as conn:
+        return conn.execute("SELECT depth FROM charts").fetchone()[0]
+
+@pytest.mark.parametrize("available, max_items, depth", [(200, 100, 100), (60, 100, 60)], ids=["target-reached", "site-stopped-loading"])
+def test_scroll_crawl_records_only_the_depth_it_saw(page, tmp_path, available, max_items, depth):
+    chart = page(available)
+    chart_store = ChartStore(str(tmp_path / "charts.sqlite3"))
+    crawl_date(chart, True, "20240101", "south-korea", max_items, threading.Event(), queue.Queue(), NO_FILTER, set(),
+               chart_store=chart_store)
+    assert stored_depth(chart_store) == depth
+    # 짧게 끝난 크롤링은 저장소에서 요청한 깊이의 차트로 쓰이지 않습니다.
+    assert (chart_store.load(True, "south-korea", "2024-01-01", max_items) is None) == (depth < max_items)
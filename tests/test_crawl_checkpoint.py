@@ -0,0 +1,58 @@
+"""Checkpoints keep collected rows only in the row log and old jobs are pruned from disk."""
+import json
+import os
+import time
+
+import pytest
+
+import playboard_core
+from playboard_core import CrawlCheckpoint
+
+SETTINGS = {'dates': ["20240101", "20240102"]}
+
+@pytest.fixture(autouse=True)
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(playboard_core, "CRAWL_JOB_DIR", str(tmp_path))
+    return tmp_path
+
+def rows(start, count):
+    return [{'Hash': f"hash-{i}", 'Title': f"Video {i}"} for i in range(start, start + count)]
+
+def test_record_batch_keeps_hashes_out_of_the_state(job_dir):
+    checkpoint = CrawlCheckpoint.create("owner", True, SETTINGS, {})
+    checkpoint.record_batch("20240101", rows(0, 50), 50)
+    checkpoint.record_batch("20240101", rows(50, 50), 100)
+    with open(job_dir / f"{checkpoint.job_id}.json", encoding='utf-8') as f:
+        state = json.load(f)
+    assert 'hashes' not in state
+    assert state['last_rank'] == {"20240101": 100}
+    loaded = CrawlCheckpoint.load(checkpoint.job_id)
+    assert loaded.collected_hashes() == {f"hash-{i}" for i in range(100)}
+    assert loaded.start_rank("20240101") == 100
+
+def test_load_drops_the_hash_list_of_old_checkpoints(job_dir):
+    checkpoint = CrawlCheckpoint.create("owner", True, SETTINGS, {})
+    checkpoint.record_batch("20240101", rows(0, 3), 3)
+    checkpoint.state['hashes'] = ["hash-0", "hash-1", "hash-2"]
+    checkpoint.save()
+    loaded = CrawlCheckpoint.load(checkpoint.job_id)
+    assert 'hashes' not in loaded.state
+    assert loaded.collected_hashes() == {"hash-0", "hash-1", "hash-2"}
+
+def test_prune_removes_only_stale_jobs(job_dir):
+    old, kept, recent = (CrawlCheckpoint.create("owner", True, SETTINGS, {}) for _ in range(3))
+    for checkpoint in (old, kept, recent):
+        checkpoint.record_batch("20240101", rows(0, 1), 1)
+    long_ago = time.time() - 3600
+    for checkpoint in (old, kept):
+        for suffix in (".json", ".rows.jsonl"):
+            os.utime(job_dir / f"{checkpoint.job_id}{suffix}", (long_ago, long_ago))
+    # 상태 파일 없이 남은 임시 파일도 같은 기준으로 지웁니다.
+    leftover = job_dir / "abc123.json.1.tmp"
+    leftover.write_text("{}")
+    os.utime(leftover, (long_ago, long_ago))
+
+    assert CrawlCheckpoint.prune(max_age=60, keep=[kept.job_id]) == 2
+    assert sorted(os.listdir(job_dir)) == sorted(f"{checkpoint.job_id}{suffix}" for checkpoint in (kept, recent)
+                                                 for suffix in (".json", ".rows.jsonl"))
+    assert {state['job_id'] for state in CrawlCheckpoint.list_jobs()} == {kept.job_id, recent.job_id}
@@ -0,0 +1,68 @@
+"""crawl_cli.main() end to end with the HTTP engine against the local API stub instead of a browser."""
+import csv
+import json
+
+import pytest
+
+import crawl_cli
+import playboard_core
+from playboard_api_stub import PlayboardApiStub
+from playboard_core import PlayboardHttpFetcher
+
+class FakeDriver:
+    """Logged-in browser stand-in; the HTTP engine only needs it for cookies, which the patched fetcher skips."""
+
+    def execute(self, command, params=None):
+        return {}
+
+    def quit(self):
+        pass
+
+@pytest.fixture
+def cli(tmp_path, monkeypatch, capsys):
+    stub = PlayboardApiStub().__enter__()
+    monkeypatch.setattr(playboard_core, "CRAWL_JOB_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(crawl_cli, "create_driver", lambda headless=True, profile=None: FakeDriver())
+    monkeypatch.setattr(crawl_cli, "authenticate_driver", lambda driver, email, password, log_fn=None: None)
+    monkeypatch.setattr(PlayboardHttpFetcher, "from_driver",
+                        classmethod(lambda cls, driver, **kwargs: cls(user_agent="pytest", base_url=stub.base_url, **kwargs)))
+
+    def run(*extra):
+        argv = ["--dates", "20240101", "--max-items", "5", "--fetch-engine", "http", "--no-store", "--progress", "json",
+                "--email", "user@example.com", "--password", "secret", "--output", str(tmp_path / "out.csv"), *extra]
+        exit_code = crawl_cli.main(argv)
+        events = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+        return exit_code, events
+
+    yield run
+    stub.__exit__(None, None, None)
+
+def test_crawl_writes_output_and_json_progress(cli, tmp_path):
+    report = tmp_path / "report.json"
+    exit_code, events = cli("--report", str(report))
+    assert exit_code == crawl_cli.EXIT_OK
+    assert events[0]['event'] == "start" and events[0]['dates'] == ["20240101"]
+    assert "progress" in {event['event'] for event in events}
+    done = events[-1]
+    assert done['event'] == "done" and done['exit_code'] == crawl_cli.EXIT_OK
+    assert done['rows'] == 5 and done['completed_dates'] == ["20240101"] and done['pending_dates'] == []
+    with open(tmp_path / "out.csv", encoding='utf-8-sig') as f:
+        assert len(list(csv.DictReader(f))) == 5
+    assert "summary" in json.loads(report.read_text(encoding='utf-8'))
+
+def test_unwritable_report_exits_with_io_error(cli, tmp_path):
+    report = tmp_path / "missing" / "report.json"
+    exit_code, events = cli("--report", str(report))
+    assert exit_code == crawl_cli.EXIT_IO
+    error = next(event for event in events if event['event'] == "error")
+    assert error['path'] == str(report)
+    assert events[-1]['event'] == "done" and events[-1]['exit_code'] == crawl_cli.EXIT_IO
+    # 결과 파일은 보고서보다 먼저 저장됩니다.
+    assert events[-1]['output'] == str(tmp_path / "out.csv")
+
+def test_resume_of_another_account_is_refused(cli, tmp_path):
+    exit_code, events = cli()
+    job_id = events[0]['job_id']
+    exit_code, events = cli("--resume", job_id, "--password", "other")
+    assert exit_code == crawl_cli.EXIT_USAGE
+    assert any(event['event'] == "log" and "이 계정의 작업이 아닙니다" in event['message'] for event in events)
@@ -0,0 +1,101 @@
+"""Logging in with other credentials must never tear down a driver pool that running jobs still use."""
+from types import SimpleNamespace
+
+import pytest
+
+import crawl_worker
+from crawl_worker import CrawlService
+
+EMAIL = "user@example.com"
+
+class FakePool:
+    def __init__(self, email, password, headless=True, profile=None):
+        self.credentials = (email, password)
+        self.leased = 0
+        self.closed = False
+        self.failure = None
+
+    def lease(self):
+        self.leased += 1
+        return object()
+
+    def release(self, driver, pages=0):
+        self.leased -= 1
+
+    def stats(self):
+        return {'idle': 0, 'leased': self.leased, 'starting': 0}
+
+    def shutdown(self):
+        self.closed = True
+
+class FakeJob:
+    def __init__(self, pool):
+        self.pool = pool
+        self.checkpoint = SimpleNamespace(job_id="job")
+        self.owner = "owner"
+        self.finished_at = None
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def service(monkeypatch):
+    verified = []
+
+    def verify_login(email, password, headless=True, profile=None):
+        verified.append(password)
+        if password != "new password":
+            raise RuntimeError("login failed")
+
+    monkeypatch.setattr(crawl_worker, "DriverPool", FakePool)
+    monkeypatch.setattr(crawl_worker, "verify_login", verify_login)
+    monkeypatch.setattr(crawl_worker, "prune_log_files", lambda: 0)
+    monkeypatch.setattr(crawl_worker.CrawlCheckpoint, "prune", lambda keep=(): 0)
+    service = CrawlService()
+    service.verified = verified
+    return service
+
+def test_wrong_password_leaves_the_pool_alone(service):
+    pool = service._pool(EMAIL, "old password", True)
+    driver = pool.lease()
+    with pytest.raises(RuntimeError):
+        service._pool(EMAIL, "typo", True)
+    assert service.verified == ["typo"]
+    assert service._pool(EMAIL, "old password", True) is pool
+    assert not pool.closed
+    pool.release(driver)
+
+def test_replaced_pool_is_closed_after_its_jobs_finish(service):
+    old = service._pool(EMAIL, "old password", True)
+    job = service._jobs['job'] = FakeJob(old)
+    driver = old.lease()
+
+    new = service._pool(EMAIL, "new password", True)
+    assert new is not old and new.credentials == (EMAIL, "new password")
+    assert not old.closed
+
+    old.release(driver)
+    service._prune_jobs()
+    # 작업이 끝나기 전에는 드라이버를 잠시 반납한 사이에도 닫지 않습니다.
+    assert not old.closed
+    job.finished_at = 0
+    service._prune_jobs()
+    assert old.closed and not new.closed
+
+def test_replaced_pool_with_leased_drivers_stays_open(service):
+    old = service._pool(EMAIL, "old password", True)
+    driver = old.lease()
+    service._pool(EMAIL, "new password", True)
+    assert not old.closed
+    old.release(driver)
+    service._prune_jobs()
+    assert old.closed
+
+def test_pool_that_failed_to_log_in_is_replaced(service):
+    failed = service._pool(EMAIL, "old password", True)
+    failed.failure = RuntimeError("login failed")
+    pool = service._pool(EMAIL, "old password", True)
+    assert pool is not failed and pool.failure is None
+    # 같은 계정 정보의 재시도이므로 별도 로그인 확인 없이 바꾸고, 쓰는 작업이 없는 실패한 풀은 닫습니다.
+    assert service.verified == []
+    assert failed.closed
@@ -0,0 +1,67 @@
+"""DriverPool stops launching browsers once logging in has failed instead of retrying until the lease times out."""
+import threading
+import time
+
+import pytest
+
+import playboard_core
+from playboard_core import DriverPool
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def execute_script(self, script):
+        return "complete"
+
+    def quit(self):
+        self.quit_called = True
+
+@pytest.fixture
+def browsers(monkeypatch):
+    launched = []
+    lock = threading.Lock()
+
+    def create_driver(headless=True, profile=None):
+        driver = FakeDriver()
+        with lock:
+            launched.append(driver)
+        return driver
+
+    def authenticate_driver(driver, email, password, log_fn=None):
+        time.sleep(0.05)
+        if password != "secret":
+            raise RuntimeError("로그인 실패")
+
+    monkeypatch.setattr(playboard_core, "create_driver", create_driver)
+    monkeypatch.setattr(playboard_core, "authenticate_driver", authenticate_driver)
+    monkeypatch.setattr(playboard_core, "is_logged_in", lambda driver: True)
+    monkeypatch.setattr(playboard_core, "DRIVER_POOL_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(playboard_core, "console_log", lambda message: None)
+    return launched
+
+def test_wrong_password_fails_fast(browsers):
+    pool = DriverPool("user@example.com", "typo", size=2)
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="로그인 실패"):
+        pool.lease(timeout=10)
+    assert time.monotonic() - started < 2
+    assert isinstance(pool.failure, RuntimeError)
+    # 처음 띄운 드라이버 말고는 다시 띄우지 않고, 띄운 드라이버는 모두 닫습니다.
+    with pytest.raises(RuntimeError):
+        pool.lease(timeout=10)
+    assert len(browsers) == 2 and all(driver.quit_called for driver in browsers)
+    pool.shutdown()
+
+def test_pool_keeps_relaunching_after_a_successful_login(browsers):
+    pool = DriverPool("user@example.com", "secret", size=1)
+    driver = pool.lease(timeout=5)
+    pool.credentials = ("user@example.com", "changed")
+    pool.release(driver, pages=pool.max_pages)
+    # 한 번 로그인에 성공한 풀은 나중의 실패를 일시적인 것으로 보고 풀을 막지 않습니다.
+    deadline = time.monotonic() + 2
+    while len(browsers) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.1)
+    assert pool.failure is None
+    pool.shutdown()
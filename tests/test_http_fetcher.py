@@ -0,0 +1,103 @@
+"""PlayboardHttpFetcher against the local fixture stub (see fixtures/playboard_api/README.md for what this does and doesn't verify)."""
+import queue
+import sqlite3
+import threading
+
+import pytest
+
+from playboard_api_stub import PlayboardApiStub
+from playboard_core import ChartStore, PlayboardHttpFetcher, build_records_frame, crawl_date
+
+COOKIES = [{'name': "session", 'value': "abc", 'domain': "127.0.0.1", 'path': "/"}]
+
+@pytest.fixture
+def stub():
+    with PlayboardApiStub() as server:
+        yield server
+
+def make_fetcher(stub, **kwargs):
+    return PlayboardHttpFetcher(cookies=COOKIES, user_agent="pytest", base_url=stub.base_url, **kwargs)
+
+def test_short_chart_follows_cursor(stub):
+    fetcher = make_fetcher(stub)
+    rows = fetcher.fetch_chart(True, "1704067200", "south-korea", 5000)
+    fetcher.close()
+    assert [row['href'].rsplit('/', 1)[-1] for row in rows] == [
+        "dQw4w9WgXcQ", "a1B2c3D4e5F", "ZyXwVuTsRqP", "QwErTyUiOpA", "LkJhGfDsAzX",
+    ]
+    assert [request['path'] for request in stub.requests] == ["/v1/chart/short/most-viewed-all-videos-in-south-korea-daily"] * 2
+    assert stub.requests[0]['params'] == {'period': "1704067200", 'size': "100"}
+    assert stub.requests[1]['params'] == {'period': "1704067200", 'size': "100", 'cursor': "page2"}
+    for request in stub.requests:
+        assert request['headers']['Cookie'] == "session=abc"
+        assert request['headers']['User-Agent'] == "pytest"
+    assert fetcher.reached_end
+
+def test_rows_match_dom_row_format(stub):
+    fetcher = make_fetcher(stub)
+    rows = fetcher.fetch_chart(True, "1704067200", "south-korea", 3)
+    fetcher.close()
+    assert rows[0] == {
+        'title': "첫 번째 쇼츠 #shorts",
+        'href': "https://playboard.co/video/dQw4w9WgXcQ",
+        'views': "1,234,567",
+        'channel': "채널 하나",
+        'subscribers': "152,000",
+        'thumbnail': "//i.ytimg.com/vi/dQw4w9WgXcQ/mqdefault.jpg",
+    }
+    assert rows[1]['subscribers'] is None
+    assert rows[1]['thumbnail'] == "//i.ytimg.com/vi/a1B2c3D4e5F/mqdefault.jpg"
+    assert (rows[2]['views'], rows[2]['channel'], rows[2]['subscribers']) == ("1.2M", "세 번째 채널", "1,020")
+
+    frame = build_records_frame(rows, "20240101")
+    assert list(frame['Views_numeric']) == [1234567, 98000, 1200000]
+    assert list(frame['Subscribers_numeric']) == [152000, -1, 1020]
+
+def test_max_items_limits_page_size_and_rows(stub):
+    fetcher = make_fetcher(stub, page_size=2)
+    rows = fetcher.fetch_chart(True, "1704067200", "south-korea", 4)
+    fetcher.close()
+    assert len(rows) == 4
+    # 스텁은 size와 무관하게 고정 페이지를 돌려주므로 두 번째 요청은 남은 1개만 요청합니다.
+    assert [request['params']['size'] for request in stub.requests] == ["2", "1"]
+
+def test_video_chart_list_payload(stub):
+    fetcher = make_fetcher(stub)
+    rows = fetcher.fetch_chart(False, "1704067200", "south-korea", 5000)
+    fetcher.close()
+    assert [request['path'] for request in stub.requests] == ["/v1/chart/video"]
+    assert [(row['title'], row['views'], row['subscribers']) for row in rows] == [
+        ("Long-form video", "3,400,000", "2,500,000"), ("Another video", "120", None),
+    ]
+    # 목록만 오는 응답은 차트 끝인지 알 수 없습니다.
+    assert not fetcher.reached_end
+
+def test_stop_event_skips_requests(stub):
+    stop_event = threading.Event()
+    stop_event.set()
+    fetcher = make_fetcher(stub)
+    assert fetcher.fetch_chart(True, "1704067200", "south-korea", 100, stop_event) == []
+    fetcher.close()
+    assert stub.requests == []
+
+def test_missing_endpoint_raises(stub):
+    fetcher = make_fetcher(stub)
+    with pytest.raises(Exception):
+        fetcher.fetch_chart(True, "1704067200", "japan", 100)
+    fetcher.close()
+
+NO_FILTER = {'is_filter_applied': False, 'selected_filters': {}, 'use_custom_filter': False, 'custom_min': -1, 'custom_max': -1}
+
+@pytest.mark.parametrize("is_short, fetched, stored_depth", [(True, 5, 100), (False, 2, 2)], ids=["end-reported", "end-unknown"])
+def test_crawl_date_stores_only_the_depth_it_knows(stub, tmp_path, is_short, fetched, stored_depth):
+    chart_store = ChartStore(str(tmp_path / "charts.sqlite3"))
+    fetcher = make_fetcher(stub)
+    items = crawl_date(None, is_short, "20240101", "south-korea", 100, threading.Event(), queue.Queue(), NO_FILTER, set(),
+                       http_fetcher=fetcher, chart_store=chart_store)
+    fetcher.close()
+    assert len(items) == fetched
+    with sqlite3.connect(chart_store.path) as conn:
+        assert conn.execute("SELECT depth FROM charts").fetchone()[0] == stored_depth
+    # 끝을 알 수 없는 차트는 더 깊은 요청에서 다시 수집해야 합니다.
+    assert (chart_store.load(is_short, "south-korea", "2024-01-01", 100) is None) == (stored_depth < 100)
+    assert len(chart_store.load(is_short, "south-korea", "2024-01-01", fetched)) == fetched
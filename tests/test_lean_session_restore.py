@@ -0,0 +1,53 @@
+"""Saved sessions must be restorable on drivers with the lean profile's blocked URL list."""
+import time
+from fnmatch import fnmatchcase
+
+import pytest
+
+from playboard_core import LEAN_BLOCKED_URLS, SESSION_RESTORE_URL, restore_session_snapshot
+
+SNAPSHOT = {
+    'saved_at': time.time(),
+    'cookies': [{'name': "session", 'value': "abc", 'domain': ".playboard.co", 'path': "/"}],
+    'local_storage': {'token': "xyz"},
+}
+
+class FakeDriver:
+    """Mimics Chrome with Network.setBlockedURLs: blocked loads never reach the site, so its cookies can't be set."""
+
+    def __init__(self, blocked_urls):
+        self.blocked_urls = blocked_urls
+        self.current_url = "data:,"
+        self.cookies = []
+
+    def get(self, url):
+        if any(fnmatchcase(url, pattern) for pattern in self.blocked_urls):
+            self.current_url = "chrome-error://chromewebdata/"
+        else:
+            self.current_url = url
+
+    def add_cookie(self, cookie):
+        if "playboard.co" not in self.current_url:
+            raise Exception("invalid cookie domain")
+        self.cookies.append(cookie)
+
+    def execute_script(self, script, *args):
+        return "complete"
+
+    def find_elements(self, by, value):
+        # 쿠키가 있으면 로그인된 페이지처럼 '로그인' 링크가 없습니다.
+        return [] if self.cookies else ["로그인"]
+
+def test_restore_url_is_not_blocked_by_lean_profile():
+    assert not [pattern for pattern in LEAN_BLOCKED_URLS if fnmatchcase(SESSION_RESTORE_URL, pattern)]
+
+@pytest.mark.parametrize("blocked_urls", [[], LEAN_BLOCKED_URLS], ids=["standard", "lean"])
+def test_restore_session_snapshot(blocked_urls):
+    driver = FakeDriver(blocked_urls)
+    assert restore_session_snapshot(driver, SNAPSHOT)
+    assert [cookie['name'] for cookie in driver.cookies] == ["session"]
+
+def test_restore_fails_loudly_when_no_cookie_can_be_added():
+    driver = FakeDriver(["*playboard.co*"])
+    with pytest.raises(RuntimeError):
+        restore_session_snapshot(driver, SNAPSHOT)
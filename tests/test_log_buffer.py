@@ -0,0 +1,56 @@
+"""Log files are shared per name, released when buffers go away, and pruned once stale."""
+import gc
+import os
+import time
+
+import playboard_core
+from playboard_core import LogBuffer, prune_log_files
+
+def test_memory_only_until_attached(tmp_path):
+    buffer = LogBuffer(log_dir=str(tmp_path))
+    buffer.add("로그인 전")
+    assert os.listdir(tmp_path) == []
+    assert "로그인 전" in buffer.read_file().decode("utf-8")
+
+    buffer.attach_file("account_abc", str(tmp_path))
+    buffer.add("로그인 후")
+    lines = buffer.read_file().decode('utf-8').splitlines()
+    assert [line.split(" ", 3)[-1] for line in lines] == ["로그인 전", "로그인 후"]
+    buffer.close()
+
+def test_buffers_of_one_name_share_a_file(tmp_path):
+    first = LogBuffer("account_abc", log_dir=str(tmp_path))
+    second = LogBuffer("account_abc", log_dir=str(tmp_path))
+    first.add("첫 번째 세션")
+    second.add("두 번째 세션")
+    assert os.listdir(tmp_path) == ["account_abc.log"]
+    assert len(second.read_file().splitlines()) == 2
+    assert len(playboard_core._log_handlers) == 1
+
+    first.close()
+    assert first.path is None and second.path is not None
+    second.close()
+    assert playboard_core._log_handlers == {}
+
+def test_garbage_collected_buffer_releases_its_file(tmp_path):
+    buffer = LogBuffer("account_abc", log_dir=str(tmp_path))
+    buffer.add("세션 종료 전")
+    del buffer
+    gc.collect()
+    assert playboard_core._log_handlers == {}
+
+def test_prune_removes_only_stale_closed_files(tmp_path):
+    stale = tmp_path / "session_0123456789ab.log"
+    stale_backup = tmp_path / "session_0123456789ab.log.1"
+    other = tmp_path / "notes.txt"
+    for path in (stale, stale_backup, other):
+        path.write_text("x")
+    open_buffer = LogBuffer("job_abc", log_dir=str(tmp_path))
+    open_buffer.add("실행 중")
+    old = time.time() - 3600
+    for path in (stale, stale_backup, other, tmp_path / "job_abc.log"):
+        os.utime(path, (old, old))
+
+    assert prune_log_files(str(tmp_path), max_age=60) == 2
+    assert sorted(os.listdir(tmp_path)) == ["job_abc.log", "notes.txt"]
+    open_buffer.close()
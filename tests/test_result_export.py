@@ -0,0 +1,58 @@
+"""Exports read the result table in bounded chunks and write the same files whatever the row count."""
+import numpy as np
+import pytest
+
+from playboard_core import RECORD_COLUMNS, build_records_frame
+from result_export import PDF_ROWS_PER_PAGE, ResultExporter, write_pdf
+from result_model import ResultTable
+
+# 한글 폰트가 없는 환경에서도 PDF는 만들어지므로 글리프 경고는 무시합니다.
+pytestmark = pytest.mark.filterwarnings("ignore:Glyph .* missing from font")
+
+def make_table(rows):
+    raw = [{'title': f"동영상 {i}", 'href': f"/video/abc{i:08d}", 'views': f"{i * 10:,}", 'channel': f"채널 {i % 7}",
+            'subscribers': f"{i:,}", 'thumbnail': None} for i in range(rows)]
+    table = ResultTable()
+    positions = table.add(build_records_frame(raw, "20240101")) if rows else np.array([], dtype=np.int64)
+    return table, positions
+
+class ExpandSpy:
+    """Wraps a ResultTable and remembers how many rows each expand() call materialized."""
+
+    def __init__(self, table):
+        self.table = table
+        self.version = table.version
+        self.sizes = []
+
+    def expand(self, positions):
+        self.sizes.append(len(positions))
+        return self.table.expand(positions)
+
+@pytest.mark.parametrize("rows", [0, 1, PDF_ROWS_PER_PAGE, 3 * PDF_ROWS_PER_PAGE + 4])
+def test_pdf_export_expands_one_page_at_a_time(tmp_path, rows):
+    table, positions = make_table(rows)
+    spy = ExpandSpy(table)
+    exporter = ResultExporter(spy, thumbnail_loader=lambda url: None)
+    path = exporter.export("results", positions, 'pdf')
+    with open(path, 'rb') as f:
+        assert f.read(5) == b"%PDF-"
+    assert sum(spy.sizes) == rows
+    assert all(size <= PDF_ROWS_PER_PAGE for size in spy.sizes)
+
+def test_write_pdf_counts_pages_from_total(tmp_path):
+    table, positions = make_table(2 * PDF_ROWS_PER_PAGE + 1)
+    pages = (table.expand(positions[start:start + PDF_ROWS_PER_PAGE]) for start in range(0, len(positions), PDF_ROWS_PER_PAGE))
+    assert write_pdf(pages, len(positions), str(tmp_path / "out.pdf"), log_fn=lambda message: None) == 3
+
+@pytest.mark.parametrize("rows", [0, 3])
+def test_parquet_schema_does_not_depend_on_rows(tmp_path, rows):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table, positions = make_table(rows)
+    exporter = ResultExporter(table)
+    path = exporter.export("results", positions, 'parquet')
+    schema = pq.read_schema(path)
+    assert schema.names == RECORD_COLUMNS
+    assert str(schema.field('Views_numeric').type) == "int64"
+    assert str(schema.field('Subscribers_numeric').type) == "int64"
+    assert str(schema.field('Title').type) == "string"
+    assert pq.read_table(path).num_rows == rows
@@ -0,0 +1,21 @@
+"""State files resolve to the same absolute paths whatever directory the app or the worker runs from."""
+import os
+
+import playboard_core
+import crawl_worker
+import thumbnail_cache
+from playboard_core import state_path
+
+def test_default_state_paths_are_absolute():
+    for path in (playboard_core.LOG_DIR, playboard_core.CHART_STORE_PATH, playboard_core.CRAWL_JOB_DIR,
+                 playboard_core.SESSION_SNAPSHOT_DIR, crawl_worker.WORKER_LOG_FILE, thumbnail_cache.THUMBNAIL_DIR):
+        assert os.path.isabs(path)
+        assert os.path.dirname(path) == os.path.abspath(playboard_core.STATE_DIR)
+
+def test_state_path_does_not_depend_on_cwd(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLAYBOARD_TEST_PATH", "data/charts.sqlite3")
+    before = state_path("PLAYBOARD_TEST_PATH", "unused")
+    monkeypatch.chdir(tmp_path)
+    assert state_path("PLAYBOARD_TEST_PATH", "unused") == before == os.path.join(os.path.abspath(playboard_core.STATE_DIR), "data", "charts.sqlite3")
+    monkeypatch.setenv("PLAYBOARD_TEST_PATH", str(tmp_path / "elsewhere"))
+    assert state_path("PLAYBOARD_TEST_PATH", "unused") == str(tmp_path / "elsewhere")
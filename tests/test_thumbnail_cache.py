@@ -0,0 +1,103 @@
+"""ThumbnailCache against a local image server: downsizing, size-bounded LRU eviction and failure backoff."""
+import io
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image, features
+
+import thumbnail_cache
+from thumbnail_cache import ThumbnailCache
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """Serves a 640x360 JPEG for /img/<n>.jpg (its colour depends on n) and 404 for anything else."""
+
+    def do_GET(self):
+        self.server.hits[self.path] += 1
+        if not self.path.startswith("/img/"):
+            self.send_error(404)
+            return
+        n = int(self.path.rsplit("/", 1)[1].split(".")[0])
+        data = io.BytesIO()
+        Image.new('RGB', (640, 360), ((n * 40) % 256, (n * 90) % 256, (n * 150) % 256)).save(data, 'JPEG')
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(data.getvalue())))
+        self.end_headers()
+        self.wfile.write(data.getvalue())
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    httpd.hits = Counter()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+def make_cache(tmp_path, **kwargs):
+    return ThumbnailCache(directory=str(tmp_path / "thumbs"), workers=2, log_fn=lambda message: None, **kwargs)
+
+@pytest.mark.parametrize("image_format, magic", [('WEBP', b"RIFF"), ('JPEG', b"\xff\xd8\xff")])
+def test_fetch_stores_a_downsized_image(tmp_path, server, image_format, magic):
+    if image_format == 'WEBP' and not features.check('webp'):
+        pytest.skip("Pillow built without WebP")
+    cache = make_cache(tmp_path, image_format=image_format)
+    path = cache.fetch(url(server, "/img/1.jpg"))
+    assert path.endswith(thumbnail_cache.THUMBNAIL_FORMATS[image_format]['extension'])
+    with open(path, 'rb') as f:
+        assert f.read(len(magic)) == magic
+    with Image.open(path) as image:
+        assert image.format == image_format and image.size == thumbnail_cache.THUMBNAIL_SIZE
+    data_uri = cache.get_many([url(server, "/img/1.jpg")])[url(server, "/img/1.jpg")]
+    assert data_uri.startswith(f"data:{thumbnail_cache.THUMBNAIL_FORMATS[image_format]['mime']};base64,")
+
+def test_evicts_least_recently_used_by_bytes(tmp_path, server):
+    cache = make_cache(tmp_path, image_format='JPEG')
+    first = cache.fetch(url(server, "/img/1.jpg"))
+    # 파일 두 개만 들어가는 크기로 줄입니다.
+    cache.max_bytes = 2 * os.path.getsize(first) + os.path.getsize(first) // 2
+    cache.fetch(url(server, "/img/2.jpg"))
+    cache.path_for(url(server, "/img/1.jpg"))
+    cache.fetch(url(server, "/img/3.jpg"))
+    assert cache.path_for(url(server, "/img/1.jpg")) == first
+    assert cache.path_for(url(server, "/img/2.jpg")) is None
+    assert cache.path_for(url(server, "/img/3.jpg"))
+    stats = cache.stats()
+    assert stats['files'] == 2 and stats['bytes'] <= cache.max_bytes
+    assert len(os.listdir(cache.directory)) == 2
+
+def test_failed_url_is_retried_only_after_backoff(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(thumbnail_cache, "THUMBNAIL_RETRY_AFTER", 0.2)
+    cache = make_cache(tmp_path)
+    missing = url(server, "/missing/1.jpg")
+    assert cache.get_many([missing], timeout=5) == {missing: None}
+    assert server.hits["/missing/1.jpg"] == 1 and cache.stats()['failed'] == 1
+    # 대기 시간 안에는 다시 요청하지 않습니다.
+    assert cache.prefetch([missing]) == []
+    assert server.hits["/missing/1.jpg"] == 1
+    time.sleep(0.25)
+    cache.get_many([], timeout=5)
+    # 대기 시간이 지난 실패 기록은 지워집니다.
+    assert cache.stats()['failed'] == 0
+    cache.get_many([missing], timeout=5)
+    assert server.hits["/missing/1.jpg"] == 2
+
+def test_get_many_does_not_wait_by_default(tmp_path, server):
+    cache = make_cache(tmp_path)
+    image = url(server, "/img/5.jpg")
+    assert cache.get_many([image]) == {image: None}
+    for _ in range(100):
+        if cache.path_for(image):
+            break
+        time.sleep(0.05)
+    assert cache.get_many([image])[image].startswith("data:image/")
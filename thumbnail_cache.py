@@ -0,0 +1,224 @@
+"""Local thumbnail cache for result tables.
+
+Thumbnails are fetched concurrently through one pooled HTTP session, shrunk with Pillow to small WebP (or
+JPEG) files and kept on disk with least-recently-used eviction by total size. Tables show them as data URIs,
+so the browser no longer loads a full-size i.ytimg.com image for every row on every render.
+"""
+import io
+import os
+import base64
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from urllib3.util.retry import Retry
+from PIL import Image, features
+
+from playboard_core import console_log, state_path
+
+THUMBNAIL_DIR = state_path("PLAYBOARD_THUMBNAIL_DIR", ".playboard_thumbnails")
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get("PLAYBOARD_THUMBNAIL_CACHE_MB", "200")) * 2 ** 20
+THUMBNAIL_SIZE = (160, 90)
+THUMBNAIL_QUALITY = 70
+THUMBNAIL_WORKERS = 8
+THUMBNAIL_TIMEOUT = 10
+THUMBNAIL_RETRY_AFTER = 300
+THUMBNAIL_FORMATS = {
+    'WEBP': {'extension': ".webp", 'mime': "image/webp"},
+    'JPEG': {'extension': ".jpg", 'mime': "image/jpeg"},
+}
+
+class ThumbnailCache:
+    """Disk cache of downsized thumbnails keyed by source URL, shared by all sessions of the process.
+
+    `get_many()` fetches missing images in parallel and returns data URIs. `path_for()` gives the cached
+    file for serving from a static path instead. Pass `session` to fetch from somewhere else, e.g. a
+    local image server.
+    """
+
+    def __init__(self, directory=THUMBNAIL_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES, size=THUMBNAIL_SIZE,
+                 image_format='WEBP', quality=THUMBNAIL_QUALITY, workers=THUMBNAIL_WORKERS, session=None, log_fn=console_log):
+        if image_format == 'WEBP' and not features.check('webp'):
+            log_fn("⚠️ Pillow에 WebP 지원이 없어 썸네일을 JPEG로 저장합니다.")
+            image_format = 'JPEG'
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = size
+        self.image_format = image_format
+        self.quality = quality
+        self.log_fn = log_fn
+        self.session = session or self._create_session(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        # 파일 이름 -> 크기. 가장 오래전에 사용한 파일이 앞에 옵니다.
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._pending = {}
+        # 가져오지 못한 URL -> 실패 시각. 다시 렌더링할 때마다 같은 요청을 반복하지 않도록
+        # THUMBNAIL_RETRY_AFTER 동안 건너뛰고, 그 뒤에는 목록에서 지웁니다. 실패 시각 순서로 쌓입니다.
+        self._failed = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def _create_session(workers):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=workers, pool_maxsize=workers,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _load_index(self):
+        extension = THUMBNAIL_FORMATS[self.image_format]['extension']
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(extension):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _file_name(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest() + THUMBNAIL_FORMATS[self.image_format]['extension']
+
+    def _evict(self):
+        # 호출하는 쪽에서 잠금을 잡고 있거나 초기화 중이어야 합니다.
+        while self._total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _expire_failures(self, now):
+        # 호출하는 쪽에서 잠금을 잡고 있어야 합니다.
+        while self._failed:
+            url, failed_at = next(iter(self._failed.items()))
+            if now - failed_at < THUMBNAIL_RETRY_AFTER:
+                break
+            del self._failed[url]
+
+    def stats(self):
+        with self._lock:
+            return {'files': len(self._entries), 'bytes': self._total_bytes, 'max_bytes': self.max_bytes,
+                    'failed': len(self._failed)}
+
+    def path_for(self, url):
+        """Returns the cached file for `url` (marking it recently used), or None."""
+        if not url:
+            return None
+        name = self._file_name(url)
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            # 재시작 후에도 사용 순서가 유지되도록 수정 시각을 갱신합니다.
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._total_bytes -= self._entries.pop(name, 0)
+            return None
+        return path
+
+    def fetch(self, url):
+        """Downloads, downsizes and stores one thumbnail; returns its path, or None when it can't be loaded."""
+        path = self.path_for(url)
+        if path or not url:
+            return path
+        try:
+            response = self.session.get(url if "://" in url else "https:" + url, timeout=THUMBNAIL_TIMEOUT)
+            response.raise_for_status()
+            image = Image.open(io.BytesIO(response.content)).convert('RGB')
+            image.thumbnail(self.size)
+            data = io.BytesIO()
+            image.save(data, self.image_format, quality=self.quality)
+        except (requests.RequestException, OSError) as e:
+            self.log_fn(f"⚠️ 썸네일을 가져오지 못했습니다: {url} ({e})")
+            with self._lock:
+                self._failed.pop(url, None)
+                self._failed[url] = time.monotonic()
+            return None
+
+        name = self._file_name(url)
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data.getvalue())
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes += data.tell() - self._entries.pop(name, 0)
+            self._entries[name] = data.tell()
+            self._evict()
+        return path
+
+    def prefetch(self, urls):
+        """Starts fetching every URL that isn't cached yet; returns the futures of those fetches."""
+        futures = []
+        now = time.monotonic()
+        with self._lock:
+            self._expire_failures(now)
+        for url in dict.fromkeys(urls):
+            if not url or self.path_for(url):
+                continue
+            submitted = False
+            with self._lock:
+                if url in self._failed:
+                    continue
+                future = self._pending.get(url)
+                if future is None:
+                    future = self._executor.submit(self.fetch, url)
+                    self._pending[url] = future
+                    submitted = True
+            if submitted:
+                # 이미 끝난 작업이면 콜백이 바로 실행되므로 잠금 밖에서 등록합니다.
+                future.add_done_callback(lambda _, url=url: self._forget_pending(url))
+            futures.append(future)
+        return futures
+
+    def _forget_pending(self, url):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def data_uri(self, url):
+        path = self.path_for(url)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                encoded = base64.b64encode(f.read()).decode('ascii')
+        except OSError:
+            return None
+        return f"data:{THUMBNAIL_FORMATS[self.image_format]['mime']};base64,{encoded}"
+
+    def get_many(self, urls, timeout=0):
+        """Maps each URL to a data URI of its cached thumbnail, fetching missing ones in parallel.
+
+        URLs that aren't available within `timeout` seconds (by default, not cached yet) map to None; their
+        fetch keeps running and they are served from the cache on a later call.
+        """
+        futures = self.prefetch(urls)
+        if timeout:
+            wait(futures, timeout=timeout)
+        return {url: self.data_uri(url) for url in dict.fromkeys(urls)}
+
+    def load_image(self, url):
+        """Returns the cached thumbnail as a PIL image (fetching it if needed), or None."""
+        path = self.fetch(url)
+        if path is None:
+            return None
+        try:
+            with Image.open(path) as image:
+                return image.convert('RGB')
+        except OSError:
+            return None